@@ -1,6 +1,9 @@
+import os
 import pandas as pd
 import json
 import numpy as np
+from data_quality import check_quality, print_summary
+from gazetteer import GAZETTEER_FILE, add_place_columns
 
 def clean_participant_data(file_path, output_path):
     df = pd.read_csv(file_path)
@@ -46,12 +49,20 @@ def clean_participant_data(file_path, output_path):
 
     # Apply the cleaning logic
     df[['Participant Count', 'Men', 'Women', 'Children']] = df.apply(parse_counts, axis=1)
+
+    # State / District / Block / Village from User Location, against the local gazetteer
+    if 'User Location' in df.columns and os.path.exists(GAZETTEER_FILE):
+        add_place_columns(df)
     
     # Save the cleaned data
     df.to_csv(output_path, index=False)
     print(f"✅ Data cleaned and saved to: {output_path}")
     print(f"Sample Totals: {df['Participant Count'].head().tolist()}")
 
+    # Rule-based data-quality summary of the cleaned records
+    _, summary = check_quality(df)
+    print_summary(summary)
+
 if __name__ == "__main__":
     # Input: your raw file | Output: the file for Step 1
     clean_participant_data('raw_data.csv', 'cleaned_data.csv')
\ No newline at end of file
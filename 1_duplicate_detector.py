@@ -0,0 +1,208 @@
+"""
+Duplicate Chaupal report detection (runs between the cleaner and the AI tagger).
+
+Facilitators sometimes submit the same Chaupal twice, which double-counts its participants and every
+statement downstream. Reports are first blocked on (User name, Village / User Location, Date of
+Discussion); only reports in the same block are compared. Within a block, reports with the same
+normalized statement text are exact duplicates. The remaining distinct texts are compared by a
+64-bit SimHash of their words and word pairs. Fingerprints are split into bands, and only texts that
+share a band value are compared, so the work stays linear in the number of reports. Texts whose
+fingerprints differ in at most max_distance bits are near duplicates. Because max_distance is below
+the number of bands, every such pair shares at least one band. Near-duplicate links can chain, so
+every member is re-checked against its group's kept report, and one farther than max_distance bits
+is split off: SimHash_Distance never exceeds max_distance.
+
+The first submission of each duplicate group is kept. All groups are written to a review CSV;
+--drop also writes the cleaned data without the later submissions (to DEDUPLICATED_FILE unless
+--output says otherwise; the input is never overwritten implicitly).
+"""
+
+import re
+import time
+import argparse
+import hashlib
+import numpy as np
+import pandas as pd
+
+INPUT_FILE = 'cleaned_data.csv'
+REVIEW_FILE = 'duplicate_review.csv'
+DEDUPLICATED_FILE = 'cleaned_data_deduplicated.csv'
+SIMHASH_BANDS = 8
+BAND_BITS = 64 // SIMHASH_BANDS
+NEAR_DUPLICATE_DISTANCE = 6 # max differing fingerprint bits; must stay below SIMHASH_BANDS
+CONTENT_COLUMNS = ['Challenges', 'Solutions']
+
+_BIT_SHIFTS = np.arange(64, dtype=np.uint64)
+_BYTE_BITS = np.array([bin(b).count('1') for b in range(256)], dtype=np.int64)
+
+def popcount(values):
+    """Set bits per uint64 value, via a byte lookup table (np.bitwise_count needs numpy 2)."""
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    return _BYTE_BITS[values.view(np.uint8)].reshape(len(values), 8).sum(axis=1)
+
+def normalize_key(values):
+    """Lowercased, whitespace-collapsed text per row ('' when missing); evaluated per distinct value."""
+    codes, uniques = pd.factorize(values)
+    keys = np.array([' '.join(str(u).split()).lower() for u in uniques] + [''], dtype=object)
+    return keys[codes]
+
+def date_key(values):
+    """ISO date per row where the value parses as a date (ISO first, else day-first), else the normalized text."""
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=object)
+    parsed = pd.to_datetime(uniques, errors='coerce', format='ISO8601')
+    parsed = parsed.fillna(pd.to_datetime(uniques, errors='coerce', format='mixed', dayfirst=True))
+    keys = [d.strftime('%Y-%m-%d') if pd.notna(d) else ' '.join(str(u).split()).lower() for u, d in zip(uniques, parsed)]
+    return np.array(keys + [''], dtype=object)[codes]
+
+def location_key(df):
+    """Village where the report names one, else User Location."""
+    location = normalize_key(df['User Location']) if 'User Location' in df.columns else np.full(len(df), '', dtype=object)
+    if 'Village' in df.columns:
+        village = normalize_key(df['Village'])
+        location = np.where(village != '', village, location)
+    return location
+
+def content_key(df):
+    """Statement text of each report as its words, lowercased and space-joined."""
+    columns = [c for c in CONTENT_COLUMNS if c in df.columns]
+    if not columns:
+        return np.full(len(df), '', dtype=object)
+    text = df[columns[0]].fillna('').astype(str)
+    for col in columns[1:]:
+        text = text + ' \n ' + df[col].fillna('').astype(str)
+    codes, uniques = pd.factorize(text)
+    keys = np.array([' '.join(re.findall(r'\w+', u.lower())) for u in uniques] + [''], dtype=object)
+    return keys[codes]
+
+def feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def simhash(text, memo=None):
+    """64-bit SimHash over the words and word pairs of a normalized text. memo caches feature hashes across texts."""
+    words = text.split()
+    features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    if not features:
+        return 0
+    if memo is None:
+        memo = {}
+    hashes = np.fromiter((memo[f] if f in memo else memo.setdefault(f, feature_hash(f)) for f in features),
+                         dtype=np.uint64, count=len(features))
+    votes = ((hashes[:, None] >> _BIT_SHIFTS) & np.uint64(1)).sum(axis=0)
+    return sum(1 << int(bit) for bit in np.flatnonzero(votes * 2 > len(features)))
+
+def find_duplicates(df, max_distance=NEAR_DUPLICATE_DISTANCE):
+    """
+    Duplicate columns for every report, in df's row order: Duplicate_Group (-1 if unique), and for
+    reports that repeat an earlier one, Duplicate_Of (id of the kept report), Duplicate_Type
+    ('exact' / 'near') and SimHash_Distance to the kept report.
+    """
+    if max_distance >= SIMHASH_BANDS:
+        raise ValueError(f"max_distance must be below {SIMHASH_BANDS} (the number of SimHash bands)")
+    n = len(df)
+    user = normalize_key(df['User name']) if 'User name' in df.columns else np.full(n, '', dtype=object)
+    blocks = pd.DataFrame({'user': user, 'location': location_key(df),
+                           'date': date_key(df['Date of Discussion']) if 'Date of Discussion' in df.columns else ''}).groupby(
+                               ['user', 'location', 'date'], sort=False).ngroup().to_numpy()
+    content = content_key(df)
+    text_ids, texts = pd.factorize(content)
+    has_text = content != ''
+
+    # Union-find over row positions; the root is always the earliest row of its group
+    parent = np.arange(n)
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    def union(i, j):
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    # Exact duplicates: same block, same text; each (block, text) keeps its first row as representative
+    pairs = pd.DataFrame({'block': blocks[has_text], 'text': text_ids[has_text], 'row': np.flatnonzero(has_text)})
+    first_rows = pairs.groupby(['block', 'text'], sort=False)['row'].transform('min').to_numpy()
+    for row, first in zip(pairs['row'].to_numpy(), first_rows):
+        if row != first:
+            union(first, row)
+
+    # Near duplicates: distinct texts of a block that share a SimHash band, verified by Hamming distance.
+    # Only blocks holding more than one distinct text can contain any, so only their texts are fingerprinted.
+    reps = pairs[pairs['row'].to_numpy() == first_rows]
+    reps = reps[reps.groupby('block', sort=False)['row'].transform('size').to_numpy() > 1]
+    fingerprints = np.zeros(len(texts), dtype=np.uint64)
+    memo = {}
+    for t in np.unique(reps['text'].to_numpy()):
+        fingerprints[t] = simhash(texts[t], memo)
+    rep_rows, rep_blocks = reps['row'].to_numpy(), reps['block'].to_numpy()
+    rep_prints = fingerprints[reps['text'].to_numpy()]
+    compared = set()
+    for band in range(SIMHASH_BANDS):
+        band_values = (rep_prints >> np.uint64(BAND_BITS * band)) & np.uint64((1 << BAND_BITS) - 1)
+        buckets = pd.DataFrame({'block': rep_blocks, 'band': band_values}).groupby(['block', 'band'], sort=False).indices
+        for members in buckets.values():
+            for a in range(len(members)):
+                for b in range(a + 1, len(members)):
+                    i, j = rep_rows[members[a]], rep_rows[members[b]]
+                    if (i, j) in compared:
+                        continue
+                    compared.add((i, j))
+                    if (int(rep_prints[members[a]]) ^ int(rep_prints[members[b]])).bit_count() <= max_distance:
+                        union(i, j)
+
+    roots = np.array([find(i) for i in range(n)], dtype=np.int64)
+
+    # Near-duplicate links chain (a~b, b~c), so a text can end up more than max_distance bits from
+    # its group's kept report. Such rows leave the group; their exact copies stay with the first of them.
+    row_prints = np.where(has_text, fingerprints[np.maximum(text_ids, 0)] if len(texts) else 0, 0).astype(np.uint64)
+    first_of = np.arange(n)
+    first_of[pairs['row'].to_numpy()] = first_rows
+    far = (content != content[roots]) & (popcount(row_prints ^ row_prints[roots]) > max_distance)
+    roots[far] = first_of[far]
+
+    in_group = np.bincount(roots, minlength=n)[roots] > 1
+    dropped = in_group & (roots != np.arange(n))
+    group = np.full(n, -1, dtype=np.int64)
+    group[in_group] = pd.factorize(roots[in_group])[0] # numbered in order of first submission
+    distance = np.where(dropped, popcount(row_prints ^ row_prints[roots]), 0).astype(np.int64)
+    kept_ids = df['id'].to_numpy()[roots] if 'id' in df.columns else roots
+    return pd.DataFrame({
+        'Duplicate_Group': group,
+        'Duplicate_Of': np.where(dropped, kept_ids, None),
+        'Duplicate_Type': np.where(dropped, np.where(content == content[roots], 'exact', 'near'), ''),
+        'SimHash_Distance': distance,
+    }, index=df.index)
+
+def detect_duplicates(file_path, review_path=REVIEW_FILE, drop=False, output_path=DEDUPLICATED_FILE, max_distance=NEAR_DUPLICATE_DISTANCE):
+    """Flags duplicate reports in file_path, writes the review list and optionally drops the duplicates."""
+    df = pd.read_csv(file_path)
+    start = time.perf_counter()
+    flags = find_duplicates(df, max_distance)
+    elapsed = time.perf_counter() - start
+
+    dropped = flags['Duplicate_Of'].notna()
+    review = pd.concat([flags, df], axis=1)[flags['Duplicate_Group'] >= 0]
+    review.insert(1, 'Action', np.where(dropped[review.index], 'drop', 'keep'))
+    review.sort_values(['Duplicate_Group'], kind='stable').to_csv(review_path, index=False)
+
+    participants = pd.to_numeric(df.loc[dropped, 'Participant Count'], errors='coerce').fillna(0).sum() if 'Participant Count' in df.columns else 0
+    print(f"🔍 Checked {len(df):,} reports for duplicates in {elapsed:.2f}s")
+    print(f"   Exact duplicates: {(flags['Duplicate_Type'] == 'exact').sum():,}")
+    print(f"   Near duplicates (≤{max_distance} SimHash bits): {(flags['Duplicate_Type'] == 'near').sum():,}")
+    print(f"   Participants double-counted: {int(participants):,}")
+    print(f"   📝 Review list: {review_path} ({flags['Duplicate_Group'].max() + 1 if len(df) else 0:,} groups)")
+
+    if drop:
+        df[~dropped].to_csv(output_path, index=False)
+        print(f"✅ Dropped {dropped.sum():,} duplicate reports; {(~dropped).sum():,} saved to: {output_path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flag duplicate Chaupal reports before statements are exploded.")
+    parser.add_argument('--input', default=INPUT_FILE, help="Cleaned report CSV (output of 0_data_cleaner.py)")
+    parser.add_argument('--review', default=REVIEW_FILE, help="Where to write the duplicate groups for review")
+    parser.add_argument('--drop', action='store_true', help="Write the reports without the later submissions of each group")
+    parser.add_argument('--output', default=DEDUPLICATED_FILE, help="With --drop, where to write the de-duplicated reports (pass the input path to replace it)")
+    parser.add_argument('--max-distance', type=int, default=NEAR_DUPLICATE_DISTANCE, help=f"Max differing SimHash bits for near duplicates (below {SIMHASH_BANDS})")
+    args = parser.parse_args()
+    detect_duplicates(args.input, args.review, drop=args.drop, output_path=args.output, max_distance=args.max_distance)
@@ -6,6 +6,8 @@ import json
 import boto3
 from tqdm import tqdm
 from dotenv import load_dotenv
+from rules import RULES, stamp_output
+from statement_dictionary import StatementDictionary, ID_COLUMN
 
 load_dotenv()
 
@@ -21,18 +23,7 @@ claude_beadrock_client = boto3.client(
 MODEL_ID = "global.anthropic.claude-sonnet-4-5-20250929-v1:0"
 MODEL_VERSION = "bedrock-2023-05-31"
 
-THEME_KNOWLEDGE_BASE = """
-1. Poverty and Economic Barriers: Financial hardship, child labour. Keywords: Poor, no money.
-2. Legal Document-linked Barriers: Missing Aadhaar, birth certificates. Keywords: No Aadhar, no ID.
-3. Child Marriage Issue: Early marriage preventing education. Keywords: Child marriage.
-4. Distance and Accessibility Issues: School far, bad roads, weather. Keywords: Far, no bus, rain.
-5. Parental Attitudes & Socio-Cultural: Mindsets against girls, dowry, domestic roles.
-6. School Infrastructure & Facility: Toilets, water, Mid-day meals, books, govt schemes.
-7. Teacher Capacity & Quality: Shortage of teachers, irregular attendance.
-8. Safety Issues: Harassment, unsafe routes, stray dogs.
-9. Substance Abuse & Addiction: Alcohol, drugs, gambling, mobile addiction.
-10. Other Factors: General awareness, migration. (Target <10%)
-"""
+THEME_KNOWLEDGE_BASE = RULES.theme_knowledge_base()
 
 def get_ai_mapping_bedrock(text_batch, type_label):
     prompt_content = f"""Act as an expert Social Data Analyst. Use these THEMES:
@@ -118,8 +109,13 @@ def process_file(input_csv, output_csv, type_label):
         
     if final_dfs:
         result_df = pd.concat(final_dfs, ignore_index=True)
+        # Stable statement ids let later stages join on integers instead of the echoed free text
+        statements = StatementDictionary.load()
+        result_df[ID_COLUMN] = statements.encode(result_df['Original'])
+        statements.save()
         result_df.to_csv(output_csv, index=False)
-        print(f"✅ Mapping successfully saved to {output_csv}")
+        stamp_output(output_csv)
+        print(f"✅ Mapping successfully saved to {output_csv} (rule set v{RULES.version}, {RULES.hash[:12]})")
 
 if __name__ == "__main__":
     # Ensure these files exist from Phase 1
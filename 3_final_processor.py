@@ -3,11 +3,24 @@ import re
 import os
 from docx import Document
 from docx.shared import Pt
-from docx.oxml.ns import qn
-from docx.oxml import OxmlElement
+from docx.oxml import parse_xml
+from lxml import etree
 import json
+import time
+import sys
+import argparse
+import threading
 import boto3
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from dotenv import load_dotenv
+from aggregate_cube import CUBE_DIR, build_cube, cube_key, load_cube, save_cube, statement_slice, value_counts_from, ranked_counts
+from pipeline_cache import fingerprint, load_cached, save_cached
+from docx_tables import add_bulk_table
+from docx_stream import StreamingDocument, flush_document
+from label_cache import rule_set_hash, classify_column
+from rules import RULES
+from dataset_snapshot import load_dataset, clean_theme_names
 
 load_dotenv()
 
@@ -25,121 +38,99 @@ except Exception as e:
 
 MODEL_ID = "global.anthropic.claude-sonnet-4-5-20250929-v1:0"
 
-THEME_KNOWLEDGE_BASE = """
-1. Poverty and Economic Barriers
-2. Legal Document-linked Barriers
-3. Child Marriage Issue
-4. Distance and Accessibility Issues
-5. Parental Attitudes & Socio-Cultural
-6. School Infrastructure & Facility
-7. Teacher Capacity & Quality
-8. Safety Issues
-9. Substance Abuse & Addiction
-10. Other Factors
-"""
+# Environment and agency rules come from the shared rule set, compiled into one keyword automaton
+RULE_ENGINE = RULES.engine(Environment='report_environment', Agency='report_agency')
 
 def categorize_environment_aggressive(text):
     """Ultra-Aggressive Environment Classification to minimize Unmapped tags."""
-    text_lower = str(text).lower()
-    
-    school_kw = ['school', 'teacher', 'classroom', 'class', 'student', 'education', 'study', 'teaching', 'academic', 'admission', 'enroll', 'attendance', 'grade', 'subject', 'exam', 'books', 'uniform', 'midday meal', 'mid day', 'scholarship', 'library', 'playground', 'infrastructure', 'facility', 'toilet', 'water', 'building']
-    home_kw = ['parent', 'family', 'mother', 'father', 'home', 'household', 'house', 'sibling', 'brother', 'sister', 'domestic', 'child labour', 'work at home', 'income', 'alcoholic', 'migration', 'marriage', 'dowry', 'attitude', 'mindset', 'belief', 'cultural', 'discrimination']
-    comm_kw = ['village', 'community', 'society', 'road', 'transport', 'bus', 'distance', 'far', 'path', 'route', 'weather', 'rain', 'heat', 'flood', 'surroundings', 'neighborhood', 'area', 'locality', 'safety', 'harassment', 'molestation', 'social pressure', 'caste', 'tribe', 'practice']
-    
-    s_score = sum(2 if kw in text_lower else 0 for kw in school_kw)
-    h_score = sum(2 if kw in text_lower else 0 for kw in home_kw)
-    c_score = sum(2 if kw in text_lower else 0 for kw in comm_kw)
-    
-    # Contextual boosts
-    if any(kw in text_lower for kw in ['to school', 'reach school', 'go to school']): c_score += 3
-    if any(kw in text_lower for kw in ['at home', 'in family', 'parent awareness']): h_score += 3
-    if any(kw in text_lower for kw in ['in school', 'at school', 'lacks']): s_score += 3
-    
-    scores = {'School': s_score, 'Home': h_score, 'Community': c_score}
-    if max(scores.values()) == 0:
-        if any(w in text_lower for w in ['poor', 'poverty', 'money', 'financial']): return 'Home'
-        return 'Community' # Default fallback
-    return max(scores, key=scores.get)
+    return RULE_ENGINE.classify('Environment', str(text).lower())
 
 def categorize_agency(text):
     """Classifies the driver of the solution."""
-    text_lower = str(text).lower()
-    comm_kw = ['community', 'together', 'collective', 'meena manch', 'chaupal', 'village', 'we will', 'committee', 'panchayat']
-    ind_kw = ['parent', 'family', 'individual', 'we should', 'people should', 'personally', 'mother', 'father']
-    inst_kw = ['government', 'school', 'ngo', 'administration', 'authority', 'provide', 'officer', 'department', 'teacher']
-    
-    scores = {
-        'Community-led': sum(1 for kw in comm_kw if kw in text_lower),
-        'Individual-led': sum(1 for kw in ind_kw if kw in text_lower),
-        'Institutional': sum(1 for kw in inst_kw if kw in text_lower)
-    }
-    return max(scores, key=scores.get) if max(scores.values()) > 0 else 'Community-led'
+    return RULE_ENGINE.classify('Agency', str(text).lower())
 
-# --- 2. FORMATTING UTILITIES ---
+def classify_batch(name):
+    """Column-at-a-time version of one of the classifiers above (texts already lowercased)."""
+    return lambda texts: RULE_ENGINE.classify_batch(texts, [name])[name]
 
-def set_cell_background(cell, fill_color):
-    shading_elm = OxmlElement('w:shd')
-    shading_elm.set(qn('w:fill'), fill_color)
-    cell._tc.get_or_add_tcPr().append(shading_elm)
+# Label caches are invalidated exactly when these rules change
+ENVIRONMENT_RULES_HASH = rule_set_hash(categorize_environment_aggressive, RULES.classifier_hash('report_environment'))
+AGENCY_RULES_HASH = rule_set_hash(categorize_agency, RULES.classifier_hash('report_agency'))
+
+# --- 2. FORMATTING UTILITIES ---
 
 def normalize_text(text):
     if pd.isna(text): return "Uncategorized"
     return re.sub(r'^\d+[\.\)\s-]*', '', str(text)).strip()
 
+PROBLEM_STARTERS = ('lack of', 'no ', 'not enough', 'poor ', 'insufficient', 'scarcity', 'absence', 'shortage', 'due to', 'because of')
+
 def is_valid_solution(text):
     """Filters out problem statements disguised as solutions."""
     text = str(text).lower().strip()
-    problem_starters = ['lack of', 'no ', 'not enough', 'poor ', 'insufficient', 'scarcity', 'absence', 'shortage', 'due to', 'because of']
-    if any(text.startswith(p) for p in problem_starters):
+    if any(text.startswith(p) for p in PROBLEM_STARTERS):
         return False
     return True
 
-def clean_theme_name(text):
-    """Cleans theme names, handling combined themes and empty values."""
-    if pd.isna(text) or str(text).strip() == "" or str(text).lower() == "nan":
-        return "Other Factors"
-    
-    text = str(text).strip()
-    
-    # Handle combined themes (e.g., "Theme A + Theme B") - Take the first one
-    if '+' in text:
-        text = text.split('+')[0].strip()
-        
-    # Remove leading numbers/bullets (e.g., "1. Poverty")
-    text = re.sub(r'^\d+[\.\)\s-]*', '', text).strip()
-    
-    return text
-
-THEME_KNOWLEDGE_BASE = """
-1. Poverty and Economic Barriers
-2. Legal Document-linked Barriers
-3. Child Marriage Issue
-4. Distance and Accessibility Issues
-5. Parental Attitudes & Socio-Cultural
-6. School Infrastructure & Facility
-7. Teacher Capacity & Quality
-8. Safety Issues
-9. Substance Abuse & Addiction
-10. Other Factors
-"""
-
-def refine_concepts_with_ai(concepts_list, type_label):
+def valid_solution_mask(texts):
+    """Column-wide version of is_valid_solution: True where the text is a real solution."""
+    return ~texts.astype(str).str.lower().str.strip().str.startswith(PROBLEM_STARTERS)
+
+THEME_KNOWLEDGE_BASE = RULES.theme_knowledge_base(descriptions=False)
+
+AI_BATCH_SIZE = 50
+AI_MAX_WORKERS = 4
+
+# Filler words ignored when clustering concepts locally. Negations ("no", "not") are kept on purpose.
+CONCEPT_STOPWORDS = {'a', 'an', 'the', 'of', 'to', 'for', 'in', 'on', 'at', 'and', 'or', 'is', 'are', 'be', 'by', 'with', 'from', 'due', 'their', 'its'}
+
+def concept_key(concept):
+    """Case- and whitespace-insensitive form of a concept: the only local merge, the rest is left to the AI."""
+    return ' '.join(str(concept).lower().split())
+
+def concept_signature(concept):
+    """Normalizes a concept into its sorted set of content tokens (used to order batches, not to merge)."""
+    tokens = set()
+    for word in re.findall(r"[a-z0-9]+", str(concept).lower()):
+        if word in CONCEPT_STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        tokens.add(word)
+    return tuple(sorted(tokens))
+
+def cluster_concepts(concepts, batch_size=AI_BATCH_SIZE):
     """
-    Uses AI to clean, deduplicate, and re-theme the top concepts.
-    Returns a dictionary: { 'Old Concept': {'concept': 'New Concept', 'theme': 'New Theme'} }
+    Clusters a concept vocabulary locally (no AI calls) so related variants land in the same batch.
+    Concepts differing only in case or whitespace are merged outright into the first (most frequent)
+    spelling; anything broader is up to the AI. Returns (batches, local_map) where local_map is
+    { 'Concept': 'Representative' }.
     """
-    if not claude_client: return {}
-    
-    print(f"   🧠 AI Refinement: Optimizing top {len(concepts_list)} {type_label}s...")
-    
-    all_results = {}
-    batch_size = 50
-    
-    for i in range(0, len(concepts_list), batch_size):
-        batch = concepts_list[i:i+batch_size]
-        print(f"      Processing batch {i//batch_size + 1} ({len(batch)} items)...")
-        
-        prompt = f"""You are a Data Cleaning Expert for an Education Report.
+    signatures = {c: concept_signature(c) for c in concepts}
+    representatives = {}
+    local_map = {}
+    for concept in concepts:
+        local_map[concept] = representatives.setdefault(concept_key(concept), concept)
+    reps = list(representatives.values())
+
+    # Anchor each concept on its most widespread token, ignoring tokens so common they say nothing
+    token_freq = Counter(t for r in reps for t in signatures[r])
+    common_limit = max(2, len(reps) // 10)
+
+    def anchor(concept):
+        tokens = signatures[concept]
+        if not tokens:
+            return ''
+        informative = [t for t in tokens if token_freq[t] <= common_limit] or list(tokens)
+        return min(informative, key=lambda t: (-token_freq[t], t))
+
+    ordered = sorted(reps, key=lambda c: (anchor(c), signatures[c], c))
+    batches = [ordered[i:i + batch_size] for i in range(0, len(ordered), batch_size)]
+    return batches, local_map
+
+def refine_concept_batch(batch, type_label):
+    """Sends one batch of concepts to the AI and returns the parsed JSON mapping."""
+    prompt = f"""You are a Data Cleaning Expert for an Education Report.
         
         THEMES:
         {THEME_KNOWLEDGE_BASE}
@@ -171,209 +162,626 @@ def refine_concepts_with_ai(concepts_list, type_label):
         }}
         RETURN ONLY JSON. NO MARKDOWN."""
 
+    response = claude_client.invoke_model(
+        modelId=MODEL_ID,
+        body=json.dumps({
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": 4000,
+            "messages": [{"role": "user", "content": prompt}]
+        })
+    )
+    resp_body = json.loads(response['body'].read())
+    text = resp_body['content'][0]['text'].strip()
+    
+    # Robust JSON extraction
+    json_match = re.search(r'\{.*\}', text, re.DOTALL)
+    if json_match:
+        text = json_match.group(0)
+    else:
+        text = text.replace('```json', '').replace('```', '').strip()
+        
+    return json.loads(text)
+
+_progress_lock = threading.Lock()
+
+def progress(line):
+    """Prints one progress line from a worker thread without interleaving with the others."""
+    with _progress_lock:
+        sys.stdout.write(line + '\n')
+        sys.stdout.flush()
+
+def refine_concepts_with_ai(batches, type_label, pool, stats, stage="map"):
+    """
+    Uses AI to clean, deduplicate, and re-theme batches of concepts on a shared worker pool.
+    Failed batches are recorded in stats['failures'] for the end-of-run summary.
+    Returns a dictionary: { 'Old Concept': {'concept': 'New Concept', 'theme': 'New Theme'} }
+    """
+    if not claude_client: return {}
+
+    def run_batch(numbered_batch):
+        num, batch = numbered_batch
+        progress(f"      Processing {type_label} {stage} batch {num}/{len(batches)} ({len(batch)} items)...")
         try:
-            response = claude_client.invoke_model(
-                modelId=MODEL_ID,
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 4000,
-                    "messages": [{"role": "user", "content": prompt}]
-                })
-            )
-            resp_body = json.loads(response['body'].read())
-            text = resp_body['content'][0]['text'].strip()
-            
-            # Robust JSON extraction
-            json_match = re.search(r'\{.*\}', text, re.DOTALL)
-            if json_match:
-                text = json_match.group(0)
-            else:
-                text = text.replace('```json', '').replace('```', '').strip()
-                
-            batch_result = json.loads(text)
-            all_results.update(batch_result)
-            
+            return refine_concept_batch(batch, type_label), None
+        except json.JSONDecodeError as e:
+            return {}, {'stage': stage, 'batch': num, 'items': len(batch), 'error': 'JSON parse error', 'detail': str(e)}
         except Exception as e:
-            print(f"      ⚠️ Batch {i//batch_size + 1} Failed: {e}")
+            return {}, {'stage': stage, 'batch': num, 'items': len(batch), 'error': type(e).__name__, 'detail': str(e)}
+
+    all_results = {}
+    stats['batches'] += len(batches)
+    # map() yields in submission order, so merging stays deterministic whatever order batches finish in
+    for batch_result, failure in pool.map(run_batch, enumerate(batches, 1)):
+        if failure:
+            stats['failures'].append(failure)
+        elif isinstance(batch_result, dict):
+            all_results.update(batch_result)
             
     return all_results
 
+def consolidate_concepts(concepts, type_label, pool, stats, batch_size=AI_BATCH_SIZE):
+    """
+    Map-reduce consolidation of the whole concept vocabulary, not just the top concepts.
+    Map: cluster the vocabulary locally and refine every cluster batch with AI.
+    Reduce: refine the resulting canonicals once more so variants split across batches merge too.
+    Returns a complete mapping: { 'Old Concept': {'concept': 'New Concept', 'theme': 'New Theme' or None} }
+    """
+    counts = concepts.dropna().astype(str).value_counts()
+    if counts.empty: return {}
+
+    batches, local_map = cluster_concepts(counts.index.tolist(), batch_size)
+    progress(f"   🧠 AI Refinement: Consolidating {len(counts)} {type_label}s ({len(batches)} clusters)...")
+    map_results = refine_concepts_with_ai(batches, type_label, pool, stats, "map")
+
+    mapping = {}
+    for concept, rep in local_map.items():
+        refined = map_results.get(rep)
+        refined = refined if isinstance(refined, dict) else {}
+        mapping[concept] = {'concept': refined.get('concept') or rep, 'theme': refined.get('theme')}
+
+    # A single map batch already saw every concept, so the reduce round is only needed beyond that
+    if len(batches) > 1:
+        canonical_counts = Counter()
+        for concept, count in counts.items():
+            canonical_counts[mapping[concept]['concept']] += count
+        canonicals = [c for c, _ in canonical_counts.most_common()]
+
+        reduce_batches, reduce_map = cluster_concepts(canonicals, batch_size)
+        progress(f"   🧠 AI Refinement: Merging {len(canonicals)} {type_label} canonicals ({len(reduce_batches)} clusters)...")
+        reduce_results = refine_concepts_with_ai(reduce_batches, type_label, pool, stats, "reduce")
+
+        for entry in mapping.values():
+            rep = reduce_map[entry['concept']]
+            refined = reduce_results.get(rep)
+            refined = refined if isinstance(refined, dict) else {}
+            entry['concept'] = refined.get('concept') or rep
+            entry['theme'] = refined.get('theme') or entry['theme']
+
+    return mapping
+
+def refine_all_concepts(label_concepts):
+    """
+    Consolidates several label types (e.g. Challenge and Solution) concurrently.
+    All AI batches share one pool of AI_MAX_WORKERS threads, so parallelism stays bounded.
+    Returns ({ label: mapping }, { label: stats }).
+    """
+    stats = {label: {'batches': 0, 'failures': []} for label in label_concepts}
+    with ThreadPoolExecutor(max_workers=AI_MAX_WORKERS) as pool:
+        with ThreadPoolExecutor(max_workers=len(label_concepts)) as label_pool:
+            futures = {
+                label: label_pool.submit(consolidate_concepts, concepts, label, pool, stats[label])
+                for label, concepts in label_concepts.items()
+            }
+            updates = {label: future.result() for label, future in futures.items()}
+    return updates, stats
+
+def print_refinement_summary(stats):
+    """Prints per-label batch totals and every failed batch, instead of losing them in the log."""
+    if not claude_client:
+        print("   ⚠️ AI Refinement skipped: AWS client unavailable.")
+        return
+    print("   📋 AI Refinement Summary:")
+    for label, s in stats.items():
+        failures = s['failures']
+        parse_errors = sum(1 for f in failures if f['error'] == 'JSON parse error')
+        lost = sum(f['items'] for f in failures)
+        print(f"      {label}: {s['batches']} batches, {len(failures)} failed ({parse_errors} JSON parse errors, {lost} concepts left unrefined)")
+        for f in failures:
+            print(f"         ⚠️ {f['stage']} batch {f['batch']}: {f['error']} - {f['detail']}")
+
+def apply_concept_updates(df, updates):
+    """Rewrites Merged_Concept (and Theme, where the AI supplied one) from a consolidation mapping."""
+    if not updates: return
+    concept_map = {old: new['concept'] for old, new in updates.items()}
+    theme_map = {old: new['theme'] for old, new in updates.items() if new.get('theme')}
+    original = df['Merged_Concept']
+    df['Theme'] = original.map(theme_map).fillna(df['Theme'])
+    df['Merged_Concept'] = original.map(concept_map).fillna(original)
+
+QUOTE_INDEX_K = 3
+
+def rank_quotes(df, text_col, keys, k=QUOTE_INDEX_K, min_len=None):
+    """
+    Indexes the k longest statements per key group in one sort + groupby.
+    Ties keep data order, matching max(..., key=len); empty strings count, as they did there.
+    min_len keeps only quotes longer than it. Returns { key_tuple: [quote, ...] }.
+    """
+    texts = df[text_col]
+    lengths = texts.map(lambda x: len(x) if isinstance(x, str) else -1)
+    keep = lengths >= 0 if min_len is None else lengths > min_len
+    ranked = df.loc[keep, keys + [text_col]].assign(_len=lengths)
+    ranked = ranked.sort_values('_len', ascending=False, kind='stable').groupby(keys, sort=False, observed=True).head(k)
+    return {key: quotes for key, quotes in ranked.groupby(keys, sort=False, observed=True)[text_col].apply(list).items()}
+
+def build_quote_index(df_c, df_s, k=QUOTE_INDEX_K):
+    """Builds every representative-quote lookup the report needs, once per run."""
+    return {
+        'theme_challenges': rank_quotes(df_c, 'Challenges', ['Theme', 'Merged_Concept'], k),
+        'theme_solutions': rank_quotes(df_s, 'Solutions', ['Theme', 'Merged_Concept'], k),
+        'district_challenges': rank_quotes(df_c, 'Challenges', ['District', 'Theme', 'Merged_Concept'], k),
+        'district_solutions': rank_quotes(df_s, 'Solutions', ['District', 'Theme', 'Merged_Concept'], k),
+        'agency_solutions': rank_quotes(df_s, 'Solutions', ['Agency', 'Merged_Concept'], k, min_len=10),
+    }
+
+def best_quote(quote_index, lookup, key, default=None):
+    """Returns the top-ranked quote for a key, or the default when there is none."""
+    quotes = quote_index[lookup].get(key)
+    return quotes[0] if quotes else default
+
+def build_district_partitions(cube):
+    """
+    Partitions the cube by District (totals) and District x Theme (ranked concepts), once.
+    Solution concepts are validated column-wide so profiles never re-run is_valid_solution.
+    """
+    chal_rows = statement_slice(cube, 'Challenge')
+    sol_rows = statement_slice(cube, 'Solution')
+    sol_concepts = sol_rows['Merged_Concept'].fillna("Uncategorized").astype(str)
+    valid_sols = sol_rows.assign(Merged_Concept=sol_concepts)[valid_solution_mask(sol_concepts)]
+    return {
+        'totals': cube['districts'].set_index('District').to_dict('index'),
+        'theme_counts': ranked_counts(chal_rows, 'District', 'Theme', weight='Count'),
+        'top_challenges': ranked_counts(chal_rows, ['District', 'Theme'], 'Merged_Concept', k=2, weight='Count'),
+        'top_solutions': ranked_counts(valid_sols, ['District', 'Theme'], 'Merged_Concept', k=2, weight='Count'),
+        'challenge_totals': chal_rows.groupby('District')['Count'].sum().to_dict(),
+        'solution_totals': sol_rows.groupby('District')['Count'].sum().to_dict(),
+    }
+
 # --- MAIN ENGINE ---
 
-def generate_report():
-    print("🚀 Starting Final Report Generation Engine...")
-    
-    # 1. LOAD DATASETS
-    print("   📂 Loading datasets...")
-    try:
-        df_raw = pd.read_csv('cleaned_data.csv') 
-        chal_exploded = pd.read_csv('exploded_challenges.csv')
-        sol_exploded = pd.read_csv('exploded_solutions.csv')
-        chal_map = pd.read_csv('challenge_mapping.csv')
-        sol_map = pd.read_csv('solution_mapping.csv')
-    except Exception as e:
-        print(f"❌ Error: Required CSV files missing. {e}")
-        return
+REPORT_INPUTS = ['cleaned_data.csv', 'exploded_challenges.csv', 'exploded_solutions.csv', 'challenge_mapping.csv', 'solution_mapping.csv']
+REPORT_MODEL_FILE = 'report_model.json'
+REPORT_MODEL_VERSION = 7 # Bump when the model layout or any computed metric changes
+REPORT_FILE = 'Final_Shiksha_Report.docx'
+DISTRICT_REPORT_DIR = 'district_reports'
+DISTRICT_MANIFEST = 'manifest.json'
+
+# ==========================================
+# COMPUTE PHASE: data -> report model
+# ==========================================
+
+def summary_metrics(cube):
+    """Dataset-wide counts and percentages quoted across several sections."""
+    chal_cube = statement_slice(cube, 'Challenge')
+    sol_cube = statement_slice(cube, 'Solution')
+    districts = cube['districts']
+
+    total_ch = cube['meta']['chaupals']
+    total_part = int(districts['Participants'].sum())
+    num_chal = cube['meta']['challenge_statements']
+    num_sol = cube['meta']['solution_statements']
+
+    demographics = {col: int(districts[col].sum()) for col in ['Men', 'Women', 'Children', 'Others']}
+    perc = {col: (val / total_part * 100) if total_part > 0 else 0 for col, val in demographics.items()}
+
+    theme_counts = value_counts_from(chal_cube, 'Theme')
+    sol_theme_counts = value_counts_from(sol_cube, 'Theme')
+    top_3_themes = theme_counts.head(3)
 
-    # Normalize mappings
-    print("   ⚙️  Processing data and applying categories...")
-    chal_map['Theme'] = chal_map['Theme'].apply(clean_theme_name)
-    sol_map['Theme'] = sol_map['Theme'].apply(clean_theme_name)
-
-    # CREATE df_c (Challenges) and apply environment logic
-    df_c = chal_exploded.merge(chal_map, left_on='Challenges', right_on='Original', how='left')
-    df_c['Theme'] = df_c['Theme'].fillna("Other Factors").astype(str)
-    df_c['Theme'] = df_c['Theme'].apply(clean_theme_name) # Double check after merge
-    df_c['Environment'] = df_c['Challenges'].apply(categorize_environment_aggressive)
-    
-    # RETAIN original variable name for District Profile section
-    df_chal_mapped = df_c 
+    agency_counts = value_counts_from(sol_cube, 'Category')
+    agency = {a: agency_counts.get(a, 0) for a in ['Individual-led', 'Community-led', 'Institutional']}
+    agency_perc = {a: (n / num_sol * 100) if num_sol > 0 else 0 for a, n in agency.items()}
+
+    return {
+        'chaupals': total_ch,
+        'participants': total_part,
+        'challenges': num_chal,
+        'solutions': num_sol,
+        'sol_ratio': (num_sol / num_chal) if num_chal > 0 else 0,
+        'men': demographics['Men'],
+        'women': demographics['Women'],
+        'children': demographics['Children'],
+        'others': demographics['Others'],
+        'men_perc': perc['Men'],
+        'women_perc': perc['Women'],
+        'children_perc': perc['Children'],
+        'others_perc': perc['Others'],
+        'avg_per_chaupal': total_part / total_ch if total_ch > 0 else 0,
+        'districts': int(districts['District'].notna().sum()),
+        'themes': chal_cube['Theme'].nunique(),
+        # [theme, challenges, solutions] for the three largest challenge themes
+        'top_themes': [[t, n, int(sol_theme_counts.get(t, 0))] for t, n in top_3_themes.items()],
+        'top_3_perc': (top_3_themes.sum() / num_chal * 100) if num_chal > 0 else 0,
+        'individual_led': agency['Individual-led'],
+        'community_led': agency['Community-led'],
+        'institutional': agency['Institutional'],
+        'individual_perc': agency_perc['Individual-led'],
+        'community_perc': agency_perc['Community-led'],
+        'institutional_perc': agency_perc['Institutional'],
+        'community_driven_perc': agency_perc['Individual-led'] + agency_perc['Community-led'],
+    }
 
-    # CREATE df_s (Solutions) and apply agency logic
-    df_s = sol_exploded.merge(sol_map, left_on='Solutions', right_on='Original', how='left')
-    df_s['Theme'] = df_s['Theme'].fillna("Other Factors").astype(str)
-    df_s['Theme'] = df_s['Theme'].apply(clean_theme_name) # Double check after merge
-    df_s['Agency'] = df_s['Solutions'].apply(categorize_agency)
+def district_stats(cube, total_ch):
+    """Named districts with Chaupal share, ordered by Chaupal count (sections 2 and 3)."""
+    named = cube['districts'][cube['districts']['District'].notna()]
+    dist_stats = named[['District', 'Chaupals', 'Participants']].rename(columns={'Chaupals': 'Ch_Count', 'Participants': 'Part_Sum'})
+    dist_stats['Ch_Perc'] = (dist_stats['Ch_Count'] / total_ch) * 100
+    return dist_stats.sort_values('Ch_Count', ascending=False)
+
+def participation_model(cube, summary):
+    """Section 2: district distribution table and the top-3 concentration."""
+    dist_stats = district_stats(cube, summary['chaupals'])
+    dist_stats['Part_Perc'] = (dist_stats['Part_Sum'] / summary['participants']) * 100
+    top_3 = dist_stats.head(3)
+    return {
+        # [district, chaupals, chaupal %, participants, participant %]
+        'districts': dist_stats[['District', 'Ch_Count', 'Ch_Perc', 'Part_Sum', 'Part_Perc']].values.tolist(),
+        'top_3': top_3[['District', 'Ch_Count', 'Ch_Perc']].values.tolist(),
+        'top_3_perc': top_3['Ch_Perc'].sum(),
+    }
+
+def content_model(cube, summary):
+    """Section 3: deduplicated concept counts and per-district statement averages."""
+    named = cube['districts'][cube['districts']['District'].notna()]
+    # Districts without any challenge or solution statements are left out, as an inner join would
+    avg_df = named[['District', 'Chaupals', 'Challenge_Statements', 'Solution_Statements']].dropna()
+    avg_df = avg_df.rename(columns={'Chaupals': 'Ch_Count', 'Challenge_Statements': 'C_Count', 'Solution_Statements': 'S_Count'})
+    avg_df = district_stats(cube, summary['chaupals'])[['District']].merge(avg_df, on='District')
+    avg_df['Avg_C'] = avg_df['C_Count'] / avg_df['Ch_Count']
+    avg_df['Avg_S'] = avg_df['S_Count'] / avg_df['Ch_Count']
+    return {
+        'unique_challenges': cube['meta']['unique_challenge_concepts'],
+        'unique_solutions': cube['meta']['unique_solution_concepts'],
+        # [district, avg challenges, avg solutions], highest challenge depth first
+        'averages': avg_df.sort_values('Avg_C', ascending=False)[['District', 'Avg_C', 'Avg_S']].values.tolist(),
+    }
+
+def thematic_model(cube, summary, quote_index):
+    """Section 4: distribution tables and one deep-dive per top theme."""
+    chal_cube = statement_slice(cube, 'Challenge')
+    sol_cube = statement_slice(cube, 'Solution')
+    num_chal, num_sol = summary['challenges'], summary['solutions']
+
+    theme_counts = value_counts_from(chal_cube, 'Theme')
+    agency_counts = value_counts_from(sol_cube, 'Category')
+    env_counts = value_counts_from(chal_cube, 'Category')
+
+    # Prepare theme list: Top themes, but ensure "Other Factors" is last
+    themes_to_process = list(theme_counts.index[:10])
+    if RULES.fallback_theme in themes_to_process:
+        themes_to_process.remove(RULES.fallback_theme)
+    if RULES.fallback_theme in theme_counts.index:
+        themes_to_process.append(RULES.fallback_theme)
+
+    themes = []
+    for theme in themes_to_process:
+        t_c = chal_cube[chal_cube['Theme'] == theme]
+        t_s = sol_cube[sol_cube['Theme'] == theme]
+        c_count = int(t_c['Count'].sum())
+        s_count = int(t_s['Count'].sum())
+
+        # Top challenges until they cover 50% of the theme (at least 5, at most 15)
+        challenge_items = []
+        cumulative_count = 0
+        for i, (concept, count) in enumerate(value_counts_from(t_c, 'Merged_Concept').items(), 1):
+            cumulative_count += count
+            coverage_perc = (cumulative_count / c_count) * 100
+            rep_quote = best_quote(quote_index, 'theme_challenges', (theme, concept), concept)
+            challenge_items.append([concept, count, (count / c_count) * 100, rep_quote])
+            if coverage_perc >= 50 and i >= 5:
+                break
+            if i >= 15:
+                break
+
+        # Same for valid solutions
+        solution_items = []
+        solution_agency = None
+        if not t_s.empty:
+            agency_share = value_counts_from(t_s, 'Category', normalize=True)
+            solution_agency = [agency_share.idxmax(), agency_share.max() * 100]
+            cumulative_count_s = 0
+            for concept, count in value_counts_from(t_s, 'Merged_Concept').items():
+                if not is_valid_solution(concept):
+                    continue
+                cumulative_count_s += count
+                coverage_perc = (cumulative_count_s / s_count) * 100
+                rep_quote = best_quote(quote_index, 'theme_solutions', (theme, concept), concept)
+                solution_items.append([concept, count, (count / s_count) * 100, rep_quote])
+                if coverage_perc >= 50 and len(solution_items) >= 5:
+                    break
+                if len(solution_items) >= 15:
+                    break
+
+        themes.append({
+            'theme': theme,
+            'challenges': c_count,
+            'solutions': s_count,
+            'challenge_perc': (c_count / num_chal * 100) if num_chal > 0 else 0,
+            'coverage': (s_count / c_count) if c_count > 0 else 0,
+            'environment': value_counts_from(t_c, 'Category').idxmax() if not t_c.empty else None,
+            'challenge_items': challenge_items,
+            'solution_agency': solution_agency,
+            'solution_items': solution_items,
+        })
+
+    return {
+        # [label, count, % of statements]
+        'theme_table': [[t, n, n / num_chal * 100] for t, n in theme_counts.items()],
+        'agency_table': [[a, n, n / num_sol * 100] for a, n in agency_counts.items()],
+        'environment_table': [[e, n, n / num_chal * 100] for e, n in env_counts.items()],
+        'themes': themes,
+    }
+
+def district_model(cube, summary, quote_index):
+    """Section 5 (and the per-district reports): overview table and one profile per district ('Others' last)."""
+    named = cube['districts'][cube['districts']['District'].notna()]
+    dist_overview = named[['District', 'Unique_Chaupals', 'Participants', 'Challenge_Statements', 'Solution_Statements']].rename(
+        columns={'Unique_Chaupals': 'Chaupals', 'Challenge_Statements': 'Challenges', 'Solution_Statements': 'Solutions'}
+    ).fillna(0)
+    dist_overview['Ratio'] = dist_overview['Solutions'] / dist_overview['Challenges']
+    dist_overview = dist_overview.sort_values('Chaupals', ascending=False)
+
+    dist_list = dist_overview['District'].tolist()
+    if 'Others' in dist_list:
+        dist_list.remove('Others')
+        dist_list.append('Others')
+
+    # Partition once; every profile below reads ready-made slices
+    partitions = build_district_partitions(cube)
+    total_ch = summary['chaupals']
+
+    profiles = []
+    for dist in dist_list:
+        d_totals = partitions['totals'][dist]
+        dist_chaupals = int(d_totals['Rows'])
+        dist_participants = int(d_totals['Participants'])
+        dist_chal_count = int(partitions['challenge_totals'].get(dist, 0))
+        dist_sol_count = int(partitions['solution_totals'].get(dist, 0))
+
+        # Theme shares with the top 2 challenges and top 2 valid solutions (by frequency in this district)
+        themes = []
+        if dist_chal_count > 0:
+            for theme, count in partitions['theme_counts'].get(dist, []):
+                challenges = [c for c, _ in partitions['top_challenges'].get((dist, theme), [])]
+                solutions = [c for c, _ in partitions['top_solutions'].get((dist, theme), [])]
+                themes.append({
+                    'theme': theme,
+                    'perc': (count / dist_chal_count) * 100,
+                    'challenges': challenges,
+                    'solutions': solutions,
+                    # Longest local statement behind each listed concept (None when there is none)
+                    'challenge_quotes': [best_quote(quote_index, 'district_challenges', (dist, theme, c)) for c in challenges],
+                    'solution_quotes': [best_quote(quote_index, 'district_solutions', (dist, theme, c)) for c in solutions],
+                })
+
+        profiles.append({
+            'district': dist,
+            'chaupals': dist_chaupals,
+            'chaupal_perc': (dist_chaupals / total_ch * 100) if total_ch > 0 else 0,
+            'participants': dist_participants,
+            'men_perc': (d_totals['Men'] / dist_participants * 100) if dist_participants > 0 else 0,
+            'women_perc': (d_totals['Women'] / dist_participants * 100) if dist_participants > 0 else 0,
+            'children_perc': (d_totals['Children'] / dist_participants * 100) if dist_participants > 0 else 0,
+            'challenges': dist_chal_count,
+            'solutions': dist_sol_count,
+            'ratio': (dist_sol_count / dist_chal_count) if dist_chal_count > 0 else 0,
+            'avg_challenges': dist_chal_count / dist_chaupals if dist_chaupals > 0 else 0,
+            'avg_solutions': dist_sol_count / dist_chaupals if dist_chaupals > 0 else 0,
+            'themes': themes,
+        })
+
+    return {
+        # [district, chaupals, participants, challenges, solutions, ratio]
+        'overview': dist_overview[['District', 'Chaupals', 'Participants', 'Challenges', 'Solutions', 'Ratio']].values.tolist(),
+        'profiles': profiles,
+    }
+
+def unique_examples(df_s, agency_type, count=5):
+    """Longest distinctive solutions of one agency: 'Other Factors' first, then one-off concepts."""
+    subset = df_s[df_s['Agency'] == agency_type].copy()
+    if subset.empty: return []
+
+    # 1. Prioritize 'Other Factors'
+    others = subset[subset['Theme'] == RULES.fallback_theme]
+
+    # 2. If not enough, look for low frequency items in general
+    freq = subset['Merged_Concept'].value_counts()
+    unique_concepts = freq[freq == 1].index.tolist()
+    unique_rows = subset[subset['Merged_Concept'].isin(unique_concepts)]
+
+    # Combine: Others first, then unique rows
+    candidates = pd.concat([others, unique_rows]).drop_duplicates(subset=['Solutions'])
+
+    # Filter out short/junk text
+    candidates = candidates[candidates['Solutions'].str.len() > 20]
+
+    # Sort by length (longer is usually better for "insights")
+    candidates['len'] = candidates['Solutions'].str.len()
+    top_candidates = candidates.sort_values('len', ascending=False).head(count)
+
+    # [solution, district] - only the District is shown as location
+    return [[row['Solutions'].strip(), str(row['District'])] for _, row in top_candidates.iterrows()]
+
+def insights_model(cube, df_s, quote_index):
+    """Section 6: distinctive individual/community solutions and top institutional expectations."""
+    inst_subset = statement_slice(cube, 'Solution', Category='Institutional')
+    expectations = []
+    for concept, count in value_counts_from(inst_subset, 'Merged_Concept').head(5).items():
+        # Representative quote (only valid quotes longer than 10 characters are indexed)
+        inst_quote = best_quote(quote_index, 'agency_solutions', ('Institutional', concept))
+        if not inst_quote: continue
+        expectations.append([concept, count, inst_quote])
+
+    return {
+        'individual': unique_examples(df_s, 'Individual-led', 5),
+        'community': unique_examples(df_s, 'Community-led', 5),
+        'expectations': expectations,
+    }
+
+def conclusion_model(cube):
+    """Section 7: example concepts for the community agency and systemic support paragraphs."""
+    comm_subset = statement_slice(cube, 'Solution', Category='Community-led')
+    inst_subset = statement_slice(cube, 'Solution', Category='Institutional')
+    return {
+        'community_examples': value_counts_from(comm_subset, 'Merged_Concept').head(4).index.tolist(),
+        'institutional_examples': value_counts_from(inst_subset, 'Merged_Concept').head(4).index.tolist(),
+    }
+
+def compute_report_model():
+    """
+    Loads and prepares the datasets, runs the AI refinement and builds the aggregate cube,
+    then collects every number, table and quote the report needs into one JSON-serializable model.
+    Returns None if the input files are missing.
+    """
+    # 1. LOAD DATASETS: joined, theme-cleaned frames shared with the validation report
+    frames = load_dataset()
+    if frames is None:
+        return None
+    df_raw, df_c, df_s = frames['raw'], frames['challenges'], frames['solutions']
+    chal_map, sol_map = frames['challenge_map'], frames['solution_map']
+
+    print("   ⚙️  Processing data and applying categories...")
+    # Apply environment logic to challenges, agency logic to solutions
+    df_c['Environment'] = classify_column(df_c['Challenges'], categorize_environment_aggressive, ENVIRONMENT_RULES_HASH, 'Environment', batch=classify_batch('Environment'))
+    df_s['Agency'] = classify_column(df_s['Solutions'], categorize_agency, AGENCY_RULES_HASH, 'Agency', batch=classify_batch('Agency'))
 
     # --- AI REFINEMENT STEP ---
-    # Get top 200 concepts to refine (Increased from 100 to catch more variations)
-    top_chal = df_c['Merged_Concept'].value_counts().head(200).index.tolist()
-    top_sol = df_s['Merged_Concept'].value_counts().head(200).index.tolist()
-    
-    # Refine Challenges
-    chal_updates = refine_concepts_with_ai(top_chal, "Challenge")
-    if chal_updates:
-        # Apply updates
-        for old, new_data in chal_updates.items():
-            mask = df_c['Merged_Concept'] == old
-            df_c.loc[mask, 'Merged_Concept'] = new_data['concept']
-            df_c.loc[mask, 'Theme'] = new_data['theme']
-            
-    # Refine Solutions
-    sol_updates = refine_concepts_with_ai(top_sol, "Solution")
-    if sol_updates:
-        for old, new_data in sol_updates.items():
-            mask = df_s['Merged_Concept'] == old
-            df_s.loc[mask, 'Merged_Concept'] = new_data['concept']
-            df_s.loc[mask, 'Theme'] = new_data['theme']
+    # Consolidate the full concept vocabulary (long tail included), challenges and solutions concurrently
+    updates, refine_stats = refine_all_concepts({"Challenge": df_c['Merged_Concept'], "Solution": df_s['Merged_Concept']})
+    print_refinement_summary(refine_stats)
+
+    apply_concept_updates(df_c, updates["Challenge"])
+    apply_concept_updates(chal_map, updates["Challenge"])
+    apply_concept_updates(df_s, updates["Solution"])
+    apply_concept_updates(sol_map, updates["Solution"])
 
     # Re-clean themes just in case AI returned something weird
-    df_c['Theme'] = df_c['Theme'].apply(clean_theme_name)
-    df_s['Theme'] = df_s['Theme'].apply(clean_theme_name)
-    
-    # Update df_chal_mapped reference
-    df_chal_mapped = df_c 
+    df_c['Theme'] = clean_theme_names(df_c['Theme'])
+    df_s['Theme'] = clean_theme_names(df_s['Theme'])
+
+    # Representative quotes are ranked once here; sections only look them up
+    quote_index = build_quote_index(df_c, df_s)
 
     # --- BASELINE METRIC CALCULATIONS ---
-    TOTAL_CH_STATE = len(df_raw)
-    for col in ['Participant Count', 'Men', 'Women', 'Children']:
-        df_raw[col] = pd.to_numeric(df_raw[col], errors='coerce').fillna(0)
-    
-    TOTAL_PART_STATE = int(df_raw['Participant Count'].sum())
-    NUM_CHAL_STATEMENTS = len(chal_exploded) # Used for % calculations
-    NUM_SOL_STATEMENTS = len(sol_exploded)   # Used for % calculations
-    NUM_CHAL = NUM_CHAL_STATEMENTS
-    NUM_SOL = NUM_SOL_STATEMENTS
-    
-    SOL_RATIO = (NUM_SOL / NUM_CHAL) if NUM_CHAL > 0 else 0
-    
-    # Demographics
-    m_total = int(df_raw['Men'].sum())
-    w_total = int(df_raw['Women'].sum())
-    c_total = int(df_raw['Children'].sum())
-    # Calculate Others
+    # Calculate Others (participant counts are already numeric in the snapshot)
     df_raw['Others'] = df_raw['Participant Count'] - (df_raw['Men'] + df_raw['Women'] + df_raw['Children'])
-    df_raw['Others'] = df_raw['Others'].clip(lower=0) 
-    o_total = int(df_raw['Others'].sum())
-    
-    # Percentages
-    w_perc = (w_total / TOTAL_PART_STATE * 100) if TOTAL_PART_STATE > 0 else 0
-    m_perc = (m_total / TOTAL_PART_STATE * 100) if TOTAL_PART_STATE > 0 else 0
-    c_perc = (c_total / TOTAL_PART_STATE * 100) if TOTAL_PART_STATE > 0 else 0
-    o_perc = (o_total / TOTAL_PART_STATE * 100) if TOTAL_PART_STATE > 0 else 0
-    
-    avg_per_chaupal = TOTAL_PART_STATE / TOTAL_CH_STATE if TOTAL_CH_STATE > 0 else 0
-    num_districts = df_raw['District'].nunique()
-    num_themes = df_c['Theme'].nunique()
-
-    # Theme Analysis for Summary
-    theme_counts = df_c['Theme'].value_counts()
-    top_3_themes = theme_counts.head(3)
-    top_3_perc = (top_3_themes.sum() / NUM_CHAL * 100) if NUM_CHAL > 0 else 0
-
-    # Agency Analysis for Summary
-    agency_counts = df_s['Agency'].value_counts()
-    ind_led = agency_counts.get('Individual-led', 0)
-    comm_led = agency_counts.get('Community-led', 0)
-    inst_led = agency_counts.get('Institutional', 0)
-    
-    ind_perc = (ind_led / NUM_SOL * 100) if NUM_SOL > 0 else 0
-    comm_perc = (comm_led / NUM_SOL * 100) if NUM_SOL > 0 else 0
-    inst_perc = (inst_led / NUM_SOL * 100) if NUM_SOL > 0 else 0
-    
-    comm_driven_perc = ind_perc + comm_perc
+    df_raw['Others'] = df_raw['Others'].clip(lower=0)
+
+    # --- AGGREGATE CUBE ---
+    # Every count below is read from the cube; row-level data is only used for quotes from here on
+    # The joined frames keep exactly the exploded rows, so they double as the exploded data
+    cube_inputs = (df_raw, df_c, df_s, df_c, df_s, chal_map, sol_map)
+    key = cube_key(*cube_inputs)
+    cube = load_cube(key)
+    if cube is None:
+        print("   🧊 Building aggregate cube...")
+        cube = build_cube(*cube_inputs)
+        save_cube(cube, key)
+    else:
+        print(f"   🧊 Aggregate cube unchanged, reusing {CUBE_DIR}/")
+
+    print("   🧮 Computing report model...")
+    summary = summary_metrics(cube)
+    failed_batches = sum(len(s['failures']) for s in refine_stats.values())
+    return {
+        'summary': summary,
+        'participation': participation_model(cube, summary),
+        'content': content_model(cube, summary),
+        'thematic': thematic_model(cube, summary, quote_index),
+        'districts': district_model(cube, summary, quote_index),
+        'insights': insights_model(cube, df_s, quote_index),
+        'conclusion': conclusion_model(cube),
+        'rules': {'version': RULES.version, 'hash': RULES.hash},
+        # A model without (complete) AI refinement is saved for this run's renders but never reused
+        'refinement': {'complete': bool(claude_client) and failed_batches == 0, 'failed_batches': failed_batches},
+    }
 
-    doc = Document()
+# ==========================================
+# RENDER PHASE: report model -> DOCX
+# ==========================================
+
+def add_ranked_item(doc, label, count, item_perc, quote_prefix, quote):
+    """Numbered concept with its mention count and a quote, as used in the theme deep-dives."""
+    p = doc.add_paragraph()
+    p.paragraph_format.left_indent = Pt(36)
+    p.paragraph_format.first_line_indent = Pt(-18)
+    p.add_run(label).bold = True
+    p.add_run(f" ({count} mentions, {item_perc:.1f}%)")
+    p.add_run(f"\n   {quote_prefix}: \"{quote}\"").italic = True
+
+def render_executive_summary(doc, model):
+    """Section 1: headline numbers, solution ratio, top themes and agency split."""
+    s = model['summary']
+    TOTAL_CH_STATE, TOTAL_PART_STATE = s['chaupals'], s['participants']
+    NUM_CHAL, NUM_SOL, SOL_RATIO = s['challenges'], s['solutions'], s['sol_ratio']
+    w_perc, m_perc = s['women_perc'], s['men_perc']
+    ind_perc, comm_perc, inst_perc = s['individual_perc'], s['community_perc'], s['institutional_perc']
+    comm_driven_perc = s['community_driven_perc']
 
-    # --- SECTION 1: EXECUTIVE SUMMARY ---
-    print("   📝 Generating Section 1: Executive Summary...")
     doc.add_heading('1. EXECUTIVE SUMMARY', level=1)
-    
+
     # Intro Paragraph
     intro_p = doc.add_paragraph()
-    intro_p.add_run(f"This comprehensive report presents an in-depth analysis of {TOTAL_CH_STATE:,} Shiksha Chaupal community dialogues conducted across Bihar, representing the collective voices of {TOTAL_PART_STATE:,} community members. These dialogues constitute one of the most extensive participatory consultations on education challenges in India, providing rich insights into grassroots barriers to education and community-driven solutions. The analysis encompasses {NUM_CHAL:,} individual challenges and {NUM_SOL:,} solutions, systematically categorized into {num_themes} primary thematic areas for comprehensive understanding.")
+    intro_p.add_run(f"This comprehensive report presents an in-depth analysis of {TOTAL_CH_STATE:,} Shiksha Chaupal community dialogues conducted across Bihar, representing the collective voices of {TOTAL_PART_STATE:,} community members. These dialogues constitute one of the most extensive participatory consultations on education challenges in India, providing rich insights into grassroots barriers to education and community-driven solutions. The analysis encompasses {NUM_CHAL:,} individual challenges and {NUM_SOL:,} solutions, systematically categorized into {s['themes']} primary thematic areas for comprehensive understanding.")
 
     # KEY INSIGHT
     doc.add_heading(f'🔑 KEY INSIGHT: Solution Coverage Ratio', level=2)
     p_ratio = doc.add_paragraph()
     run_ratio = p_ratio.add_run(f"Solution-to-Challenge Ratio: {SOL_RATIO:.2f}")
     run_ratio.bold = True
-    
+
     if SOL_RATIO >= 1.0:
         ratio_text = f"This remarkable ratio demonstrates that communities identified {NUM_SOL:,} solutions for {NUM_CHAL:,} challenges. This transcends traditional deficit-based consultations where communities merely list problems. Instead, it reveals communities as active problem-solvers who think constructively about actionable interventions. This represents a paradigm shift in community engagement from problem identification to solution co-creation."
     elif SOL_RATIO >= 0.5:
         ratio_text = f"With {NUM_SOL:,} solutions proposed for {NUM_CHAL:,} challenges, communities are actively engaging in problem-solving. This indicates a constructive approach where participants are moving beyond just listing problems to identifying potential interventions."
     else:
         ratio_text = f"Communities identified {NUM_SOL:,} solutions alongside {NUM_CHAL:,} challenges. While the focus remains on highlighting barriers, there is an emerging capacity for solution-finding that can be further nurtured."
-    
+
     doc.add_paragraph(ratio_text)
 
     # SCALE OF PARTICIPATION
     doc.add_heading('Scale of Community Participation', level=2)
     scale_p = doc.add_paragraph()
-    scale_p.add_run(f"• Geographic Reach: {TOTAL_CH_STATE:,} community dialogues conducted across {num_districts} districts in Bihar\n")
+    scale_p.add_run(f"• Geographic Reach: {TOTAL_CH_STATE:,} community dialogues conducted across {s['districts']} districts in Bihar\n")
     scale_p.add_run(f"• Total Participants: {TOTAL_PART_STATE:,} community members actively engaged\n")
-    scale_p.add_run(f"• Average Engagement: {avg_per_chaupal:.1f} participants per Chaupal, indicating strong community mobilization\n")
-    scale_p.add_run(f"• Gender Representation: Women {w_perc:.1f}%, Children {c_perc:.1f}%, Men {m_perc:.1f}%, Others {o_perc:.1f}%\n")
-    
+    scale_p.add_run(f"• Average Engagement: {s['avg_per_chaupal']:.1f} participants per Chaupal, indicating strong community mobilization\n")
+    scale_p.add_run(f"• Gender Representation: Women {w_perc:.1f}%, Children {s['children_perc']:.1f}%, Men {m_perc:.1f}%, Others {s['others_perc']:.1f}%\n")
+
     if w_perc > 50:
         gender_text = f"• Dominant female participation ({w_perc:.1f}%) signals authentic grassroots engagement rather than tokenistic consultation, as women are primary stakeholders in children's education"
     elif w_perc > m_perc:
         gender_text = f"• Strong female participation ({w_perc:.1f}%) highlights women's active role in discussing education challenges, outnumbering male participants ({m_perc:.1f}%)."
     else:
         gender_text = f"• The dialogues included diverse participation, with women contributing {w_perc:.1f}% of the voices, ensuring maternal perspectives are included."
-    
+
     scale_p.add_run(gender_text)
 
     # DOMINANT CHALLENGE THEMES
     doc.add_heading('Dominant Challenge Themes', level=2)
-    doc.add_paragraph(f"The thematic analysis reveals systemic patterns in education barriers. The top 3 themes collectively account for {top_3_perc:.1f}% of all challenges, indicating concentrated problem areas requiring prioritized intervention:")
-    
-    for theme, count in top_3_themes.items():
+    doc.add_paragraph(f"The thematic analysis reveals systemic patterns in education barriers. The top 3 themes collectively account for {s['top_3_perc']:.1f}% of all challenges, indicating concentrated problem areas requiring prioritized intervention:")
+
+    for theme, count, s_count in s['top_themes']:
         t_perc = (count / NUM_CHAL * 100)
-        # Get solution count for this theme
-        s_count = len(df_s[df_s['Theme'] == theme])
         doc.add_paragraph(f"{theme}: {t_perc:.1f}% ({count:,} challenges, {s_count:,} solutions)", style='List Bullet')
 
     # COMMUNITY-LED VS SYSTEM-DEPENDENT
     doc.add_heading('Community-Led vs System-Dependent Solutions', level=2)
     doc.add_paragraph("Solution agency analysis reveals community ownership patterns. The distribution demonstrates where communities see themselves as agents of change versus where they require external institutional support:")
-    
+
     agency_p = doc.add_paragraph()
-    agency_p.add_run(f"• Individual-led Solutions: {ind_perc:.1f}% ({ind_led:,} solutions) - Family-level actions including parental engagement, behavioral change, and household resource allocation\n")
-    agency_p.add_run(f"• Community-led Solutions: {comm_perc:.1f}% ({comm_led:,} solutions) - Collective action including social mobilization, peer support networks, and community organizing\n")
-    agency_p.add_run(f"• Institutional Solutions: {inst_perc:.1f}% ({inst_led:,} solutions) - Systemic interventions requiring government or CSO support including infrastructure, policy changes, and resource provision\n")
-    
+    agency_p.add_run(f"• Individual-led Solutions: {ind_perc:.1f}% ({s['individual_led']:,} solutions) - Family-level actions including parental engagement, behavioral change, and household resource allocation\n")
+    agency_p.add_run(f"• Community-led Solutions: {comm_perc:.1f}% ({s['community_led']:,} solutions) - Collective action including social mobilization, peer support networks, and community organizing\n")
+    agency_p.add_run(f"• Institutional Solutions: {inst_perc:.1f}% ({s['institutional']:,} solutions) - Systemic interventions requiring government or CSO support including infrastructure, policy changes, and resource provision\n")
+
     if comm_driven_perc > 50:
         insight_text = f"• Critical Insight: {comm_driven_perc:.1f}% of solutions are community-driven (individual + community-led), demonstrating extraordinary grassroots capacity that partnerships must amplify rather than replace"
     else:
@@ -384,7 +792,7 @@ def generate_report():
 
     # STRATEGIC PARTNERSHIP
     doc.add_heading('🤝 Strategic Partnership Opportunity', level=2)
-    
+
     if comm_driven_perc > 50:
         strat_text = f"The {comm_driven_perc:.1f}% proportion of community-led and individual-led solutions reveals extraordinary community ownership and problem-solving capacity. Strategic partnerships should operate on a community-strengthening model rather than community-replacing model. This means: (1) Amplifying existing community initiatives through capacity building and resource support, (2) Providing targeted institutional interventions ({inst_perc:.1f}%) for infrastructure, teacher capacity, and documentation systems that communities cannot address independently, (3) Facilitating community-to-community learning and peer exchange, (4) Advocating for policy changes that enable community solutions to scale. The partnership must recognize communities as co-creators and primary implementers, not merely beneficiaries."
     else:
@@ -392,330 +800,151 @@ def generate_report():
 
     doc.add_paragraph(strat_text)
 
-    doc.add_page_break()
+def render_participation(doc, model):
+    """Section 2: participation metrics, district distribution and demographics."""
+    s = model['summary']
+    section = model['participation']
+    TOTAL_PART_STATE = s['participants']
 
-    # --- SECTION 2: GENERAL PARTICIPATION OVERVIEW ---
-    print("   📝 Generating Section 2: Participation Overview...")
     doc.add_heading('2. GENERAL PARTICIPATION OVERVIEW', level=1)
-    
+
     intro_para = doc.add_paragraph()
     run = intro_para.add_run("This section provides comprehensive analysis of participation patterns across geographic and demographic dimensions.")
     run.italic = True
 
     # TABLE 1: STATE METRICS
     doc.add_heading('TABLE 1: Overall Participation Metrics', level=2)
-    table1 = doc.add_table(rows=1, cols=3)
-    table1.style = 'Table Grid'
-    hdr_cells = table1.rows[0].cells
-    for i, h in enumerate(['Metric', 'Count', 'Percentage (%)']):
-        hdr_cells[i].text = h
-        hdr_cells[i].paragraphs[0].runs[0].bold = True
-        set_cell_background(hdr_cells[i], "D9D9D9") 
-
-    def add_row_v3(t, metric, count, p_type):
-        r = t.add_row().cells
-        r[0].text = metric
-        r[1].text = f"{int(count):,}" if isinstance(count, (int, float)) else str(count)
-        if p_type == "none": r[2].text = "-"
-        elif p_type == "full": r[2].text = "100%"
-        else:
-            p = (count / TOTAL_PART_STATE * 100) if TOTAL_PART_STATE > 0 else 0
-            r[2].text = f"{p:.1f}%"
-
-    add_row_v3(table1, "Total Number of Chaupals", TOTAL_CH_STATE, "none")
-    add_row_v3(table1, "Total Number of Participants", TOTAL_PART_STATE, "full")
-    add_row_v3(table1, "Average Participants per Chaupal", f"{avg_per_chaupal:.1f}", "none")
-    add_row_v3(table1, "Men Participants", m_total, "calc")
-    add_row_v3(table1, "Women Participants", w_total, "calc")
-    add_row_v3(table1, "Children Participants", c_total, "calc")
-    add_row_v3(table1, "Others (Unspecified)", o_total, "calc")
+    def row_v3(metric, count, p_type):
+        count_text = f"{int(count):,}" if isinstance(count, (int, float)) else str(count)
+        if p_type == "none": return [metric, count_text, "-"]
+        if p_type == "full": return [metric, count_text, "100%"]
+        p = (count / TOTAL_PART_STATE * 100) if TOTAL_PART_STATE > 0 else 0
+        return [metric, count_text, f"{p:.1f}%"]
+
+    add_bulk_table(doc, ['Metric', 'Count', 'Percentage (%)'], [
+        row_v3("Total Number of Chaupals", s['chaupals'], "none"),
+        row_v3("Total Number of Participants", TOTAL_PART_STATE, "full"),
+        row_v3("Average Participants per Chaupal", f"{s['avg_per_chaupal']:.1f}", "none"),
+        row_v3("Men Participants", s['men'], "calc"),
+        row_v3("Women Participants", s['women'], "calc"),
+        row_v3("Children Participants", s['children'], "calc"),
+        row_v3("Others (Unspecified)", s['others'], "calc"),
+    ], header_fill="D9D9D9")
 
     # SECTION 2.3: DISTRICT DISTRIBUTION
     doc.add_heading('2.3 District-wise Distribution of Reported Chaupals', level=2)
-    dist_stats = df_raw.groupby('District').agg(Ch_Count=('id', 'count'), Part_Sum=('Participant Count', 'sum')).reset_index()
-    dist_stats['Ch_Perc'] = (dist_stats['Ch_Count'] / TOTAL_CH_STATE) * 100
-    dist_stats = dist_stats.sort_values('Ch_Count', ascending=False)
-
-    table_dist = doc.add_table(rows=1, cols=5)
-    table_dist.style = 'Table Grid'
-    d_hdr = table_dist.rows[0].cells
-    headers = ['District', 'Chaupals (N)', 'Chaupal %', 'Participants (N)', 'Participant %']
-    for i, h in enumerate(headers):
-        d_hdr[i].text = h
-        d_hdr[i].paragraphs[0].runs[0].bold = True
-        set_cell_background(d_hdr[i], "F2F2F2")
-
-    for _, row in dist_stats.iterrows():
-        r = table_dist.add_row().cells
-        r[0].text, r[1].text = str(row['District']), f"{int(row['Ch_Count']):,}"
-        r[2].text = f"{row['Ch_Perc']:.1f}%"
-        r[3].text, r[4].text = f"{int(row['Part_Sum']):,}", f"{(row['Part_Sum']/TOTAL_PART_STATE)*100:.1f}%"
+    add_bulk_table(doc, ['District', 'Chaupals (N)', 'Chaupal %', 'Participants (N)', 'Participant %'], [
+        [str(dist), f"{int(ch_count):,}", f"{ch_perc:.1f}%", f"{int(part_sum):,}", f"{part_perc:.1f}%"]
+        for dist, ch_count, ch_perc, part_sum, part_perc in section['districts']
+    ], header_fill="F2F2F2")
 
     # NARRATIVE ANALYSIS
-    top_3 = dist_stats.head(3)
-    top_3_sum = top_3['Ch_Perc'].sum()
-    dist_list_str = ", ".join([f"{row['District']} ({int(row['Ch_Count']):,}, {row['Ch_Perc']:.1f}%)" for _, row in top_3.iterrows()])
-    
+    dist_list_str = ", ".join([f"{dist} ({int(ch_count):,}, {ch_perc:.1f}%)" for dist, ch_count, ch_perc in section['top_3']])
+
     doc.add_heading('Geographic Distribution Analysis', level=3)
-    doc.add_paragraph(f"Geographic distribution shows concentration in {dist_list_str}. Together, these top 3 districts account for {top_3_sum:.1f}% of dialogues.")
+    doc.add_paragraph(f"Geographic distribution shows concentration in {dist_list_str}. Together, these top 3 districts account for {section['top_3_perc']:.1f}% of dialogues.")
 
     doc.add_heading('Demographic Composition Analysis', level=3)
-    w_perc, m_perc, c_perc = (w_total/TOTAL_PART_STATE)*100, (m_total/TOTAL_PART_STATE)*100, (c_total/TOTAL_PART_STATE)*100
+    w_perc, m_perc = s['women_perc'], s['men_perc']
     ratio = w_perc / m_perc if m_perc > 0 else 0
     doc.add_paragraph(f"Women constitute {w_perc:.1f}% of participants, which is {( 'more than triple' if ratio >= 3 else 'significantly higher than' )} male participation ({m_perc:.1f}%).")
 
-    doc.add_page_break()
-    
+def render_content(doc, model):
+    """Section 3: challenge/solution totals and district engagement depth."""
+    s = model['summary']
+    section = model['content']
+    NUM_CHAL, NUM_SOL, SOL_RATIO = s['challenges'], s['solutions'], s['sol_ratio']
 
-    # --- SECTION 3: CORE CONTENT ANALYSIS ---
-    print("   📝 Generating Section 3: Core Content Analysis...")
     doc.add_heading('3. CORE CONTENT ANALYSIS', level=1)
-    
-    # Calculations for Section 3
-    unique_chal_count = chal_map['Merged_Concept'].nunique()
-    unique_sol_count = sol_map['Merged_Concept'].nunique()
-    chal_reduction = ((NUM_CHAL - unique_chal_count) / NUM_CHAL * 100) if NUM_CHAL > 0 else 0
-    sol_reduction = ((NUM_SOL - unique_sol_count) / NUM_SOL * 100) if NUM_SOL > 0 else 0
 
     # Narrative
     doc.add_paragraph(f"This section analyzes the substance of community dialogues - the challenges identified and solutions proposed. Communities articulated {NUM_CHAL:,} individual challenges and {NUM_SOL:,} individual solutions.")
 
     # TABLE 2
     doc.add_heading('Overall Challenge & Solution Metrics', level=2)
-    summary_table = doc.add_table(rows=1, cols=2)
-    summary_table.style = 'Table Grid'
-    hdr = summary_table.rows[0].cells
-    hdr[0].text, hdr[1].text = 'Metric', 'Count'
-    for cell in hdr: 
-        set_cell_background(cell, "D9D9D9")
-        cell.paragraphs[0].runs[0].bold = True
-
     data_rows = [
         ("Total Challenges", f"{NUM_CHAL:,}"),
         ("Total Solutions", f"{NUM_SOL:,}"),
-        ("Unique Challenges (after deduplication)", f"{unique_chal_count:,}"),
-        ("Unique Solutions (after deduplication)", f"{unique_sol_count:,}"),
+        ("Unique Challenges (after deduplication)", f"{section['unique_challenges']:,}"),
+        ("Unique Solutions (after deduplication)", f"{section['unique_solutions']:,}"),
         ("Overall Solution-to-Challenge Ratio", f"{SOL_RATIO:.2f}"),
     ]
-    for metric, val in data_rows:
-        r = summary_table.add_row().cells
-        r[0].text, r[1].text = metric, str(val)
+    add_bulk_table(doc, ['Metric', 'Count'], data_rows, header_fill="D9D9D9")
 
     # 3.2 District Averages
     doc.add_heading('District-wise Engagement Depth', level=2)
-    dist_chal_counts = chal_exploded.groupby('District').size().reset_index(name='C_Count')
-    dist_sol_counts = sol_exploded.groupby('District').size().reset_index(name='S_Count')
-    
-    avg_df = dist_stats[['District', 'Ch_Count']].merge(dist_chal_counts, on='District').merge(dist_sol_counts, on='District')
-    avg_df['Avg_C'] = avg_df['C_Count'] / avg_df['Ch_Count']
-    avg_df['Avg_S'] = avg_df['S_Count'] / avg_df['Ch_Count']
-
-    avg_table = doc.add_table(rows=1, cols=3)
-    avg_table.style = 'Table Grid'
-    a_hdr = avg_table.rows[0].cells
-    a_hdr[0].text, a_hdr[1].text, a_hdr[2].text = 'District', 'Avg Challenges/Chaupal', 'Avg Solutions/Chaupal'
-    for cell in a_hdr: set_cell_background(cell, "F2F2F2")
-
-    for _, row in avg_df.sort_values('Avg_C', ascending=False).iterrows():
-        r = avg_table.add_row().cells
-        r[0].text, r[1].text, r[2].text = str(row['District']), f"{row['Avg_C']:.2f}", f"{row['Avg_S']:.2f}"
+    add_bulk_table(doc, ['District', 'Avg Challenges/Chaupal', 'Avg Solutions/Chaupal'], [
+        [str(dist), f"{avg_c:.2f}", f"{avg_s:.2f}"] for dist, avg_c, avg_s in section['averages']
+    ], header_fill="F2F2F2", header_bold=False)
 
     # Paradigm Shift Section
     doc.add_heading('Solution-to-Challenge Ratio: A Paradigm Shift', level=2)
     doc.add_paragraph(f"The overall solution-to-challenge ratio of {SOL_RATIO:.2f} represents a fundamental paradigm shift in community consultation methodology. Traditional deficit-based consultations focus solely on problem identification, treating communities as problem containers. The Shiksha Chaupal model demonstrates that when communities are engaged as problem-solvers rather than merely problem-identifiers, they actively think constructively about solutions. This {NUM_SOL:,} solutions for {NUM_CHAL:,} challenges ratio indicates that every articulated challenge was matched with actionable solution thinking, demonstrating community agency and constructive engagement. This asset-based approach recognizes communities as repositories of contextual knowledge and innovative problem-solving capacity.")
 
-    doc.add_page_break()
+def render_thematic(doc, model):
+    """Section 4: distribution tables and the per-theme deep-dives."""
+    section = model['thematic']
 
-    # --- SECTION 4: THEMATIC ANALYSIS ---
-    print("   📝 Generating Section 4: Thematic Analysis...")
     doc.add_heading('4. THEMATIC ANALYSIS', level=1)
-    
-    # TABLE: Challenge by Theme
-    doc.add_heading('Overall Challenge Distribution by Theme', level=2)
-    t_chal = doc.add_table(rows=1, cols=3); t_chal.style = 'Table Grid'
-    h_chal = t_chal.rows[0].cells
-    h_chal[0].text, h_chal[1].text, h_chal[2].text = 'Theme', 'Count', '%'
-    for c in h_chal: set_cell_background(c, "D9D9D9")
-    
-    theme_counts = df_c['Theme'].value_counts()
-    for theme, count in theme_counts.items():
-        r = t_chal.add_row().cells
-        r[0].text, r[1].text, r[2].text = theme, str(count), f"{(count/NUM_CHAL_STATEMENTS*100):.1f}%"
-
-    # TABLE: Solution Agency
-    doc.add_heading('Solution Distribution by Agency', level=2)
-    t_agency = doc.add_table(rows=1, cols=3); t_agency.style = 'Table Grid'
-    h_age = t_agency.rows[0].cells
-    h_age[0].text, h_age[1].text, h_age[2].text = 'Agency Type', 'Count', '%'
-    for c in h_age: set_cell_background(c, "F2F2F2")
-    
-    agency_counts = df_s['Agency'].value_counts()
-    for agency, count in agency_counts.items():
-        r = t_agency.add_row().cells
-        r[0].text, r[1].text, r[2].text = agency, str(count), f"{(count/NUM_SOL_STATEMENTS*100):.1f}%"
-
-    # TABLE: Challenge Environment
-    doc.add_heading('Challenge Distribution by Environment', level=2)
-    t_env = doc.add_table(rows=1, cols=3); t_env.style = 'Table Grid'
-    h_env = t_env.rows[0].cells
-    h_env[0].text, h_env[1].text, h_env[2].text = 'Environment', 'Count', '%'
-    for c in h_env: set_cell_background(c, "D9D9D9")
-    
-    env_counts = df_c['Environment'].value_counts()
-    for env, count in env_counts.items():
-        r = t_env.add_row().cells
-        r[0].text, r[1].text, r[2].text = env, str(count), f"{(count/NUM_CHAL_STATEMENTS*100):.1f}%"
+
+    distribution_tables = [
+        ('Overall Challenge Distribution by Theme', 'Theme', "D9D9D9", section['theme_table']),
+        ('Solution Distribution by Agency', 'Agency Type', "F2F2F2", section['agency_table']),
+        ('Challenge Distribution by Environment', 'Environment', "D9D9D9", section['environment_table']),
+    ]
+    for heading, label, color, rows in distribution_tables:
+        doc.add_heading(heading, level=2)
+        add_bulk_table(doc, [label, 'Count', '%'], [
+            [name, str(count), f"{perc:.1f}%"] for name, count, perc in rows
+        ], header_fill=color, header_bold=False)
 
     # --- INDIVIDUAL THEME DEEP-DIVES ---
     doc.add_page_break()
 
-    # Prepare theme list: Top themes, but ensure "Other Factors" is last
-    themes_to_process = list(theme_counts.index[:10])
-    
-    # If "Other Factors" is in the list, remove it temporarily
-    if "Other Factors" in themes_to_process:
-        themes_to_process.remove("Other Factors")
-        
-    # If "Other Factors" exists in data (even if not in top 10 originally, though unlikely given 20%), add it to end
-    if "Other Factors" in theme_counts.index:
-        themes_to_process.append("Other Factors")
+    for i, t in enumerate(section['themes'], 1):
+        doc.add_heading(f"4.{i} {t['theme'].upper()}", level=2)
 
-    for i, theme in enumerate(themes_to_process, 1): 
-        doc.add_heading(f'4.{i} {theme.upper()}', level=2)
-        
-        t_c = df_c[df_c['Theme'] == theme]
-        t_s = df_s[df_s['Theme'] == theme]
-        
-        # Theme Metrics
-        c_count = len(t_c)
-        s_count = len(t_s)
-        c_perc = (c_count / NUM_CHAL * 100) if NUM_CHAL > 0 else 0
-        sol_cov = (s_count / c_count) if c_count > 0 else 0
-        u_c = t_c['Merged_Concept'].nunique()
-        u_s = t_s['Merged_Concept'].nunique()
-        
         # Add Metrics Paragraph
         m_para = doc.add_paragraph()
-        m_para.add_run(f"Scale: {c_count:,} challenges ({c_perc:.1f}% of total dataset) | {s_count:,} solutions\n").bold = True
-        m_para.add_run(f"Solution Coverage: {sol_cov:.2f} solutions per challenge")
+        m_para.add_run(f"Scale: {t['challenges']:,} challenges ({t['challenge_perc']:.1f}% of total dataset) | {t['solutions']:,} solutions\n").bold = True
+        m_para.add_run(f"Solution Coverage: {t['coverage']:.2f} solutions per challenge")
 
         # Challenge Landscape
         doc.add_heading('Challenge Landscape', level=4)
-        if not t_c.empty:
-            env_pref = t_c['Environment'].value_counts(normalize=True).idxmax()
-            doc.add_paragraph(f"The landscape for '{theme}' is primarily localized within the {env_pref} environment. This suggests that interventions must be targeted at this level for maximum impact.")
-        
+        if t['environment'] is not None:
+            doc.add_paragraph(f"The landscape for '{t['theme']}' is primarily localized within the {t['environment']} environment. This suggests that interventions must be targeted at this level for maximum impact.")
+
         doc.add_heading("Top Recurring Challenges", level=5)
-        
-        # Logic for 50% coverage
-        chal_counts = t_c['Merged_Concept'].value_counts()
-        total_theme_chal = len(t_c)
-        cumulative_count = 0
-        
-        for i, (concept, count) in enumerate(chal_counts.items(), 1):
-            cumulative_count += count
-            coverage_perc = (cumulative_count / total_theme_chal) * 100
-            item_perc = (count / total_theme_chal) * 100
-            
-            # Find representative quote (longest original text for this concept)
-            original_texts = t_c[t_c['Merged_Concept'] == concept]['Challenges'].tolist()
-            rep_quote = max(original_texts, key=len) if original_texts else concept
-            
-            p = doc.add_paragraph()
-            p.paragraph_format.left_indent = Pt(36)
-            p.paragraph_format.first_line_indent = Pt(-18)
-            p.add_run(f"{i}. {concept}").bold = True
-            p.add_run(f" ({count} mentions, {item_perc:.1f}%)")
-            p.add_run(f"\n   Voice from the ground: \"{rep_quote}\"").italic = True
-            
-            if coverage_perc >= 50 and i >= 5: # At least 5 items, or until 50%
-                break
-            if i >= 15: # Hard cap
-                break
+        for n, (concept, count, item_perc, quote) in enumerate(t['challenge_items'], 1):
+            add_ranked_item(doc, f"{n}. {concept}", count, item_perc, "Voice from the ground", quote)
 
         # Solution Ecosystem
         doc.add_heading('Solution Ecosystem', level=4)
-        if not t_s.empty:
-            total_theme_sol = len(t_s)
-            agency_counts = t_s['Agency'].value_counts(normalize=True)
-            agency_main = agency_counts.idxmax()
-            agency_perc = agency_counts.max() * 100
-            
-            doc.add_paragraph(f"Communities proposed {total_theme_sol:,} solutions to address this theme. The solution ecosystem demonstrates {agency_main} agency with {agency_perc:.1f}% of solutions being {agency_main}.")
+        if t['solution_agency'] is not None:
+            agency_main, agency_perc = t['solution_agency']
+            doc.add_paragraph(f"Communities proposed {t['solutions']:,} solutions to address this theme. The solution ecosystem demonstrates {agency_main} agency with {agency_perc:.1f}% of solutions being {agency_main}.")
 
             doc.add_heading("Most Frequently Proposed Solutions", level=5)
-            
-            # Logic for 50% coverage - Solutions
-            sol_counts = t_s['Merged_Concept'].value_counts()
-            cumulative_count_s = 0
-            printed_count = 0
-            
-            for concept, count in sol_counts.items():
-                if not is_valid_solution(concept):
-                    continue
+            for n, (concept, count, item_perc, quote) in enumerate(t['solution_items'], 1):
+                add_ranked_item(doc, f"{n}. {concept}", count, item_perc, "Community Proposal", quote)
 
-                printed_count += 1
-                cumulative_count_s += count
-                coverage_perc = (cumulative_count_s / total_theme_sol) * 100
-                item_perc = (count / total_theme_sol) * 100
-                
-                # Find representative quote
-                original_texts = t_s[t_s['Merged_Concept'] == concept]['Solutions'].tolist()
-                rep_quote = max(original_texts, key=len) if original_texts else concept
-
-                p = doc.add_paragraph()
-                p.paragraph_format.left_indent = Pt(36)
-                p.paragraph_format.first_line_indent = Pt(-18)
-                p.add_run(f"{printed_count}. {concept}").bold = True
-                p.add_run(f" ({count} mentions, {item_perc:.1f}%)")
-                p.add_run(f"\n   Community Proposal: \"{rep_quote}\"").italic = True
-                
-                if coverage_perc >= 50 and printed_count >= 5:
-                    break
-                if printed_count >= 15:
-                    break
+        flush_document(doc)
+
+def render_districts(doc, model):
+    """Section 5: district overview table followed by every district profile."""
+    section = model['districts']
 
-    doc.add_page_break()
-    print("   📝 Generating Section 5: District Profiles...")
     doc.add_heading('5. DISTRICT PROFILES', level=1)
-    
+
     doc.add_paragraph("This section provides comprehensive profiles for top-performing districts by Chaupal count, including quantitative metrics, thematic breakdowns, and top challenges/solutions specific to each district. These profiles enable district-specific intervention design and comparative analysis across geographies.")
 
     # --- DISTRICT OVERVIEW TABLE ---
     doc.add_heading('District Performance Overview Table', level=2)
-    
-    # Aggregate Data
-    d_stats = df_raw.groupby('District').agg(
-        Chaupals=('id', 'nunique'),
-        Participants=('Participant Count', 'sum')
-    ).reset_index()
-    
-    c_counts = chal_exploded.groupby('District').size().reset_index(name='Challenges')
-    s_counts = sol_exploded.groupby('District').size().reset_index(name='Solutions')
-    
-    dist_overview = d_stats.merge(c_counts, on='District', how='left').merge(s_counts, on='District', how='left').fillna(0)
-    dist_overview['Ratio'] = dist_overview['Solutions'] / dist_overview['Challenges']
-    dist_overview = dist_overview.sort_values('Chaupals', ascending=False)
-    
-    # Create Table
-    table = doc.add_table(rows=1, cols=6)
-    table.style = 'Table Grid'
-    hdr = table.rows[0].cells
-    headers = ['District', 'Chaupals', 'Participants', 'Challenges', 'Solutions', 'Ratio']
-    for i, h in enumerate(headers):
-        hdr[i].text = h
-        hdr[i].paragraphs[0].runs[0].bold = True
-        set_cell_background(hdr[i], "D9D9D9")
-        
-    for _, row in dist_overview.iterrows():
-        r = table.add_row().cells
-        r[0].text = str(row['District'])
-        r[1].text = f"{int(row['Chaupals']):,}"
-        r[2].text = f"{int(row['Participants']):,}"
-        r[3].text = f"{int(row['Challenges']):,}"
-        r[4].text = f"{int(row['Solutions']):,}"
-        r[5].text = f"{row['Ratio']:.2f}"
-        
+    add_bulk_table(doc, ['District', 'Chaupals', 'Participants', 'Challenges', 'Solutions', 'Ratio'], [
+        [str(dist), f"{int(chaupals):,}", f"{int(participants):,}", f"{int(challenges):,}", f"{int(solutions):,}", f"{ratio:.2f}"]
+        for dist, chaupals, participants, challenges, solutions, ratio in section['overview']
+    ], header_fill="D9D9D9")
+
     # Note
     note_p = doc.add_paragraph()
     note_run = note_p.add_run("Note: Ratio = Solutions ÷ Challenges. Values >1.0 indicate more solutions than challenges identified.")
@@ -723,213 +952,122 @@ def generate_report():
     note_run.font.size = Pt(9)
 
     # --- DETAILED PROFILES ---
-    # Reorder districts to put 'Others' last
-    dist_list = dist_overview['District'].tolist()
-    if 'Others' in dist_list:
-        dist_list.remove('Others')
-        dist_list.append('Others')
+    for i, d in enumerate(section['profiles'], 1):
+        render_district_profile(doc, d, f"5.{i} {d['district'].upper()}")
+        flush_document(doc)
+
+def add_profile_quotes(doc, label, quotes):
+    """Indented italic quotes under a district theme, skipping concepts without one."""
+    for quote in quotes:
+        if not quote: continue
+        p_q = doc.add_paragraph()
+        p_q.paragraph_format.left_indent = Pt(36)
+        p_q.add_run(f"{label}: \"{quote}\"").italic = True
+
+def render_district_profile(doc, d, title=None, quotes=False):
+    """One district profile: snapshot paragraph plus theme breakdown, optionally with quotes per concept."""
+    if title:
+        doc.add_heading(title, level=2)
+
+    doc.add_heading('A. Quantitative Snapshot', level=3)
+    snap_p = doc.add_paragraph()
+    snap_p.add_run(f"Chaupals: {d['chaupals']:,} ({d['chaupal_perc']:.1f}% of total)\n")
+    snap_p.add_run(f"Total Participants: {d['participants']:,}\n")
+    snap_p.add_run(f"Demographics: Men {d['men_perc']:.1f}%, Women {d['women_perc']:.1f}%, Children {d['children_perc']:.1f}%\n")
+    snap_p.add_run(f"Challenges: {d['challenges']:,} | Solutions: {d['solutions']:,}\n")
+    snap_p.add_run(f"Solution Efficiency: {d['ratio']:.2f}\n")
+    snap_p.add_run(f"Average per Chaupal: {d['avg_challenges']:.1f} challenges, {d['avg_solutions']:.1f} solutions")
+
+    if d['challenges'] == 0:
+        doc.add_paragraph("No challenge data available for this district.")
+        return
 
-    for i, dist in enumerate(dist_list, 1):
-        doc.add_heading(f'5.{i} {dist.upper()}', level=2)
-        d_raw = df_raw[df_raw['District'] == dist]
-        
-        # Filter data for this district
-        d_chal = df_c[df_c['District'] == dist]
-        d_sol = df_s[df_s['District'] == dist]
-
-        # Metrics for Snapshot
-        dist_chaupals = len(d_raw)
-        dist_participants = int(d_raw['Participant Count'].sum())
-        chaupal_perc = (dist_chaupals / TOTAL_CH_STATE * 100) if TOTAL_CH_STATE > 0 else 0
-        
-        m_d = d_raw['Men'].sum()
-        w_d = d_raw['Women'].sum()
-        c_d = d_raw['Children'].sum()
-        
-        m_p = (m_d / dist_participants * 100) if dist_participants > 0 else 0
-        w_p = (w_d / dist_participants * 100) if dist_participants > 0 else 0
-        c_p = (c_d / dist_participants * 100) if dist_participants > 0 else 0
-        
-        dist_chal_count = len(d_chal)
-        dist_sol_count = len(d_sol)
-        dist_ratio = (dist_sol_count / dist_chal_count) if dist_chal_count > 0 else 0
-        
-        avg_c = dist_chal_count / dist_chaupals if dist_chaupals > 0 else 0
-        avg_s = dist_sol_count / dist_chaupals if dist_chaupals > 0 else 0
-
-        doc.add_heading('A. Quantitative Snapshot', level=3)
-        snap_p = doc.add_paragraph()
-        snap_p.add_run(f"Chaupals: {dist_chaupals:,} ({chaupal_perc:.1f}% of total)\n")
-        snap_p.add_run(f"Total Participants: {dist_participants:,}\n")
-        snap_p.add_run(f"Demographics: Men {m_p:.1f}%, Women {w_p:.1f}%, Children {c_p:.1f}%\n")
-        snap_p.add_run(f"Challenges: {dist_chal_count:,} | Solutions: {dist_sol_count:,}\n")
-        snap_p.add_run(f"Solution Efficiency: {dist_ratio:.2f}\n")
-        snap_p.add_run(f"Average per Chaupal: {avg_c:.1f} challenges, {avg_s:.1f} solutions")
-        
-        if d_chal.empty:
-            doc.add_paragraph("No challenge data available for this district.")
-            continue
+    doc.add_heading('Thematic Breakdown & Examples', level=3)
+
+    for t in d['themes']:
+        # Theme Header
+        p_theme = doc.add_paragraph()
+        p_theme.paragraph_format.space_before = Pt(6)
+        run = p_theme.add_run(f"• {t['theme']} ({t['perc']:.1f}%)")
+        run.bold = True
+
+        # Write Challenges
+        if t['challenges']:
+            p_c = doc.add_paragraph()
+            p_c.paragraph_format.left_indent = Pt(18)
+            p_c.add_run("Challenges: ").bold = True
+            p_c.add_run("; ".join(t['challenges']))
+            if quotes:
+                add_profile_quotes(doc, "Voice from the ground", t['challenge_quotes'])
+
+        # Write Solutions
+        if t['solutions']:
+            p_s = doc.add_paragraph()
+            p_s.paragraph_format.left_indent = Pt(18)
+            p_s.add_run("Solutions: ").bold = True
+            p_s.add_run("; ".join(t['solutions']))
+            if quotes:
+                add_profile_quotes(doc, "Community Proposal", t['solution_quotes'])
+
+def render_insights(doc, model):
+    """Section 6: distinctive solutions and expectations from Government & CSOs."""
+    section = model['insights']
 
-        # Calculate Theme Percentages
-        total_dist_chal = len(d_chal)
-        theme_counts = d_chal['Theme'].value_counts()
-        
-        doc.add_heading('Thematic Breakdown & Examples', level=3)
-        
-        for theme, count in theme_counts.items():
-            perc = (count / total_dist_chal) * 100
-            
-            # Theme Header
-            p_theme = doc.add_paragraph()
-            p_theme.paragraph_format.space_before = Pt(6)
-            run = p_theme.add_run(f"• {theme} ({perc:.1f}%)")
-            run.bold = True
-            
-            # Get Top 2 Challenges (by frequency in this district)
-            theme_c_rows = d_chal[d_chal['Theme'] == theme]
-            top_challenges = theme_c_rows['Merged_Concept'].value_counts().head(2).index.tolist()
-            
-            # Get Top 2 Solutions
-            theme_s_rows = d_sol[d_sol['Theme'] == theme]
-            
-            # DEBUG
-            # print(f"Theme: {theme}, theme_s_rows shape: {theme_s_rows.shape}")
-            
-            if theme_s_rows.empty:
-                top_solutions = []
-            else:
-                # Ensure Merged_Concept is string
-                theme_s_rows = theme_s_rows.copy()
-                theme_s_rows['Merged_Concept'] = theme_s_rows['Merged_Concept'].fillna("Uncategorized").astype(str)
-                
-                valid_mask = theme_s_rows['Merged_Concept'].apply(is_valid_solution)
-                valid_s_rows = theme_s_rows[valid_mask]
-                top_solutions = valid_s_rows['Merged_Concept'].value_counts().head(2).index.tolist()
-            
-            # Write Challenges
-            if top_challenges:
-                p_c = doc.add_paragraph()
-                p_c.paragraph_format.left_indent = Pt(18)
-                p_c.add_run("Challenges: ").bold = True
-                p_c.add_run("; ".join(top_challenges))
-                
-            # Write Solutions
-            if top_solutions:
-                p_s = doc.add_paragraph()
-                p_s.paragraph_format.left_indent = Pt(18)
-                p_s.add_run("Solutions: ").bold = True
-                p_s.add_run("; ".join(top_solutions))
-
-    # --- SECTION 6: UNIQUE INSIGHTS ---
-    print("   📝 Generating Section 6: Unique Insights...")
-    doc.add_page_break()
     doc.add_heading('6. UNIQUE INSIGHTS', level=1)
-    
-    def get_unique_examples(agency_type, count=5):
-        subset = df_s[df_s['Agency'] == agency_type].copy()
-        if subset.empty: return []
-        
-        # 1. Prioritize 'Other Factors'
-        others = subset[subset['Theme'] == 'Other Factors']
-        
-        # 2. If not enough, look for low frequency items in general
-        # Calculate frequency of Merged_Concept
-        freq = subset['Merged_Concept'].value_counts()
-        unique_concepts = freq[freq == 1].index.tolist()
-        
-        # Filter subset for these unique concepts
-        unique_rows = subset[subset['Merged_Concept'].isin(unique_concepts)]
-        
-        # Combine: Others first, then unique rows
-        candidates = pd.concat([others, unique_rows]).drop_duplicates(subset=['Solutions'])
-        
-        # Filter out short/junk text
-        candidates = candidates[candidates['Solutions'].str.len() > 20]
-        
-        # Sort by length (longer is usually better for "insights")
-        candidates['len'] = candidates['Solutions'].str.len()
-        top_candidates = candidates.sort_values('len', ascending=False).head(count)
-        
-        results = []
-        for _, row in top_candidates.iterrows():
-            dist = str(row['District'])
-            sol = row['Solutions'].strip()
-            
-            # Only show District as per request
-            location_str = f"{dist}"
-                
-            results.append(f"\"{sol}\"\n   📍 {location_str}")
-        return results
 
     # 6.1 Individual-led
     doc.add_heading('Individual-led Unique Solutions', level=2)
     doc.add_paragraph("Highlights of innovative or distinct solutions proposed by individuals that stand out from common themes:")
-    for ex in get_unique_examples('Individual-led', 5):
+    for sol, dist in section['individual']:
         p = doc.add_paragraph(style='List Bullet')
-        p.add_run(ex)
+        p.add_run(f"\"{sol}\"\n   📍 {dist}")
 
     # 6.2 Community-led
     doc.add_heading('Community-led Unique Solutions', level=2)
     doc.add_paragraph("Highlights of collective actions or community-driven innovations:")
-    for ex in get_unique_examples('Community-led', 5):
+    for sol, dist in section['community']:
         p = doc.add_paragraph(style='List Bullet')
-        p.add_run(ex)
+        p.add_run(f"\"{sol}\"\n   📍 {dist}")
 
     # 6.3 Expectations
     doc.add_heading('Expectations from Government & CSOs', level=2)
     doc.add_paragraph("Key expectations and demands expressed by the community for systemic support:")
-    
-    inst_subset = df_s[df_s['Agency'] == 'Institutional']
-    if not inst_subset.empty:
-        # Get top concepts
-        top_inst = inst_subset['Merged_Concept'].value_counts().head(5)
-        for concept, count in top_inst.items():
-            # Get a representative quote
-            quotes = inst_subset[inst_subset['Merged_Concept'] == concept]['Solutions'].tolist()
-            # Filter for valid quotes
-            quotes = [q for q in quotes if isinstance(q, str) and len(q) > 10]
-            if not quotes: continue
-            
-            best_quote = max(quotes, key=len)
-            
-            p = doc.add_paragraph(style='List Number')
-            p.add_run(f"{concept}").bold = True
-            p.add_run(f" ({count} mentions)")
-            p.add_run(f"\n   Community Voice: \"{best_quote}\"").italic = True
+    for concept, count, inst_quote in section['expectations']:
+        p = doc.add_paragraph(style='List Number')
+        p.add_run(f"{concept}").bold = True
+        p.add_run(f" ({count} mentions)")
+        p.add_run(f"\n   Community Voice: \"{inst_quote}\"").italic = True
+
+def render_conclusion(doc, model):
+    """Section 7: closing narrative built from the summary and example concepts."""
+    s = model['summary']
+    section = model['conclusion']
 
-    print("   💾 Saving document...")
-    
-    # --- SECTION 7: CONCLUSION ---
-    print("   📝 Generating Section 7: Conclusion...")
-    doc.add_page_break()
     doc.add_heading('7. CONCLUSION', level=1)
-    
+
     # 7.1 Transformative Insight
     doc.add_heading('🎯 TRANSFORMATIVE INSIGHT: Community as Solution Architects', level=2)
-    doc.add_paragraph(f"This analysis of {TOTAL_CH_STATE:,} Shiksha Chaupals reveals a fundamental truth: rural communities are not passive recipients of development interventions but sophisticated problem-solvers capable of designing culturally-appropriate, sustainable solutions to education barriers. The {SOL_RATIO:.2f} solution coverage ratio demonstrates that communities are generating solutions at nearly the same rate as identifying challenges.")
+    doc.add_paragraph(f"This analysis of {s['chaupals']:,} Shiksha Chaupals reveals a fundamental truth: rural communities are not passive recipients of development interventions but sophisticated problem-solvers capable of designing culturally-appropriate, sustainable solutions to education barriers. The {s['sol_ratio']:.2f} solution coverage ratio demonstrates that communities are generating solutions at nearly the same rate as identifying challenges.")
 
     # 7.2 Interconnected Challenge Reality
     doc.add_heading('The Interconnected Challenge Reality', level=2)
-    top_themes_list = top_3_themes.index.tolist()
-    theme_str = ", ".join(top_themes_list)
+    theme_str = ", ".join([theme for theme, _, _ in s['top_themes']])
     doc.add_paragraph(f"Challenges do not exist in isolation. The dominance of themes like {theme_str} suggests a complex interplay of factors. For instance, economic barriers often amplify documentation issues, while infrastructure gaps can drive families toward alternative schooling options. Understanding these interconnections is essential for designing effective interventions.")
 
     # 7.3 Community Agency Excellence
     doc.add_heading('Community Agency Excellence', level=2)
-    # Get top community solutions for examples
-    comm_sols = df_s[df_s['Agency'] == 'Community-led']['Merged_Concept'].value_counts().head(4).index.tolist()
+    comm_sols = section['community_examples']
     if comm_sols:
-        comm_examples = ", ".join([s.lower() for s in comm_sols])
+        comm_examples = ", ".join([c.lower() for c in comm_sols])
         doc.add_paragraph(f"Communities have demonstrated remarkable innovation through initiatives such as {comm_examples}. This agency must be recognized, celebrated, and supported—not replaced by external solutions.")
     else:
         doc.add_paragraph("Communities have demonstrated remarkable innovation through collective action and peer support mechanisms. This agency must be recognized, celebrated, and supported—not replaced by external solutions.")
 
     # 7.4 Systemic Support Imperative
     doc.add_heading('Systemic Support Imperative', level=2)
-    # Get top institutional solutions for examples
-    inst_sols = df_s[df_s['Agency'] == 'Institutional']['Merged_Concept'].value_counts().head(4).index.tolist()
+    inst_sols = section['institutional_examples']
     if inst_sols:
-        inst_examples = ", ".join([s.lower() for s in inst_sols])
+        inst_examples = ", ".join([c.lower() for c in inst_sols])
         doc.add_paragraph(f"While community agency is exceptional, certain barriers require institutional action. Issues such as {inst_examples} cannot be resolved through community effort alone. The path forward requires strategic partnerships that amplify community strengths while providing systemic support.")
     else:
         doc.add_paragraph("While community agency is exceptional, certain barriers require institutional action. Infrastructure gaps, documentation bottlenecks, and resource shortages cannot be resolved through community effort alone. The path forward requires strategic partnerships that amplify community strengths while providing systemic support.")
@@ -938,8 +1076,192 @@ def generate_report():
     doc.add_heading('🤝 Strategic Partnership Opportunity', level=2)
     doc.add_paragraph("The optimal collaboration model combines community-led cultural change initiatives with institutional support for infrastructure and policy barriers. Government agencies, NGOs, and CSOs should position themselves as resource partners and accountability allies—not solution designers—enabling communities to scale their own innovations while addressing systemic gaps.")
 
-    doc.save('Final_Shiksha_Report.docx')
-    print("\n🏁 SUCCESS! Complete report generated.")
+# Report sections in document order; each renderer only reads the model
+REPORT_SECTIONS = [
+    ('Section 1: Executive Summary', render_executive_summary),
+    ('Section 2: Participation Overview', render_participation),
+    ('Section 3: Core Content Analysis', render_content),
+    ('Section 4: Thematic Analysis', render_thematic),
+    ('Section 5: District Profiles', render_districts),
+    ('Section 6: Unique Insights', render_insights),
+    ('Section 7: Conclusion', render_conclusion),
+]
+
+# Report model seen by worker processes; set once per process by the pool initializer, never modified
+_model_snapshot = None
+
+def set_model_snapshot(model):
+    """Worker initializer: keeps the report model handed over by the parent process."""
+    global _model_snapshot
+    _model_snapshot = model
+
+def load_model_snapshot(model_path):
+    """Worker initializer: each process reads the cached report model once and only ever reads from it."""
+    with open(model_path, encoding='utf-8') as f:
+        set_model_snapshot(json.load(f)['payload'])
+
+def render_section_xml(index):
+    """Renders one report section into its own scratch document and returns its body XML. Runs in a worker process."""
+    start = time.perf_counter()
+    doc = Document()
+    REPORT_SECTIONS[index][1](doc, _model_snapshot)
+    body = doc.element.body
+    body.remove(body.sectPr)
+    return etree.tostring(body), time.perf_counter() - start
+
+def append_body_xml(doc, body_xml):
+    """Moves every element of a rendered section body into doc, ahead of its section properties."""
+    sect_pr = doc.element.body.sectPr
+    for element in list(parse_xml(body_xml)):
+        sect_pr.addprevious(element)
+
+def print_section_timings(timings):
+    """Per-section render times, slowest first."""
+    total = sum(seconds for _, seconds in timings) or 1
+    print("   ⏱️  Section render times:")
+    for title, seconds in sorted(timings, key=lambda t: t[1], reverse=True):
+        print(f"      {title:<36} {seconds:6.2f}s ({seconds / total * 100:4.1f}%)")
+
+def render_report(model, output_path=REPORT_FILE, stream=False, parallel=False, workers=None):
+    """
+    Builds the DOCX report from a report model, one page per section.
+    With stream=True the body is written to the zip as it is rendered, so memory stays flat in report size.
+    With parallel=True every section is rendered as a sub-document in a worker process and merged in order;
+    all sub-documents come from the same default template, so style ids and list numbering line up.
+    """
+    doc = StreamingDocument(output_path) if stream else Document()
+    timings = []
+
+    if parallel:
+        print(f"   📝 Rendering {len(REPORT_SECTIONS)} sections in parallel...")
+        with ProcessPoolExecutor(max_workers=workers, initializer=set_model_snapshot, initargs=(model,)) as pool:
+            rendered = pool.map(render_section_xml, range(len(REPORT_SECTIONS)))
+            # Merge in document order as results arrive; later sections may still be rendering
+            for i, ((title, _), (body_xml, seconds)) in enumerate(zip(REPORT_SECTIONS, rendered)):
+                if i > 0:
+                    doc.add_page_break()
+                append_body_xml(doc, body_xml)
+                flush_document(doc)
+                timings.append((title, seconds))
+    else:
+        for i, (title, render_section) in enumerate(REPORT_SECTIONS):
+            print(f"   📝 Generating {title}...")
+            start = time.perf_counter()
+            if i > 0:
+                doc.add_page_break()
+            render_section(doc, model)
+            flush_document(doc)
+            timings.append((title, time.perf_counter() - start))
+
+    print_section_timings(timings)
+    print("   💾 Saving document...")
+    doc.save(output_path)
+
+# --- PER-DISTRICT REPORTS ---
+
+def district_file_name(district, taken):
+    """File-system safe, unique DOCX name for a district."""
+    base = re.sub(r'[^A-Za-z0-9]+', '_', str(district)).strip('_') or 'District'
+    name, n = base, 2
+    while name.lower() in taken:
+        name, n = f"{base}_{n}", n + 1
+    taken.add(name.lower())
+    return f"{name}.docx"
+
+def render_district_report(task):
+    """Renders one district's standalone DOCX from the snapshot. Runs in a worker process."""
+    index, output_path = task
+    start = time.perf_counter()
+    s = _model_snapshot['summary']
+    d = _model_snapshot['districts']['profiles'][index]
+
+    doc = Document()
+    doc.add_heading(f"Shiksha Chaupal District Report: {d['district']}", level=0)
+    intro = doc.add_paragraph()
+    intro.add_run(f"Findings from {d['chaupals']:,} of the {s['chaupals']:,} Shiksha Chaupal community dialogues conducted across Bihar, with the district's top challenges, proposed solutions and voices from the ground per theme.").italic = True
+    render_district_profile(doc, d, quotes=True)
+    doc.save(output_path)
+
+    return {
+        'district': d['district'],
+        'file': os.path.basename(output_path),
+        'chaupals': d['chaupals'],
+        'participants': d['participants'],
+        'challenges': d['challenges'],
+        'solutions': d['solutions'],
+        'render_seconds': round(time.perf_counter() - start, 3),
+    }
+
+def render_district_reports(model_path=REPORT_MODEL_FILE, output_dir=DISTRICT_REPORT_DIR, workers=None):
+    """
+    Renders one DOCX per district in parallel worker processes, all reading the same cached model,
+    and writes a manifest indexing the outputs.
+    """
+    with open(model_path, encoding='utf-8') as f:
+        cached = json.load(f)
+    profiles = cached['payload']['districts']['profiles']
+    os.makedirs(output_dir, exist_ok=True)
+
+    taken = set()
+    tasks = [(i, os.path.join(output_dir, district_file_name(d['district'], taken))) for i, d in enumerate(profiles)]
+
+    print(f"   🗂️  Rendering {len(tasks)} district reports into {output_dir}/ ...")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=load_model_snapshot, initargs=(model_path,)) as pool:
+        reports = list(pool.map(render_district_report, tasks))
+    elapsed = time.perf_counter() - start
+
+    manifest = {
+        'model_file': model_path,
+        'model_key': cached['key'],
+        'rules_hash': cached['payload']['rules']['hash'],
+        'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'render_seconds': round(elapsed, 2),
+        'reports': reports,
+    }
+    with open(os.path.join(output_dir, DISTRICT_MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    print(f"   ✅ {len(reports)} district reports in {elapsed:.2f}s (manifest: {os.path.join(output_dir, DISTRICT_MANIFEST)})")
+    return manifest
+
+def generate_report(refresh=False, stream=False, districts=False, parallel=False, workers=None):
+    print("🚀 Starting Final Report Generation Engine...")
+    print(f"   📏 Rule set v{RULES.version} ({RULES.hash[:12]})")
+
+    # The model only depends on the input files and the rule set, so a wording or layout change re-renders from cache
+    cache_key = fingerprint(REPORT_INPUTS, REPORT_MODEL_VERSION, RULES.hash)
+    model = None if refresh else load_cached(REPORT_MODEL_FILE, cache_key)
+    if model is not None and not model.get('refinement', {}).get('complete'):
+        print("   ⚠️ Cached report model has unrefined concepts (AI refinement failed or was skipped); recomputing")
+        model = None
+    if model is not None:
+        print(f"   ♻️  Inputs unchanged, reusing cached report model ({REPORT_MODEL_FILE})")
+    else:
+        model = compute_report_model()
+        if model is None:
+            return
+        save_cached(REPORT_MODEL_FILE, cache_key, model)
+        if model['refinement']['complete']:
+            print(f"   💾 Report model cached to {REPORT_MODEL_FILE}")
+        else:
+            print(f"   💾 Report model written to {REPORT_MODEL_FILE} (incomplete refinement: it will be recomputed next run)")
+
+    if districts:
+        render_district_reports(workers=workers)
+        print("\n🏁 SUCCESS! District reports generated.")
+        return
+
+    start = time.perf_counter()
+    render_report(model, stream=stream, parallel=parallel, workers=workers)
+    print(f"\n🏁 SUCCESS! Complete report generated (rendered in {time.perf_counter() - start:.2f}s).")
 
 if __name__ == "__main__":
-    generate_report()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate the Shiksha Chaupal DOCX report.")
+    parser.add_argument('--refresh', action='store_true', help="Recompute the report model even if the inputs are unchanged")
+    parser.add_argument('--stream', action='store_true', help="Stream the document body to disk while rendering (constant memory for very large reports)")
+    parser.add_argument('--districts', action='store_true', help=f"Write one report per district into {DISTRICT_REPORT_DIR}/ instead of the state report")
+    parser.add_argument('--parallel', action='store_true', help="Render the report sections in worker processes and merge them")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes for --districts / --parallel (default: one per CPU)")
+    args = parser.parse_args()
+    generate_report(refresh=args.refresh, stream=args.stream, districts=args.districts, parallel=args.parallel, workers=args.workers)
@@ -1,95 +1,113 @@
 import pandas as pd
 import numpy as np
 import os
-import re
-
-def clean_theme_name(text):
-    """Cleans theme names, handling combined themes and empty values."""
-    if pd.isna(text) or str(text).strip() == "" or str(text).lower() == "nan":
-        return "Other Factors"
-    text = str(text).strip()
-    if '+' in text:
-        text = text.split('+')[0].strip()
-    text = re.sub(r'^\d+[\.\)\s-]*', '', text).strip()
-    return text
-
-def generate_validation_reports():
-    print("🚀 Starting Validation Report Generation...")
+import json
+import time
+import shutil
+import argparse
+from urllib.parse import quote
+from rules import RULES, stamp_output
+from dataset_snapshot import load_dataset
+from data_quality import QUALITY_RULES, applicable_rules, quality_bitmap, violation_counts, issue_names, quality_summary, print_summary
 
-    # 1. Load Data
-    print("   📂 Loading datasets...")
-    try:
-        df_raw = pd.read_csv('cleaned_data.csv')
-        chal_exploded = pd.read_csv('exploded_challenges.csv')
-        sol_exploded = pd.read_csv('exploded_solutions.csv')
-        chal_map = pd.read_csv('challenge_mapping.csv')
-        sol_map = pd.read_csv('solution_mapping.csv')
-    except Exception as e:
-        print(f"❌ Error: Required CSV files missing. {e}")
-        return
+def join_by_id(ids, texts, sep):
+    """
+    sep-joined texts per id, keeping row order within an id; index = distinct ids, ascending.
+    One stable sort by id, then each id's texts are a contiguous run between boundary offsets.
+    """
+    order = np.argsort(ids, kind='stable')
+    ids, texts = ids[order], texts[order].tolist()
+    starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else np.array([], dtype=np.intp)
+    ends = np.r_[starts[1:], len(ids)]
+    return pd.Series([sep.join(texts[s:e]) for s, e in zip(starts, ends)], index=ids[starts], dtype=object)
 
-    # 2. Prepare Mappings
-    print("   ⚙️  Preparing mappings...")
-    chal_map['Theme'] = chal_map['Theme'].apply(clean_theme_name)
-    sol_map['Theme'] = sol_map['Theme'].apply(clean_theme_name)
+def present_codes(values):
+    """
+    Factorized column: codes, and the text of each distinct value. Cells that are missing or
+    empty once converted to text get code -1, so they drop out of the joins.
+    """
+    codes, uniques = pd.factorize(values)
+    texts = np.array([str(u) for u in uniques], dtype=object)
+    codes = np.where(np.append(texts != '', False)[codes], codes, -1)
+    return codes, texts
 
-    # 3. Merge Mappings to Exploded Data
-    # Challenges
-    df_c = chal_exploded.merge(chal_map, left_on='Challenges', right_on='Original', how='left')
-    df_c['Theme'] = df_c['Theme'].fillna("Other Factors")
-    
-    # Solutions
-    df_s = sol_exploded.merge(sol_map, left_on='Solutions', right_on='Original', how='left')
-    df_s['Theme'] = df_s['Theme'].fillna("Other Factors")
+def aggregate_statements(df, text_col):
+    """
+    Per-Chaupal statement Count (non-empty text_col), Listed concepts (" | ", row order) and the sorted
+    set of Themes (", "). Same result as groupby('id').agg with per-group Python callables, without them.
+    """
+    df = df[df['id'].notna()]
+    ids = df['id'].to_numpy()
+    counts = df[text_col].notna().groupby(df['id'], observed=True).sum()
 
+    codes, concepts = present_codes(df['Merged_Concept'])
+    listed = join_by_id(ids[codes >= 0], concepts[codes[codes >= 0]], " | ")
+
+    # Distinct (id, theme) pairs in theme order within each id, found on integer codes; ranking the
+    # distinct themes with a sort of Python strings gives the same order as sorted()
+    codes, themes = present_codes(df['Theme'])
+    keep = codes >= 0
+    by_rank = np.argsort(themes, kind='stable')
+    rank = np.empty(len(themes), dtype=np.int64)
+    rank[by_rank] = np.arange(len(themes))
+    pair_ids, pair_ranks = ids[keep], rank[codes[keep]]
+    order = np.lexsort((pair_ranks, pair_ids))
+    pair_ids, pair_ranks = pair_ids[order], pair_ranks[order]
+    first = np.r_[True, (pair_ids[1:] != pair_ids[:-1]) | (pair_ranks[1:] != pair_ranks[:-1])] if len(order) else np.array([], dtype=bool)
+    theme_sets = join_by_id(pair_ids[first], themes[by_rank][pair_ranks[first]], ", ")
+
+    # Chaupals whose statements have no listed concept or theme get an empty string, as before
+    return pd.DataFrame({
+        'Count': counts.astype(int),
+        'Listed': listed.reindex(counts.index, fill_value=''),
+        'Themes': theme_sets.reindex(counts.index, fill_value=''),
+    })
+
+REPORT_FILE = 'Chaupal_Validation_Report.csv'
+QUALITY_SUMMARY_FILE = 'Data_Quality_Summary.csv'
+PARTITION_DIR = 'Chaupal_Validation_Report'
+PARTITION_INDEX = 'index.json'
+MISSING_DISTRICT_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+
+# Select and Reorder columns for readability
+REPORT_COLUMNS = [
+    'id', 'District', 'Block', 'Village', 
+    'Participant Count', 'Men', 'Women', 'Children',
+    'Men_%', 'Women_%', 'Children_%',
+    'Challenge_Count', 'Challenge_Themes_Identified', 'All_Challenges_Listed',
+    'Solution_Count', 'Solution_Themes_Identified', 'All_Solutions_Listed',
+    'Data_Quality_Flags', 'Data_Quality_Issues'
+]
+
+def chaupal_rows(df_raw, df_c, df_s):
+    """Final report rows for a set of Chaupals and their exploded challenges and solutions."""
     # 4. Aggregate at Chaupal Level
-    print("   📊 Aggregating data at Chaupal level...")
-    
     # Group Challenges by ID (assuming 'id' in exploded matches 'id' in raw)
     # Note: Check if 'id' exists in exploded files. Usually exploded files inherit the ID.
     # Let's verify column names in a moment, but assuming standard structure:
-    
-    # Helper to aggregate themes and texts
-    def agg_texts(series):
-        return " | ".join([str(x) for x in series if pd.notna(x) and str(x) != ""])
-    
-    def agg_unique_themes(series):
-        return ", ".join(sorted(list(set([str(x) for x in series if pd.notna(x) and str(x) != ""]))))
 
     # Challenges Aggregation
-    chal_agg = df_c.groupby('id').agg({
-        'Challenges': 'count',
-        'Merged_Concept': agg_texts,
-        'Theme': agg_unique_themes
-    }).rename(columns={
-        'Challenges': 'Challenge_Count',
-        'Merged_Concept': 'All_Challenges_Listed',
-        'Theme': 'Challenge_Themes_Identified'
+    chal_agg = aggregate_statements(df_c, 'Challenges').rename(columns={
+        'Count': 'Challenge_Count',
+        'Listed': 'All_Challenges_Listed',
+        'Themes': 'Challenge_Themes_Identified'
     })
 
     # Solutions Aggregation
-    sol_agg = df_s.groupby('id').agg({
-        'Solutions': 'count',
-        'Merged_Concept': agg_texts,
-        'Theme': agg_unique_themes
-    }).rename(columns={
-        'Solutions': 'Solution_Count',
-        'Merged_Concept': 'All_Solutions_Listed',
-        'Theme': 'Solution_Themes_Identified'
+    sol_agg = aggregate_statements(df_s, 'Solutions').rename(columns={
+        'Count': 'Solution_Count',
+        'Listed': 'All_Solutions_Listed',
+        'Themes': 'Solution_Themes_Identified'
     })
 
     # 5. Merge with Raw Chaupal Data
-    print("   🔗 Merging with Chaupal demographics...")
-    
-    # Ensure numeric columns
-    numeric_cols = ['Participant Count', 'Men', 'Women', 'Children']
-    for col in numeric_cols:
-        df_raw[col] = pd.to_numeric(df_raw[col], errors='coerce').fillna(0)
-
-    # Calculate Percentages
-    df_raw['Men_%'] = (df_raw['Men'] / df_raw['Participant Count'] * 100).round(1)
-    df_raw['Women_%'] = (df_raw['Women'] / df_raw['Participant Count'] * 100).round(1)
-    df_raw['Children_%'] = (df_raw['Children'] / df_raw['Participant Count'] * 100).round(1)
+    # Participant counts are already numeric in the snapshot
+    # Calculate Percentages (left empty for Chaupals without participants rather than dividing by zero)
+    df_raw = df_raw.copy()
+    participants = df_raw['Participant Count'].where(df_raw['Participant Count'] > 0)
+    df_raw['Men_%'] = (df_raw['Men'] / participants * 100).round(1)
+    df_raw['Women_%'] = (df_raw['Women'] / participants * 100).round(1)
+    df_raw['Children_%'] = (df_raw['Children'] / participants * 100).round(1)
 
     # Merge
     master_df = df_raw.merge(chal_agg, on='id', how='left')
@@ -103,27 +121,129 @@ def generate_validation_reports():
     master_df['All_Solutions_Listed'] = master_df['All_Solutions_Listed'].fillna("")
     master_df['Solution_Themes_Identified'] = master_df['Solution_Themes_Identified'].fillna("None")
 
+    # Data-quality rule violations: bitmap (bit i = QUALITY_RULES[i]) and the violated rule names
+    flags, _ = quality_bitmap(master_df)
+    master_df['Data_Quality_Flags'] = flags
+    master_df['Data_Quality_Issues'] = issue_names(flags)
+
+    # Only keep columns that exist
+    return master_df[[c for c in REPORT_COLUMNS if c in master_df.columns]]
+
+def checked_rules(df_raw):
+    """Data-quality rules that apply to report rows built from df_raw."""
+    return applicable_rules(list(df_raw.columns) + ['Challenge_Count', 'Solution_Count'])
+
+def partition_name(district):
+    """Hive-style partition directory for a district value."""
+    if pd.isna(district):
+        return f"District={MISSING_DISTRICT_PARTITION}"
+    return f"District={quote(str(district), safe=' ')}"
+
+def statement_positions(positions_by_id, ids):
+    """Row positions of the statements of the given Chaupal ids, from groupby(...).indices."""
+    parts = [positions_by_id[i] for i in ids if i in positions_by_id]
+    return np.concatenate(parts) if parts else np.array([], dtype=np.intp)
+
+def write_partitions(df_raw, df_c, df_s, output_dir=PARTITION_DIR):
+    """
+    Writes the report as one CSV per district (output_dir/District=<name>/part.csv), each written
+    as soon as its rows are final, plus an index of the partitions stamped with the rule set. The
+    inputs are held in memory whole; only the aggregated report rows are built one district at a
+    time. Row order and values within a district match the single-file report.
+    """
+    tmp_dir = f"{output_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    # Statement row positions per Chaupal id, computed once for all districts
+    chal_rows = df_c.groupby('id', sort=False, observed=True).indices
+    sol_rows = df_s.groupby('id', sort=False, observed=True).indices
+
+    partitions, columns = [], None
+    violations = np.zeros(len(QUALITY_RULES), dtype=np.int64)
+    # Plain values: .indices of a Categorical key leaves out the missing-District group
+    for district, raw_rows in df_raw.groupby(df_raw['District'].astype(object), sort=True, dropna=False).indices.items():
+        start = time.perf_counter()
+        df_raw_d = df_raw.iloc[raw_rows]
+        ids = df_raw_d['id'].dropna().unique()
+        rows = chaupal_rows(df_raw_d, df_c.iloc[statement_positions(chal_rows, ids)], df_s.iloc[statement_positions(sol_rows, ids)])
+        columns = list(rows.columns)
+        counts = violation_counts(rows['Data_Quality_Flags'].to_numpy(dtype=np.uint32))
+        violations += counts
+
+        name = partition_name(district)
+        os.makedirs(os.path.join(tmp_dir, name))
+        path = os.path.join(name, 'part.csv')
+        rows.to_csv(os.path.join(tmp_dir, path), index=False)
+        partitions.append({
+            'district': None if pd.isna(district) else str(district),
+            'path': path,
+            'rows': int(len(rows)),
+            'challenges': int(rows['Challenge_Count'].sum()),
+            'solutions': int(rows['Solution_Count'].sum()),
+            'bytes': os.path.getsize(os.path.join(tmp_dir, path)),
+            'quality_violations': {name: int(n) for (name, _, _), n in zip(QUALITY_RULES, counts) if n},
+        })
+        print(f"      🧩 {name}: {len(rows):,} Chaupals ({time.perf_counter() - start:.2f}s)")
+
+    written = sum(p['rows'] for p in partitions)
+    if written != len(df_raw):
+        raise ValueError(f"Partitions hold {written:,} Chaupals but the data has {len(df_raw):,}; nothing was replaced.")
+
+    index = {
+        'format': 'csv',
+        'partition_by': 'District',
+        'columns': columns or [],
+        'generated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'rules_hash': RULES.hash,
+        'partitions': partitions,
+    }
+    with open(os.path.join(tmp_dir, PARTITION_INDEX), 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, ensure_ascii=False)
+    stamp_output(os.path.join(tmp_dir, PARTITION_INDEX))
+    summary = quality_summary(violations, sum(p['rows'] for p in partitions), checked_rules(df_raw))
+    summary.to_csv(os.path.join(tmp_dir, QUALITY_SUMMARY_FILE), index=False)
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    return index, summary
+
+def generate_validation_reports(partitioned=False):
+    print("🚀 Starting Validation Report Generation...")
+
+    # 1-3. Load Data: exploded statements joined to their theme-cleaned mappings, shared with the DOCX report
+    frames = load_dataset()
+    if frames is None:
+        return
+    df_raw, df_c, df_s = frames['raw'], frames['challenges'], frames['solutions']
+
+    if partitioned:
+        print(f"   🗂️  Writing one partition per district into {PARTITION_DIR}/ ...")
+        index, summary = write_partitions(df_raw, df_c, df_s)
+        print_summary(summary)
+        print("\n✅ Validation Report Generated Successfully!")
+        print(f"   Partitions: {len(index['partitions'])} (index: {os.path.join(PARTITION_DIR, PARTITION_INDEX)})")
+        return
+
+    print("   📊 Aggregating data at Chaupal level...")
+    master_df = chaupal_rows(df_raw, df_c, df_s)
+
     # 6. Export
-    output_file = 'Chaupal_Validation_Report.csv'
+    output_file = REPORT_FILE
     print(f"   💾 Saving {output_file}...")
-    
-    # Select and Reorder columns for readability
-    cols = [
-        'id', 'District', 'Block', 'Village', 
-        'Participant Count', 'Men', 'Women', 'Children',
-        'Men_%', 'Women_%', 'Children_%',
-        'Challenge_Count', 'Challenge_Themes_Identified', 'All_Challenges_Listed',
-        'Solution_Count', 'Solution_Themes_Identified', 'All_Solutions_Listed'
-    ]
-    
-    # Only keep columns that exist
-    final_cols = [c for c in cols if c in master_df.columns]
-    
-    master_df[final_cols].to_csv(output_file, index=False)
+    master_df.to_csv(output_file, index=False)
+    stamp_output(output_file)
+
+    summary = quality_summary(violation_counts(master_df['Data_Quality_Flags'].to_numpy(dtype=np.uint32)), len(master_df), checked_rules(df_raw))
+    summary.to_csv(QUALITY_SUMMARY_FILE, index=False)
+    print_summary(summary)
     
     print("\n✅ Validation Report Generated Successfully!")
     print(f"   File: {output_file}")
-    print("   Columns included: ID, Location, Demographics (Counts & %), Themes, and Full Text.")
+    print("   Columns included: ID, Location, Demographics (Counts & %), Themes, Full Text and Data Quality Flags.")
 
 if __name__ == "__main__":
-    generate_validation_reports()
+    parser = argparse.ArgumentParser(description="Generate the Chaupal-level validation report.")
+    parser.add_argument('--partitioned', action='store_true', help=f"Write one CSV per district into {PARTITION_DIR}/District=<name>/ with an index, instead of a single CSV")
+    args = parser.parse_args()
+    generate_validation_reports(partitioned=args.partitioned)
@@ -0,0 +1,146 @@
+"""
+Aggregate cube for the report engine.
+
+Counts every exploded statement once over (Statement_Type, District, Theme, Merged_Concept, Category),
+where Category is the Environment of a challenge or the Agency of a solution, and sums participants
+per District. Report sections read their numbers from here instead of re-scanning row-level data.
+
+The saved cube is stamped with a digest of the exact column values it was built from (after AI
+refinement and classification), so a later run reuses it only when those values are unchanged.
+"""
+
+import os
+import hashlib
+import pandas as pd
+from pipeline_cache import load_cached, save_cached
+
+CUBE_DIR = 'report_cube'
+CUBE_VERSION = 1 # Bump when the cube layout changes
+CUBE_DIMENSIONS = ['Statement_Type', 'District', 'Theme', 'Merged_Concept', 'Category']
+# Columns of each build_cube argument the cube is computed from
+CUBE_SOURCES = [
+    ['District', 'id', 'Participant Count', 'Men', 'Women', 'Children', 'Others'],
+    ['District', 'Theme', 'Merged_Concept', 'Environment'],
+    ['District', 'Theme', 'Merged_Concept', 'Agency'],
+    ['District'],
+    ['District'],
+    ['Merged_Concept'],
+    ['Merged_Concept'],
+]
+
+def plain_columns(df):
+    """Categorical columns (as the dataset snapshot returns them) turned back into plain values. Returns df."""
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(df[col].cat.categories.dtype)
+    return df
+
+def build_statement_cube(df_c, df_s):
+    """Counts challenges (by Environment) and solutions (by Agency) over all cube dimensions."""
+    chal = df_c[['District', 'Theme', 'Merged_Concept', 'Environment']].rename(columns={'Environment': 'Category'})
+    sol = df_s[['District', 'Theme', 'Merged_Concept', 'Agency']].rename(columns={'Agency': 'Category'})
+    statements = pd.concat([chal.assign(Statement_Type='Challenge'), sol.assign(Statement_Type='Solution')], ignore_index=True)
+    # sort=False keeps groups in order of first appearance, so rankings built from the cube
+    # break ties exactly like value_counts() on the row-level data did
+    return plain_columns(statements.groupby(CUBE_DIMENSIONS, sort=False, dropna=False, observed=True).size().reset_index(name='Count'))
+
+def build_district_cube(df_raw, chal_exploded, sol_exploded):
+    """Per-district Chaupal counts, participant sums and exploded statement counts (NaN district kept)."""
+    districts = df_raw.groupby('District', dropna=False, observed=True).agg(
+        Rows=('District', 'size'),
+        Chaupals=('id', 'count'),
+        Unique_Chaupals=('id', 'nunique'),
+        Participants=('Participant Count', 'sum'),
+        Men=('Men', 'sum'),
+        Women=('Women', 'sum'),
+        Children=('Children', 'sum'),
+        Others=('Others', 'sum'),
+    ).reset_index()
+    plain_columns(districts)
+    # Left as NaN where a district has no statements, so callers can choose inner or zero-filled joins
+    districts['Challenge_Statements'] = districts['District'].map(chal_exploded.groupby('District', observed=True).size())
+    districts['Solution_Statements'] = districts['District'].map(sol_exploded.groupby('District', observed=True).size())
+    return districts
+
+def build_cube(df_raw, df_c, df_s, chal_exploded, sol_exploded, chal_map, sol_map):
+    """Builds the full cube: statement counts, district totals and dataset-level counts."""
+    return {
+        'statements': build_statement_cube(df_c, df_s),
+        'districts': build_district_cube(df_raw, chal_exploded, sol_exploded),
+        'meta': {
+            'chaupals': int(len(df_raw)),
+            'challenge_statements': int(len(chal_exploded)),
+            'solution_statements': int(len(sol_exploded)),
+            'unique_challenge_concepts': int(chal_map['Merged_Concept'].nunique()),
+            'unique_solution_concepts': int(sol_map['Merged_Concept'].nunique()),
+        },
+    }
+
+def cube_key(*frames):
+    """Digest of the CUBE_SOURCES columns of the build_cube arguments, row order included."""
+    h = hashlib.sha256(str(CUBE_VERSION).encode('ascii'))
+    for frame, cols in zip(frames, CUBE_SOURCES):
+        h.update(str(len(frame)).encode('ascii'))
+        h.update(pd.util.hash_pandas_object(frame[cols], index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+def save_cube(cube, key, path=CUBE_DIR):
+    """Persists the cube as two CSVs plus a JSON of dataset-level counts stamped with key."""
+    os.makedirs(path, exist_ok=True)
+    meta_path = os.path.join(path, 'meta.json')
+    # The stamp goes last: an interrupted save leaves no cube that looks valid
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    cube['statements'].to_csv(os.path.join(path, 'statements.csv'), index=False)
+    cube['districts'].to_csv(os.path.join(path, 'districts.csv'), index=False)
+    save_cached(meta_path, key, cube['meta'])
+
+def load_cube(key, path=CUBE_DIR):
+    """
+    Persisted cube if it was saved under key, else None. Dimension columns stay strings, and only
+    empty cells read back as NaN.
+    """
+    meta = load_cached(os.path.join(path, 'meta.json'), key)
+    if meta is None:
+        return None
+    text_cols = {c: str for c in CUBE_DIMENSIONS}
+    try:
+        statements = pd.read_csv(os.path.join(path, 'statements.csv'), dtype=text_cols, keep_default_na=False, na_values=[''])
+        districts = pd.read_csv(os.path.join(path, 'districts.csv'), dtype={'District': str}, keep_default_na=False, na_values=[''])
+    except (OSError, ValueError):
+        return None
+    return {'statements': statements, 'districts': districts, 'meta': meta}
+
+def statement_slice(cube, statement_type, **filters):
+    """Cube rows of one statement type, optionally filtered by dimension values (e.g. Theme=...)."""
+    rows = cube['statements']
+    mask = rows['Statement_Type'] == statement_type
+    for col, value in filters.items():
+        mask &= rows[col] == value
+    return rows[mask]
+
+def value_counts_from(rows, column, normalize=False):
+    """Equivalent of value_counts() on the underlying statements, computed from cube rows."""
+    counts = rows.groupby(column, sort=False)['Count'].sum().sort_values(ascending=False, kind='stable')
+    counts.index.name = None
+    if normalize:
+        counts = counts / counts.sum()
+    return counts
+
+def ranked_counts(rows, keys, column, k=None, weight=None):
+    """
+    Value counts of a column within every key group, computed in one pass.
+    Ordered like value_counts() (count desc, ties by first appearance). Returns { key: [(value, count), ...] }.
+    With weight, sums that column (e.g. the cube's Count) instead of counting rows.
+    """
+    key_cols = [keys] if isinstance(keys, str) else list(keys)
+    grouped = rows.groupby(key_cols + [column], sort=False)
+    counts = (grouped[weight].sum() if weight else grouped.size()).reset_index(name='_n')
+    counts = counts.sort_values('_n', ascending=False, kind='stable')
+    if k is not None:
+        counts = counts.groupby(key_cols, sort=False).head(k)
+    ranked = {}
+    for row in counts.itertuples(index=False):
+        key = row[0] if len(key_cols) == 1 else tuple(row[:len(key_cols)])
+        ranked.setdefault(key, []).append((row[-2], row[-1]))
+    return ranked
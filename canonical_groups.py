@@ -0,0 +1,372 @@
+"""
+Candidate generation for the analyzer's canonical statement grouping.
+
+create_canonical_groups walks statements longest first and pulls every later, still ungrouped
+statement whose semantic_similarity to the current one reaches the threshold into its group.
+Scoring every pair is quadratic. Here each statement is only scored against likely matches:
+
+- MinHash-LSH over character 5-grams: statements whose signatures agree on all rows of at least one
+  band land in a common bucket. Near-identical texts (the ones SequenceMatcher scores high) collide
+  with high probability; unrelated texts almost never do.
+- Synonym buckets: semantic_similarity scores any two statements that both use a word of the same
+  synonym set at least 0.75, however different their characters, so those are always candidates.
+
+Candidates are scored with the real similarity in the original order, so groups keep the greedy,
+longest-first semantics. The only difference from the exact algorithm is a pair that reaches the
+threshold but shares no bucket.
+
+Scoring works on StatementFeatures computed once per statement (normalized text, word set, synonym
+bitmask, length, character bit masks). similar() answers "similarity >= threshold" and tries cheap
+upper bounds of SequenceMatcher.ratio() first, so a pair failing one cannot reach the threshold:
+
+- length ratio, 2 * min(len) / (len1 + len2), as in SequenceMatcher.real_quick_ratio();
+- longest common subsequence ratio. SequenceMatcher's matching blocks form a common subsequence of
+  the two texts, so 2 * LCS / (len1 + len2) is never below ratio(). The LCS length is computed
+  bit-parallel, one big-integer step per character.
+
+SequenceMatcher only runs for pairs that pass both. similarity() returns the same values as the
+analyzer's semantic_similarity.
+"""
+
+import time
+import heapq
+import argparse
+from difflib import SequenceMatcher
+import numpy as np
+
+# Words that make two statements count as similar in semantic_similarity
+SYNONYM_SETS = (
+    frozenset({'poor', 'poverty', 'financial', 'economic', 'money', 'hardship'}),
+    frozenset({'far', 'distance', 'away', 'distant', 'reach'}),
+    frozenset({'aadhaar', 'aadhar', 'document', 'certificate', 'id'}),
+)
+
+SYNONYM_SCORE = 0.75 # similarity floor for two statements sharing a synonym set
+
+class StatementFeatures:
+    """Per-statement inputs of the similarity, computed once: normalized text, words, synonym bitmask, length, character bit masks."""
+    __slots__ = ('text', 'words', 'synonyms', 'length', 'masks')
+
+    def __init__(self, text):
+        self.text = text.lower().strip()
+        self.words = frozenset(self.text.split())
+        self.synonyms = sum(1 << s for s, synonyms in enumerate(SYNONYM_SETS) if self.words & synonyms)
+        self.length = len(self.text)
+        self.masks = None # character -> bit mask of its positions, built on first use by the LCS bound
+
+    def char_masks(self):
+        if self.masks is None:
+            self.masks = {}
+            for i, ch in enumerate(self.text):
+                self.masks[ch] = self.masks.get(ch, 0) | (1 << i)
+        return self.masks
+
+def lcs_length(f1, text2):
+    """Length of the longest common subsequence of f1.text and text2 (bit-parallel, Allison-Dix / Hyyro)."""
+    masks = f1.char_masks()
+    full = (1 << f1.length) - 1
+    v = full
+    for ch in text2:
+        u = v & masks.get(ch, 0)
+        v = ((v + u) | (v - u)) & full
+    return f1.length - v.bit_count()
+
+def similarity(f1, f2):
+    """semantic_similarity on precomputed features: SequenceMatcher ratio, raised to 0.75 for a shared synonym set."""
+    if f1.text == f2.text:
+        return 1.0
+    ratio = SequenceMatcher(None, f1.text, f2.text).ratio()
+    return max(ratio, SYNONYM_SCORE) if f1.synonyms & f2.synonyms else ratio
+
+def similar(f1, f2, threshold):
+    """similarity(f1, f2) >= threshold, computing SequenceMatcher only when no cheaper test decides it."""
+    if f1.text == f2.text:
+        return 1.0 >= threshold
+    if f1.synonyms & f2.synonyms and SYNONYM_SCORE >= threshold:
+        return True
+    total = f1.length + f2.length
+    # Upper bounds of the ratio: length ratio (real_quick_ratio), then longest common subsequence
+    if 2.0 * min(f1.length, f2.length) / total < threshold:
+        return False
+    if 2.0 * lcs_length(f1, f2.text) / total < threshold:
+        return False
+    return SequenceMatcher(None, f1.text, f2.text).ratio() >= threshold
+
+# Sets with more statements than this are grouped via LSH candidates instead of comparing every pair
+EXACT_GROUPING_LIMIT = 2000
+
+LSH_BANDS = 24
+LSH_ROWS = 4
+SHINGLE_SIZE = 5
+_PRIME = np.uint64((1 << 31) - 1)
+
+def _permutations(count, seed=1):
+    """Coefficients of the universal hashes (a * x + b) mod p that stand in for random permutations."""
+    rng = np.random.default_rng(seed)
+    return (rng.integers(1, int(_PRIME), count, dtype=np.uint64),
+            rng.integers(0, int(_PRIME), count, dtype=np.uint64))
+
+def minhash_signatures(texts, bands=LSH_BANDS, rows=LSH_ROWS, k=SHINGLE_SIZE, chunk=20000):
+    """
+    (len(texts), bands * rows) MinHash signatures over the byte k-grams of each lowercased, stripped
+    text. All texts of a chunk are shingled and hashed together with array operations.
+    """
+    a, b = _permutations(bands * rows)
+    signatures = np.empty((len(texts), bands * rows), dtype=np.uint32)
+    for lo in range(0, len(texts), chunk):
+        encoded = [t.lower().strip().encode('utf-8').ljust(k) for t in texts[lo:lo + chunk]]
+        data = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+        lengths = np.fromiter((len(e) for e in encoded), dtype=np.int64, count=len(encoded))
+        ends = np.cumsum(lengths)
+        # k-gram at every position, then drop the ones that would run into the next text
+        codes = data[:len(data) - k + 1].copy()
+        for offset in range(1, k):
+            codes = (codes << np.uint64(8)) | data[offset:len(data) - k + 1 + offset]
+        valid = np.ones(len(codes), dtype=bool)
+        for offset in range(1, k):
+            valid[ends[:-1] - offset] = False
+        codes = codes[valid]
+        starts = np.r_[0, np.cumsum(lengths - k + 1)[:-1]]
+        for p in range(bands * rows):
+            signatures[lo:lo + len(encoded), p] = np.minimum.reduceat((a[p] * codes + b[p]) % _PRIME, starts)
+    return signatures
+
+def band_keys(signatures, bands=LSH_BANDS, rows=LSH_ROWS):
+    """(bands, n) uint64 keys: one hash of each band's signature rows, equal for items sharing that band's bucket."""
+    keys = np.empty((bands, len(signatures)), dtype=np.uint64)
+    for band in range(bands):
+        key = signatures[:, band * rows].astype(np.uint64)
+        for r in range(1, rows):
+            key = key * np.uint64(0x9E3779B97F4A7C15) + signatures[:, band * rows + r]
+        keys[band] = key
+    return keys
+
+def band_buckets(signatures, bands=LSH_BANDS, rows=LSH_ROWS):
+    """(bands, n) bucket ids: items whose signature rows agree within a band share that band's bucket."""
+    keys = band_keys(signatures, bands, rows)
+    buckets = np.empty(keys.shape, dtype=np.int32)
+    for band in range(bands):
+        buckets[band] = np.unique(keys[band], return_inverse=True)[1].reshape(-1)
+    return buckets
+
+def synonym_buckets(texts):
+    """Per synonym set, the positions of the texts using one of its words (split like semantic_similarity)."""
+    members = [[] for _ in SYNONYM_SETS]
+    for i, text in enumerate(texts):
+        words = set(text.lower().strip().split())
+        for s, synonyms in enumerate(SYNONYM_SETS):
+            if words & synonyms:
+                members[s].append(i)
+    return [np.array(m, dtype=np.int64) for m in members]
+
+class CandidateIndex:
+    """
+    Shared-bucket lookup over texts. Each band's buckets are stored as one array of positions
+    sorted by bucket (plus offsets), so looking up a text's bucket-mates is a few array slices.
+    """
+    def __init__(self, texts, bands=LSH_BANDS, rows=LSH_ROWS):
+        self.bucket = band_buckets(minhash_signatures(texts, bands, rows), bands, rows)
+        self.order, self.offsets = [], []
+        for per_band in self.bucket:
+            self.order.append(np.argsort(per_band, kind='stable').astype(np.int32))
+            self.offsets.append(np.r_[0, np.cumsum(np.bincount(per_band))])
+        self.synonym_members = synonym_buckets(texts)
+        in_set = np.zeros((len(SYNONYM_SETS), len(texts)), dtype=bool)
+        for s, members in enumerate(self.synonym_members):
+            in_set[s, members] = True
+        self.in_synonym_set = in_set
+
+    def candidates(self, i, used):
+        """Ungrouped positions after i sharing an LSH or synonym bucket with it, ascending."""
+        found = []
+        for band, per_band in enumerate(self.bucket):
+            b = per_band[i]
+            lo, hi = self.offsets[band][b], self.offsets[band][b + 1]
+            if hi - lo > 1:
+                found.append(self.order[band][lo:hi])
+        for s, members in enumerate(self.synonym_members):
+            if self.in_synonym_set[s, i]:
+                found.append(members)
+        if not found:
+            return []
+        found = np.unique(np.concatenate(found))
+        found = found[found > i]
+        return found[~used[found]].tolist()
+
+def greedy_groups(texts, threshold, candidates=None):
+    """
+    Longest-first greedy grouping over texts already sorted by length (descending): each ungrouped
+    text starts a group and takes every later ungrouped text whose similarity to it is >= threshold.
+    candidates(i, used) restricts the texts scored; None scores all of them (the exact algorithm).
+    Returns the groups as lists of positions, members in order.
+    """
+    features = [StatementFeatures(t) for t in texts]
+    used = np.zeros(len(texts), dtype=bool)
+    groups = []
+    for i in range(len(texts)):
+        if used[i]:
+            continue
+        used[i] = True
+        group = [i]
+        head = features[i]
+        later = candidates(i, used) if candidates else [j for j in range(i + 1, len(texts)) if not used[j]]
+        for j in later:
+            if similar(head, features[j], threshold):
+                group.append(j)
+                used[j] = True
+        groups.append(group)
+    return groups
+
+def lsh_groups(texts, threshold, bands=LSH_BANDS, rows=LSH_ROWS):
+    """
+    greedy_groups with candidates from a CandidateIndex. The similarity only depends on
+    text.lower().strip(), so texts equal after that always land in the same group: only the first
+    of them is indexed and grouped, and the rest join its group.
+    """
+    keys = [t.lower().strip() for t in texts]
+    first = {}
+    rep_of = np.fromiter((first.setdefault(k, i) for i, k in enumerate(keys)), dtype=np.int64, count=len(keys))
+    reps = np.flatnonzero(rep_of == np.arange(len(keys)))
+    rep_texts = [texts[i] for i in reps]
+    rep_groups = greedy_groups(rep_texts, threshold, CandidateIndex(rep_texts, bands, rows).candidates) if len(reps) else []
+
+    # Expand representatives back to every position holding their text, in position order
+    group_of_rep = np.empty(len(reps), dtype=np.int64)
+    for g, members in enumerate(rep_groups):
+        group_of_rep[members] = g
+    group_of = group_of_rep[np.searchsorted(reps, rep_of)]
+    order = np.argsort(group_of, kind='stable')
+    bounds = np.r_[0, np.cumsum(np.bincount(group_of, minlength=len(rep_groups)))]
+    return [order[bounds[g]:bounds[g + 1]].tolist() for g in range(len(rep_groups))]
+
+def group_statements(texts, threshold):
+    """Member groups of texts sorted longest first: exact pairwise up to EXACT_GROUPING_LIMIT texts, else LSH candidates."""
+    return greedy_groups(texts, threshold) if len(texts) <= EXACT_GROUPING_LIMIT else lsh_groups(texts, threshold)
+
+# --- SHARDING ---
+
+def candidate_components(texts, bands=LSH_BANDS, rows=LSH_ROWS):
+    """
+    Component label per text (its smallest position) in the graph linking texts that share an LSH
+    bucket or a synonym set. lsh_groups only ever scores pairs linked this way, so no group spans
+    two components. Labels are spread by min-propagation over each bucket until they settle. Texts
+    equal after lower().strip() share every bucket, so each distinct text is hashed once.
+    """
+    first = {}
+    distinct_of = np.fromiter((first.setdefault(t.lower().strip(), i) for i, t in enumerate(texts)), dtype=np.int64, count=len(texts))
+    reps = np.fromiter(first.values(), dtype=np.int64, count=len(first)) # first position of each distinct text, ascending
+    distinct_of = np.searchsorted(reps, distinct_of)
+    texts = [texts[i] for i in reps]
+
+    n = len(texts)
+    links = [] # (positions sorted by bucket, bucket starts) per bucket family
+    for per_band in band_buckets(minhash_signatures(texts, bands, rows), bands, rows):
+        shared = np.flatnonzero(np.bincount(per_band)[per_band] > 1)
+        if len(shared):
+            members = shared[np.argsort(per_band[shared], kind='stable')]
+            starts = np.flatnonzero(np.r_[True, np.diff(per_band[members]) != 0])
+            links.append((members, starts))
+    for members in synonym_buckets(texts):
+        if len(members) > 1:
+            links.append((members, np.array([0])))
+
+    labels = np.arange(n)
+    changed = True
+    while changed:
+        previous = labels.copy()
+        for members, starts in links:
+            lowest = np.minimum.reduceat(labels[members], starts)
+            sizes = np.diff(np.r_[starts, len(members)])
+            labels[members] = np.minimum(labels[members], np.repeat(lowest, sizes))
+        labels = labels[labels] # labels point at positions of the same component; jump to theirs
+        changed = not np.array_equal(labels, previous)
+    return reps[labels[distinct_of]]
+
+def shard_positions(texts, shards, bands=LSH_BANDS, rows=LSH_ROWS):
+    """
+    Positions of texts split into at most `shards` ascending lists of whole candidate components,
+    balanced by size: largest component first, each onto the lightest shard. Deterministic.
+    """
+    labels = candidate_components(texts, bands, rows)
+    roots, sizes = np.unique(labels, return_counts=True)
+    lightest = [(0, k) for k in range(shards)] # heap of (statements, shard)
+    shard_of_root = np.empty(len(roots), dtype=np.int64)
+    for r in np.lexsort((roots, -sizes)):
+        load, k = heapq.heappop(lightest)
+        shard_of_root[r] = k
+        heapq.heappush(lightest, (load + int(sizes[r]), k))
+    shard_of = shard_of_root[np.searchsorted(roots, labels)]
+    return [p for p in (np.flatnonzero(shard_of == k) for k in range(shards)) if len(p)]
+
+def group_shard(task):
+    """Member groups for one (texts, threshold, exact) job; runs in a worker process."""
+    texts, threshold, exact = task
+    return greedy_groups(texts, threshold) if exact else lsh_groups(texts, threshold)
+
+# --- BENCHMARK ---
+
+def synthetic_statements(n, seed=0):
+    """
+    Chaupal-style statements: about n / 20 base statements of 10-18 words, each repeated with small
+    edits (words dropped, inserted or re-cased). A few bases use words of the synonym sets.
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = ('children girls boys parents students families teachers mothers fathers village school classes books '
+                  'uniform fees scholarship meal toilet water road bridge river fields work migrate marriage early age '
+                  'attend absent drop out admission teaching learning quality building rooms benches library computer '
+                  'awareness interest value support help government panchayat officer ward member anganwadi health '
+                  'transport bicycle rain flood season harvest labour wage brick kiln city tola community caste fear '
+                  'safety distance late time exam result english maths science private coaching tuition mobile phone').split()
+    # Place names, people and local terms: transliterated-looking words from syllables
+    syllables = ['ra', 'ma', 'pur', 'ga', 'ya', 'sa', 'ran', 'ka', 'mur', 'pa', 'tna', 'si', 'wan', 'ba', 'har', 'de', 'vi', 'la', 'ni', 'sh']
+    vocabulary += sorted({''.join(rng.choice(syllables, rng.integers(2, 4))) for _ in range(3000)})
+    synonyms = [sorted(s) for s in SYNONYM_SETS]
+    bases = []
+    for _ in range(max(50, n // 20)):
+        words = list(rng.choice(vocabulary, rng.integers(10, 19)))
+        if rng.random() < 0.1: # roughly 10% of bases carry a synonym-set word
+            group = synonyms[rng.integers(len(synonyms))]
+            words[rng.integers(len(words))] = group[rng.integers(len(group))]
+        bases.append(words)
+    fillers = ['very', 'often', 'mostly', 'also', 'still', 'really']
+    statements = []
+    for _ in range(n):
+        words = list(bases[rng.integers(len(bases))])
+        for _ in range(rng.integers(0, 3)):
+            edit = rng.integers(3)
+            pos = rng.integers(len(words))
+            if edit == 0 and len(words) > 10:
+                del words[pos]
+            elif edit == 1:
+                words.insert(pos, fillers[rng.integers(len(fillers))])
+            else:
+                words[pos] = words[pos].capitalize()
+        statements.append(' '.join(words))
+    return statements
+
+def agreement(exact, approx):
+    """Share of statements that end up under the same canonical statement (group head) in both groupings."""
+    head = lambda groups: {i: g[0] for g in groups for i in g}
+    a, b = head(exact), head(approx)
+    return sum(a[i] == b[i] for i in a) / len(a) if a else 1.0
+
+def benchmark(sizes, exact_limit, threshold=0.65):
+    """Times LSH grouping on synthetic statements, and compares it with the exact algorithm up to exact_limit."""
+    for n in sizes:
+        texts = sorted(synthetic_statements(n), key=len, reverse=True)
+        start = time.perf_counter()
+        approx = lsh_groups(texts, threshold)
+        lsh_time = time.perf_counter() - start
+        line = f"   {n:>9,} statements: LSH {lsh_time:8.2f}s, {len(approx):,} groups"
+        if n <= exact_limit:
+            start = time.perf_counter()
+            exact = greedy_groups(texts, threshold)
+            line += f" | exact {time.perf_counter() - start:8.2f}s, {len(exact):,} groups, agreement {agreement(exact, approx) * 100:.2f}%"
+        print(line, flush=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark LSH candidate grouping against the exact pairwise algorithm.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--exact-limit', type=int, default=10000, help="Largest size also grouped with the exact algorithm")
+    args = parser.parse_args()
+    benchmark(args.sizes, args.exact_limit)
@@ -0,0 +1,158 @@
+"""
+Persistent canonical-group index: new statements join the existing groups instead of regrouping
+the whole history on every run.
+
+create_canonical_groups rebuilds every group from scratch. Here the groups of each (statement type,
+theme) are kept in canonical_index.json together with what is needed to match against them: the
+LSH band keys and synonym sets of each group's canonical statement. absorb() takes a batch of new
+statements, longest first. Each statement joins the first group, in creation order, whose canonical
+statement reaches the similarity threshold, or else founds a new group. Counts and variants are
+updated in place. On an empty index this is the same greedy, longest-first grouping as
+create_canonical_groups, since in both a statement starts a group exactly when no earlier canonical
+statement takes it. Canonical statements of existing groups never change, so a long statement
+arriving later joins an older, shorter group rather than taking it over.
+
+Like create_canonical_groups, a partition of at most EXACT_GROUPING_LIMIT statements scores every
+group; a larger one only scores the groups sharing an LSH band or a synonym set with the statement.
+A statement whose text is already a variant of a group joins that group without scoring. Every
+absorbed occurrence (report id, text) is remembered, so feeding the same reports again leaves the
+index unchanged. A daily run on a cumulative export therefore only costs time for the new
+statements.
+
+The index is keyed by the rule set, the threshold and the LSH settings. Changing any of them starts
+a fresh index.
+"""
+
+import hashlib
+from collections import Counter
+from pipeline_cache import fingerprint, load_cached, save_cached
+from rules import RULES
+from canonical_groups import (EXACT_GROUPING_LIMIT, LSH_BANDS, LSH_ROWS, SYNONYM_SETS, StatementFeatures,
+                              similar, minhash_signatures, band_keys)
+
+CANONICAL_INDEX_FILE = 'canonical_index.json'
+INDEX_VERSION = 1 # Bump when the stored groups change shape
+GROUP_FIELDS = ['theme', 'district', 'environment', 'agency_type'] # copied from a group's first statement
+
+def occurrence_key(kind, report_id, text, ordinal):
+    """Short digest identifying the ordinal-th occurrence of text in a report."""
+    raw = f"{kind}\x1f{report_id}\x1f{ordinal}\x1f{text}".encode('utf-8')
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+class Partition:
+    """Groups of one (statement type, theme), with their band-key and synonym lookups."""
+    def __init__(self, groups=()):
+        self.groups = []
+        self.heads = [] # StatementFeatures of each canonical statement
+        self.buckets = [{} for _ in range(LSH_BANDS)] # per band: key -> group ids
+        self.synonym_members = [[] for _ in SYNONYM_SETS]
+        self.variant_of = {} # normalized variant text -> group id
+        self.statements = 0
+        for group in groups:
+            self.statements += group['count']
+            self._register(group)
+            for variant in group['variants']:
+                self.variant_of.setdefault(variant.lower().strip(), len(self.groups) - 1)
+
+    def _register(self, group):
+        gid = len(self.groups)
+        self.groups.append(group)
+        head = StatementFeatures(group['text'])
+        self.heads.append(head)
+        for band, key in enumerate(group['bands']):
+            self.buckets[band].setdefault(key, []).append(gid)
+        for s in range(len(SYNONYM_SETS)):
+            if head.synonyms & (1 << s):
+                self.synonym_members[s].append(gid)
+        return gid
+
+    def candidates(self, features, keys, exact):
+        """Group ids that may take a statement, in creation order: all of them if exact."""
+        if exact:
+            return range(len(self.groups))
+        found = set()
+        for band, key in enumerate(keys):
+            found.update(self.buckets[band].get(key, ()))
+        for s, members in enumerate(self.synonym_members):
+            if features.synonyms & (1 << s):
+                found.update(members)
+        return sorted(found)
+
+    def add(self, item, keys, threshold, exact=False):
+        """Puts one statement into its group, founding one if needed. True if a new group was created."""
+        features = StatementFeatures(item['text'])
+        self.statements += 1
+        gid = self.variant_of.get(features.text)
+        if gid is None:
+            gid = next((g for g in self.candidates(features, keys, exact) if similar(self.heads[g], features, threshold)), None)
+        if gid is None:
+            group = {'text': item['text'], 'count': 1, 'variants': [item['text']],
+                     **{field: item.get(field, '') for field in GROUP_FIELDS}, 'bands': keys}
+            self.variant_of[features.text] = self._register(group)
+            return True
+        group = self.groups[gid]
+        group['count'] += 1
+        group['variants'].append(item['text'])
+        self.variant_of.setdefault(features.text, gid)
+        return False
+
+class CanonicalIndex:
+    def __init__(self, path=CANONICAL_INDEX_FILE, threshold=0.65, partitions=None, seen=()):
+        """partitions: 'kind|theme' -> stored group list; seen: occurrence keys already absorbed."""
+        self.path = path
+        self.threshold = threshold
+        self.key = fingerprint([], INDEX_VERSION, RULES.hash, threshold, LSH_BANDS, LSH_ROWS)
+        self.partitions = {name: Partition(groups) for name, groups in (partitions or {}).items()}
+        self.seen = set(seen)
+
+    @classmethod
+    def load(cls, path=CANONICAL_INDEX_FILE, threshold=0.65):
+        """Index saved at path for these settings, or an empty one."""
+        index = cls(path, threshold)
+        payload = load_cached(path, index.key)
+        if payload is None:
+            return index
+        return cls(path, threshold, payload['partitions'], payload['seen'])
+
+    def save(self):
+        payload = {
+            'partitions': {name: part.groups for name, part in self.partitions.items()},
+            'seen': sorted(self.seen),
+        }
+        save_cached(self.path, self.key, payload)
+
+    def absorb(self, kind, items):
+        """
+        Adds statements of one type ('challenges' / 'solutions') to their theme's groups. items are
+        dicts with 'text', 'theme', 'report_id' and the other GROUP_FIELDS. Occurrences absorbed
+        before are skipped. Returns (statements absorbed, groups created).
+        """
+        ordinals = Counter()
+        fresh = []
+        for item in items:
+            ordinal_key = (item['report_id'], item['text'])
+            key = occurrence_key(kind, item['report_id'], item['text'], ordinals[ordinal_key])
+            ordinals[ordinal_key] += 1
+            if key not in self.seen:
+                self.seen.add(key)
+                fresh.append(item)
+
+        by_partition = {}
+        for item in fresh:
+            by_partition.setdefault(f"{kind}|{item.get('theme', '')}", []).append(item)
+
+        created = 0
+        for name, batch in by_partition.items():
+            batch = sorted(batch, key=lambda x: len(x['text']), reverse=True)
+            keys = band_keys(minhash_signatures([item['text'] for item in batch])).T.tolist()
+            part = self.partitions.setdefault(name, Partition())
+            exact = part.statements + len(batch) <= EXACT_GROUPING_LIMIT
+            for item, item_keys in zip(batch, keys):
+                created += part.add(item, item_keys, self.threshold, exact)
+        return len(fresh), created
+
+    def canonical_groups(self, kind):
+        """Groups of one statement type, theme by theme, as create_canonical_groups returns them."""
+        return [{k: v for k, v in group.items() if k != 'bands'}
+                for name, part in self.partitions.items() if name.split('|', 1)[0] == kind
+                for group in part.groups]
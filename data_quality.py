@@ -0,0 +1,111 @@
+"""
+Declarative data-quality checks for Chaupal records.
+
+Each rule is a name, a description and a condition built from a few column-wise primitives
+(missing, equals, negative, exceeds). Conditions compile to boolean masks over whole columns, so a
+million rows are checked in one vectorized pass instead of row by row. Every rule owns a fixed bit
+(its position in QUALITY_RULES); a row's violations are packed into one integer bitmap. Rules whose
+columns are absent from a frame are skipped and reported as not checked.
+
+Rules only look at one row at a time, so checking a slice of a frame (e.g. one district) flags the
+same rows as checking the whole frame.
+"""
+
+import numpy as np
+import pandas as pd
+
+COUNT_COLUMNS = ['Participant Count', 'Men', 'Women', 'Children']
+
+# --- CONDITIONS: (columns used, mask builder) ---
+
+def _blank(series):
+    """Missing, or empty once stripped; evaluated per distinct value."""
+    codes, uniques = pd.factorize(series)
+    blank = np.array([str(u).strip() == '' for u in uniques] + [True], dtype=bool)
+    return blank[codes]
+
+def _number(series):
+    return pd.to_numeric(series, errors='coerce').to_numpy(dtype=float)
+
+def missing(col):
+    """Value is missing or blank."""
+    return [col], lambda df: _blank(df[col])
+
+def equals(col, value):
+    """Numeric value equals value."""
+    return [col], lambda df: _number(df[col]) == value
+
+def negative(cols):
+    """Any of the numeric columns is below zero."""
+    return list(cols), lambda df: np.logical_or.reduce([_number(df[c]) < 0 for c in cols])
+
+def exceeds(parts, total):
+    """The numeric parts add up to more than the total."""
+    return list(parts) + [total], lambda df: np.nansum([_number(df[c]) for c in parts], axis=0) > _number(df[total])
+
+# --- RULES: (name, description, condition); the position in the list is the rule's bit ---
+
+QUALITY_RULES = [
+    ('missing_district', "District is missing", missing('District')),
+    ('missing_location', "User Location is missing", missing('User Location')),
+    ('missing_date', "Date of Discussion is missing", missing('Date of Discussion')),
+    ('zero_participants', "Participant Count is 0", equals('Participant Count', 0)),
+    ('negative_counts', "A participant count is negative", negative(COUNT_COLUMNS)),
+    ('parts_exceed_total', "Men + Women + Children exceed the Participant Count", exceeds(['Men', 'Women', 'Children'], 'Participant Count')),
+    ('no_challenges', "No challenge statements", equals('Challenge_Count', 0)),
+    ('no_solutions', "No solution statements", equals('Solution_Count', 0)),
+]
+
+def applicable_rules(columns, rules=QUALITY_RULES):
+    """Names of the rules whose columns are all present."""
+    return [name for name, _, (used, _) in rules if all(c in columns for c in used)]
+
+def quality_bitmap(df, rules=QUALITY_RULES):
+    """
+    Per-row violation bitmap (uint32, bit i = rules[i] violated) and the names of the rules that
+    could be checked on this frame.
+    """
+    bitmap = np.zeros(len(df), dtype=np.uint32)
+    checked = applicable_rules(df.columns, rules)
+    for bit, (name, _, (_, mask)) in enumerate(rules):
+        if name in checked:
+            bitmap |= np.asarray(mask(df), dtype=bool).astype(np.uint32) << np.uint32(bit)
+    return bitmap, checked
+
+def violation_counts(bitmap, rules=QUALITY_RULES):
+    """Number of rows violating each rule, in rule order."""
+    return np.array([int(np.count_nonzero(bitmap & np.uint32(1 << bit))) for bit in range(len(rules))], dtype=np.int64)
+
+def issue_names(bitmap, rules=QUALITY_RULES, sep="; "):
+    """Names of the violated rules per row ("" when clean); decoded once per distinct bitmap value."""
+    values, codes = np.unique(bitmap, return_inverse=True)
+    names = np.array([sep.join(name for bit, (name, _, _) in enumerate(rules) if v & (1 << bit)) for v in values] + [''], dtype=object)
+    return names[codes.reshape(-1)] if len(bitmap) else names[:0]
+
+def quality_summary(counts, rows, checked, rules=QUALITY_RULES):
+    """Per-rule summary: bit, description, whether it was checked, violations and their share of rows."""
+    return pd.DataFrame({
+        'Rule': [name for name, _, _ in rules],
+        'Bit': range(len(rules)),
+        'Description': [description for _, description, _ in rules],
+        'Checked': [name in checked for name, _, _ in rules],
+        'Violations': counts,
+        'Percent': np.round(counts / rows * 100, 1) if rows else 0.0,
+    })
+
+def check_quality(df, rules=QUALITY_RULES):
+    """Violation bitmap and per-rule summary for a frame, in one pass over its columns."""
+    bitmap, checked = quality_bitmap(df, rules)
+    return bitmap, quality_summary(violation_counts(bitmap, rules), len(df), checked, rules)
+
+def print_summary(summary):
+    """Prints the rules that were checked, with their violation counts."""
+    print("   🩺 Data quality:")
+    for row in summary[summary['Checked']].itertuples():
+        mark = "⚠️ " if row.Violations else "✅"
+        print(f"      {mark} {row.Description}: {row.Violations:,} ({row.Percent}%)")
+
+if __name__ == "__main__":
+    df = pd.read_csv('cleaned_data.csv')
+    bitmap, summary = check_quality(df)
+    print_summary(summary)
@@ -0,0 +1,184 @@
+"""
+Shared, pre-joined dataset snapshot for the report and validation stages.
+
+Both stages need the same inputs: the cleaned Chaupal data and the exploded challenges and solutions
+joined to their AI mappings, with themes cleaned and participant counts made numeric. This module
+builds those frames once and writes them to dataset_snapshot/ as one .npy file per column. Numeric
+columns are stored as is. Text columns are dictionary-encoded: int32 codes plus their distinct
+values, in sorted order where they sort, as a JSON list (a pickled array if any value is not a
+string, so numbers and dates keep their type). Later runs memory-map the arrays and open text columns
+as pandas Categoricals over the stored codes, so opening the snapshot costs little more than reading
+the distinct values. The snapshot is keyed by a fingerprint of the input files and the rule
+set and is rebuilt only when one of them changes.
+
+Run this file directly to (re)build the snapshot as a pipeline stage of its own.
+"""
+
+import os
+import re
+import json
+import time
+import shutil
+import argparse
+import numpy as np
+import pandas as pd
+from pipeline_cache import fingerprint
+from rules import RULES, check_stamps
+from statement_dictionary import StatementDictionary, join_mapping
+
+SNAPSHOT_DIR = 'dataset_snapshot'
+SNAPSHOT_INPUTS = ['cleaned_data.csv', 'exploded_challenges.csv', 'exploded_solutions.csv', 'challenge_mapping.csv', 'solution_mapping.csv']
+SNAPSHOT_VERSION = 3 # Bump when the prepared frames change
+COUNT_COLUMNS = ['Participant Count', 'Men', 'Women', 'Children']
+
+def clean_theme_name(text):
+    """Cleans theme names, handling combined themes and empty values."""
+    if pd.isna(text) or str(text).strip() == "" or str(text).lower() == "nan":
+        return RULES.fallback_theme
+
+    text = str(text).strip()
+
+    # Handle combined themes (e.g., "Theme A + Theme B") - Take the first one
+    if '+' in text:
+        text = text.split('+')[0].strip()
+
+    # Remove leading numbers/bullets (e.g., "1. Poverty")
+    text = re.sub(r'^\d+[\.\)\s-]*', '', text).strip()
+
+    return text
+
+def clean_theme_names(themes):
+    """clean_theme_name over a column, evaluated once per distinct value."""
+    cleaned = {t: clean_theme_name(t) for t in themes.dropna().unique()}
+    return themes.map(cleaned).fillna(RULES.fallback_theme).astype(str)
+
+# --- BUILD ---
+
+def build_frames():
+    """Loads the five input CSVs and prepares raw / challenges / solutions / mappings. None if inputs are missing."""
+    try:
+        df_raw = pd.read_csv('cleaned_data.csv')
+        chal_exploded = pd.read_csv('exploded_challenges.csv')
+        sol_exploded = pd.read_csv('exploded_solutions.csv')
+        chal_map = pd.read_csv('challenge_mapping.csv')
+        sol_map = pd.read_csv('solution_mapping.csv')
+    except Exception as e:
+        print(f"❌ Error: Required CSV files missing. {e}")
+        return None
+    check_stamps(['challenge_mapping.csv', 'solution_mapping.csv'])
+
+    for col in COUNT_COLUMNS:
+        if col in df_raw.columns:
+            df_raw[col] = pd.to_numeric(df_raw[col], errors='coerce').fillna(0)
+
+    chal_map['Theme'] = clean_theme_names(chal_map['Theme'])
+    sol_map['Theme'] = clean_theme_names(sol_map['Theme'])
+
+    # Unmapped statements keep a missing Theme from the join; they belong to the fallback theme
+    statements = StatementDictionary.load()
+    df_c = join_mapping(chal_exploded, 'Challenges', chal_map, statements)
+    df_s = join_mapping(sol_exploded, 'Solutions', sol_map, statements)
+    statements.save()
+    df_c['Theme'] = df_c['Theme'].fillna(RULES.fallback_theme).astype(str)
+    df_s['Theme'] = df_s['Theme'].fillna(RULES.fallback_theme).astype(str)
+
+    return {'raw': df_raw, 'challenges': df_c, 'solutions': df_s, 'challenge_map': chal_map, 'solution_map': sol_map}
+
+# --- STORAGE ---
+
+def _factorize(series):
+    """Codes and distinct values, sorted so Categorical order matches value order where possible."""
+    try:
+        return pd.factorize(series, sort=True)
+    except TypeError:
+        return pd.factorize(series)
+
+def _write_frame(df, path):
+    """One .npy per column; text columns as int32 codes plus their distinct values. Returns the schema."""
+    os.makedirs(path)
+    columns = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        entry = {'name': col, 'dtype': str(series.dtype)}
+        if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            entry['kind'] = 'numeric'
+            np.save(os.path.join(path, f"{i}.npy"), series.to_numpy())
+        else:
+            entry['kind'] = 'text'
+            codes, uniques = _factorize(series)
+            np.save(os.path.join(path, f"{i}.npy"), codes.astype(np.int32))
+            if all(isinstance(u, str) for u in uniques):
+                entry['values'] = 'json'
+                with open(os.path.join(path, f"{i}.json"), 'w', encoding='utf-8') as f:
+                    json.dump(list(uniques), f, ensure_ascii=False)
+            else:
+                entry['values'] = 'pickle'
+                np.save(os.path.join(path, f"{i}.values.npy"), np.asarray(uniques, dtype=object), allow_pickle=True)
+        columns.append(entry)
+    return {'rows': int(len(df)), 'columns': columns}
+
+def _read_frame(path, schema):
+    """Frame from memory-mapped column files; text columns become Categoricals over their codes."""
+    data = {}
+    for i, entry in enumerate(schema['columns']):
+        values = np.load(os.path.join(path, f"{i}.npy"), mmap_mode='r')
+        if entry['kind'] == 'numeric':
+            data[entry['name']] = pd.Series(values, dtype=entry['dtype'], copy=False)
+        else:
+            if entry['values'] == 'json':
+                with open(os.path.join(path, f"{i}.json"), encoding='utf-8') as f:
+                    uniques = json.load(f)
+            else:
+                uniques = np.load(os.path.join(path, f"{i}.values.npy"), allow_pickle=True)
+            # Code -1 is a missing value, as in factorize
+            data[entry['name']] = pd.Series(pd.Categorical.from_codes(values, categories=pd.Index(uniques)))
+    return pd.DataFrame(data, index=pd.RangeIndex(schema['rows']))
+
+def write_snapshot(frames, key, path=SNAPSHOT_DIR):
+    """Writes all frames into a fresh directory, then swaps it in place of the old snapshot."""
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    meta = {'key': key, 'frames': {name: _write_frame(df, os.path.join(tmp_path, name)) for name, df in frames.items()}}
+    with open(os.path.join(tmp_path, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+
+def read_snapshot(key, path=SNAPSHOT_DIR):
+    """Frames of the snapshot at path if it was built for key, else None."""
+    try:
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('key') != key:
+        return None
+    return {name: _read_frame(os.path.join(path, name), schema) for name, schema in meta['frames'].items()}
+
+def load_dataset(refresh=False, path=SNAPSHOT_DIR):
+    """
+    Prepared frames { raw, challenges, solutions, challenge_map, solution_map }, from the snapshot
+    when the inputs are unchanged, else rebuilt from the CSVs and snapshotted. Text columns are
+    Categoricals either way, since a fresh build is read back from its snapshot. None if inputs are missing.
+    """
+    start = time.perf_counter()
+    key = fingerprint(SNAPSHOT_INPUTS, SNAPSHOT_VERSION, RULES.hash)
+    frames = None if refresh else read_snapshot(key, path)
+    if frames is not None:
+        print(f"   📦 Dataset snapshot reused ({path}/, opened in {time.perf_counter() - start:.3f}s)")
+        return frames
+
+    print("   📂 Loading datasets...")
+    frames = build_frames()
+    if frames is None:
+        return None
+    write_snapshot(frames, key, path)
+    print(f"   📦 Dataset snapshot built ({path}/, {time.perf_counter() - start:.2f}s)")
+    return read_snapshot(key, path)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the shared, pre-joined dataset snapshot used by the report stages.")
+    parser.add_argument('--refresh', action='store_true', help="Rebuild even if the inputs are unchanged")
+    args = parser.parse_args()
+    load_dataset(refresh=args.refresh)
@@ -0,0 +1,147 @@
+"""
+Cached, indexed district resolution for free-text User Location values.
+
+DistrictResolver gives the same answer as the analyzer's 8-stage extract_district_ultra_aggressive
+with much less work per value:
+
+- Results are cached per lowercased, stripped location. User Location values repeat heavily, so on
+  a large file most rows are a dictionary lookup.
+- Stages 2, 5 and 6 are substring tests against fixed strings: the aliases, their 4-character
+  prefixes and the district headquarters. All three lists are compiled into one Aho-Corasick
+  automaton, so one pass over the location finds every hit. Each stage then takes its first hit in
+  the original list order, as the loops did.
+- Stages 3 and 4 (comma-separated parts, single words) look up pieces of the location. Every piece
+  is a substring of the location, so any alias they could find is already found by stage 2. They
+  never decide anything and are skipped.
+- Stages 7 and 8 are difflib.get_close_matches against the aliases. A per-alias character count
+  matrix gives quick_ratio() for every alias in one array operation. quick_ratio() is an upper
+  bound of ratio(), so aliases below the cutoff are dropped before any SequenceMatcher runs. The
+  survivors are scored and ranked exactly as get_close_matches ranks them (ratio, then alias).
+"""
+
+import re
+from collections import Counter
+from difflib import SequenceMatcher
+import numpy as np
+import pandas as pd
+from rule_engine import KeywordAutomaton
+from rules import RULES
+
+OTHERS = 'Others'
+
+class DistrictResolver:
+    def __init__(self, mapping=None, headquarters=None):
+        """mapping: alias -> district, headquarters: town -> district; both in priority order."""
+        self.mapping = dict(RULES.district_aliases if mapping is None else mapping)
+        self.headquarters = dict(RULES.district_headquarters if headquarters is None else headquarters)
+        self.aliases = list(self.mapping)
+        towns = list(self.headquarters)
+
+        # One automaton over aliases (stage 2), alias prefixes (stage 5) and towns (stage 6).
+        # Per pattern and stage, the first list position it stands for.
+        patterns, first = {}, {}
+        def add(pattern, stage, position):
+            pid = patterns.setdefault(pattern, len(patterns))
+            first.setdefault((stage, pid), position)
+        for a, alias in enumerate(self.aliases):
+            add(alias, 'alias', a)
+            if len(alias) >= 4:
+                add(alias[:4], 'prefix', a)
+        for t, town in enumerate(towns):
+            add(town, 'town', t)
+        self.automaton = KeywordAutomaton(list(patterns))
+        self.first_alias = {pid: a for (stage, pid), a in first.items() if stage == 'alias'}
+        self.first_prefix = {pid: a for (stage, pid), a in first.items() if stage == 'prefix'}
+        self.first_town = {pid: t for (stage, pid), t in first.items() if stage == 'town'}
+        self.towns = towns
+
+        # Stage 5, other direction: location[:4] inside an alias of 4+ characters.
+        # Every substring of up to 4 characters of such an alias -> first alias containing it.
+        self.inside_alias = {}
+        for a, alias in enumerate(self.aliases):
+            if len(alias) >= 4:
+                for size in range(1, 5):
+                    for i in range(len(alias) - size + 1):
+                        self.inside_alias.setdefault(alias[i:i + size], a)
+
+        # Character counts per alias for the quick_ratio() bound of stages 7 and 8
+        self.alphabet = {ch: i for i, ch in enumerate(sorted({ch for alias in self.aliases for ch in alias}))}
+        self.char_counts = np.zeros((len(self.aliases), len(self.alphabet)), dtype=np.int32)
+        for a, alias in enumerate(self.aliases):
+            for ch, count in Counter(alias).items():
+                self.char_counts[a, self.alphabet[ch]] = count
+        self.alias_lengths = np.array([len(alias) for alias in self.aliases], dtype=np.int64)
+        self.cache = {}
+
+    def close_match(self, text, cutoff):
+        """difflib.get_close_matches(text, aliases, n=1, cutoff=cutoff), or None."""
+        counts = np.zeros(len(self.alphabet), dtype=np.int32)
+        for ch, count in Counter(text).items():
+            if ch in self.alphabet:
+                counts[self.alphabet[ch]] = count
+        shared = np.minimum(self.char_counts, counts).sum(axis=1)
+        bound = 2.0 * shared / (self.alias_lengths + len(text))
+        best = None
+        for a in np.flatnonzero(bound >= cutoff):
+            alias = self.aliases[a]
+            score = SequenceMatcher(None, alias, text).ratio()
+            if score >= cutoff and (best is None or (score, alias) > best):
+                best = (score, alias)
+        return best[1] if best else None
+
+    def resolve_location(self, location):
+        """District for a non-empty, lowercased and stripped location."""
+        # STAGE 1: Exact match
+        if location in self.mapping:
+            return self.mapping[location]
+
+        hits = self.automaton.find(location)
+
+        # STAGE 2: Substring match (stages 3 and 4 only find what this finds)
+        found = [self.first_alias[pid] for pid in hits if pid in self.first_alias]
+        if found:
+            return self.mapping[self.aliases[min(found)]]
+
+        # STAGE 5: 4-character prefix of an alias in the location, or of the location in an alias
+        found = [self.first_prefix[pid] for pid in hits if pid in self.first_prefix]
+        if location[:4] in self.inside_alias:
+            found.append(self.inside_alias[location[:4]])
+        if found:
+            return self.mapping[self.aliases[min(found)]]
+
+        # STAGE 6: District headquarters / major towns
+        found = [self.first_town[pid] for pid in hits if pid in self.first_town]
+        if found:
+            return self.headquarters[self.towns[min(found)]]
+
+        # STAGE 7: Whole location by edit distance
+        match = self.close_match(location, 0.6)
+        if match:
+            return self.mapping[match]
+
+        # STAGE 8: Individual words by edit distance
+        for word in re.findall(r'\w+', location):
+            if len(word) >= 4:
+                match = self.close_match(word, 0.7)
+                if match:
+                    return self.mapping[match]
+
+        return OTHERS
+
+    def resolve(self, user_location):
+        """District for one User Location value, cached per normalized location."""
+        if pd.isna(user_location):
+            return OTHERS
+        location = str(user_location).strip().lower()
+        if not location:
+            return OTHERS
+        district = self.cache.get(location)
+        if district is None:
+            district = self.cache[location] = self.resolve_location(location)
+        return district
+
+    def resolve_many(self, values):
+        """resolve() over a column, evaluated once per distinct value."""
+        codes, uniques = pd.factorize(pd.Series(values))
+        districts = np.array([self.resolve(u) for u in uniques] + [OTHERS], dtype=object)
+        return pd.Series(districts[codes], index=getattr(values, 'index', None))
@@ -0,0 +1,82 @@
+"""
+Streaming DOCX writer.
+
+python-docx keeps the whole document tree in memory until save(). StreamingDocument is used in its
+place while rendering: content is still added through the normal python-docx API (add_heading,
+add_paragraph, add_table, ...) on a scratch document built from the default template, but every
+flush() serializes the finished body elements straight into word/document.xml inside the output
+zip and drops them from the tree. Peak memory is bounded by the largest unit between two flushes,
+not by the report size. Styles, numbering, section settings and every other package part come
+from the scratch document, so the output looks the same as a regular save().
+"""
+
+import io
+import re
+import zipfile
+from lxml import etree
+from docx import Document
+from docx.oxml.ns import qn
+
+DOCUMENT_PART = 'word/document.xml'
+SECTION_PROPERTIES = qn('w:sectPr')
+
+_XMLNS = re.compile(rb' xmlns:(\w+)="([^"]*)"')
+
+class StreamingDocument:
+    def __init__(self, path, template=None):
+        """Opens path for writing and starts word/document.xml. Call save() to finish the file."""
+        self._doc = Document(template)
+        self._body = self._doc.element.body
+        self._nsmap = {k.encode(): v.encode() for k, v in self._doc.element.nsmap.items()}
+        self._zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
+        self._stream = self._zip.open(DOCUMENT_PART, 'w', force_zip64=True)
+        self.elements_written = 0
+
+        # Root start tag with every namespace declared once, so body elements can omit them
+        root = self._doc.element
+        shell = etree.tostring(etree.Element(root.tag, attrib=dict(root.attrib), nsmap=root.nsmap))
+        self._stream.write(b"<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n")
+        self._stream.write(shell[:-2] + b'><w:body>')
+
+    def __getattr__(self, name):
+        # Everything else (add_paragraph, add_table, styles, ...) is the scratch document's
+        return getattr(self._doc, name)
+
+    def _serialize(self, element):
+        """Element XML without the namespace declarations already made on the root start tag."""
+        xml = etree.tostring(element, encoding='UTF-8', xml_declaration=False, with_tail=False)
+        end = xml.index(b'>')
+        start_tag = _XMLNS.sub(lambda m: b'' if self._nsmap.get(m.group(1)) == m.group(2) else m.group(0), xml[:end])
+        return start_tag + xml[end:]
+
+    def flush(self):
+        """Writes all finished body elements to the output and releases them."""
+        for element in list(self._body):
+            if element.tag == SECTION_PROPERTIES:
+                continue # Section settings close the body, written in save()
+            self._stream.write(self._serialize(element))
+            self._body.remove(element)
+            self.elements_written += 1
+
+    def save(self, path=None):
+        """Finishes word/document.xml and copies the remaining package parts. path is fixed at construction."""
+        self.flush()
+        sect_pr = self._body.sectPr
+        if sect_pr is not None:
+            self._stream.write(self._serialize(sect_pr))
+        self._stream.write(b'</w:body></w:document>')
+        self._stream.close()
+
+        # The scratch body is empty now, so saving it is cheap; take every part except the document
+        scratch = io.BytesIO()
+        self._doc.save(scratch)
+        with zipfile.ZipFile(scratch) as src:
+            for item in src.infolist():
+                if item.filename != DOCUMENT_PART:
+                    self._zip.writestr(item, src.read(item.filename), compress_type=zipfile.ZIP_DEFLATED)
+        self._zip.close()
+
+def flush_document(doc):
+    """Flushes a StreamingDocument; no-op for a regular in-memory Document."""
+    if isinstance(doc, StreamingDocument):
+        doc.flush()
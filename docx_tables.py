@@ -0,0 +1,70 @@
+"""
+Bulk table writer for python-docx documents.
+
+python-docx builds tables one cell at a time (add_row().cells, then .text per cell), which re-reads
+the grid for every row and gets very slow past a few thousand rows. Here the header row is still
+created through python-docx, so table styles resolve as usual, and all body rows are generated as
+one XML string and parsed in a single lxml pass. The resulting XML matches what per-cell
+assignment produces.
+"""
+
+from xml.sax.saxutils import escape
+from lxml import etree
+from docx.oxml.ns import nsdecls, qn
+from docx.oxml import OxmlElement
+
+def shade_cell(cell, fill_color):
+    """Background fill for one table cell (hex colour such as "D9D9D9")."""
+    shading_elm = OxmlElement('w:shd')
+    shading_elm.set(qn('w:fill'), fill_color)
+    cell._tc.get_or_add_tcPr().append(shading_elm)
+
+def _run_xml(text):
+    """A single run holding text, with line breaks and tabs written as python-docx does."""
+    if not text:
+        return '<w:r/>'
+    parts = []
+    for i, line in enumerate(text.split('\n')):
+        if i:
+            parts.append('<w:br/>')
+        for j, chunk in enumerate(line.split('\t')):
+            if j:
+                parts.append('<w:tab/>')
+            if chunk:
+                space = ' xml:space="preserve"' if chunk != chunk.strip() else ''
+                parts.append(f'<w:t{space}>{escape(chunk)}</w:t>')
+    return '<w:r>' + ''.join(parts) + '</w:r>'
+
+def append_rows(table, rows):
+    """Appends all rows (iterables of cell values, converted with str) to a table in one parse."""
+    tbl = table._tbl
+    widths = [col.get(qn('w:w')) for col in tbl.tblGrid.findall(qn('w:gridCol'))]
+    cell_props = [f'<w:tcPr><w:tcW w:type="dxa" w:w="{w}"/></w:tcPr>' if w is not None else '<w:tcPr/>' for w in widths]
+
+    chunks = []
+    for row in rows:
+        values = list(row)
+        chunks.append('<w:tr>')
+        for i, props in enumerate(cell_props):
+            # Short rows leave the remaining cells empty, like an untouched add_row() cell
+            paragraph = f'<w:p>{_run_xml(str(values[i]))}</w:p>' if i < len(values) else '<w:p/>'
+            chunks.append(f'<w:tc>{props}{paragraph}</w:tc>')
+        chunks.append('</w:tr>')
+
+    fragment = etree.fromstring(f'<w:tbl {nsdecls("w")}>' + ''.join(chunks) + '</w:tbl>')
+    tbl.extend(list(fragment))
+
+def add_bulk_table(doc, headers, rows, style='Table Grid', header_fill=None, header_bold=True):
+    """Adds a table with a (bold, optionally shaded) header row and all body rows written in bulk."""
+    table = doc.add_table(rows=1, cols=len(headers))
+    table.style = style
+
+    for cell, header in zip(table.rows[0].cells, headers):
+        cell.text = header
+        if header_bold:
+            cell.paragraphs[0].runs[0].font.bold = True
+        if header_fill:
+            shade_cell(cell, header_fill)
+
+    append_rows(table, rows)
+    return table
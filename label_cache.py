@@ -0,0 +1,54 @@
+"""
+Memoized rule-based labelling for text columns.
+
+Statement texts repeat heavily across Chaupals, so a column is labelled by running the classifier once
+per distinct normalized text and joining the labels back onto the rows. Labels persist per classifier
+under label_cache/, keyed by a hash of the classifier's rules, so later runs only classify texts they
+have not seen and start from scratch whenever the keyword lists (or the classifier itself) change.
+"""
+
+import os
+import json
+import hashlib
+import pandas as pd
+from pipeline_cache import load_cached, save_cached
+
+LABEL_CACHE_DIR = 'label_cache'
+
+def rule_set_hash(classifier, *rules):
+    """Hash of a classifier's keyword lists plus its compiled logic; changes whenever either does."""
+    h = hashlib.sha256()
+    h.update(classifier.__name__.encode('utf-8'))
+    h.update(classifier.__code__.co_code)
+    h.update(json.dumps(rules, sort_keys=True).encode('utf-8'))
+    return h.hexdigest()
+
+def normalized_keys(texts):
+    """The classifiers only ever see str(text).lower(), so equal keys always get equal labels."""
+    return texts.map(str).str.lower()
+
+def classify_column(texts, classifier, rules_hash, name=None, cache_dir=LABEL_CACHE_DIR, batch=None):
+    """
+    Labels every row of a text column, classifying each distinct normalized text only once.
+    Labels from earlier runs with the same rules_hash are reused; new ones are added to the cache.
+    batch, if given, labels a list of new keys in one call instead of classifier per key.
+    """
+    name = name or classifier.__name__
+    cache_path = os.path.join(cache_dir, f"{name}.json")
+    cached = load_cached(cache_path, rules_hash) or {}
+
+    keys = normalized_keys(texts)
+    unique_keys = keys.drop_duplicates()
+    new_keys = [k for k in unique_keys if k not in cached]
+    labels = dict(cached)
+    labels.update(zip(new_keys, batch(new_keys) if batch else [classifier(k) for k in new_keys]))
+
+    if new_keys:
+        os.makedirs(cache_dir, exist_ok=True)
+        save_cached(cache_path, rules_hash, labels)
+
+    print(f"   🏷️  {name}: {len(keys):,} rows -> {len(unique_keys):,} unique texts ({len(unique_keys) - len(new_keys):,} cached, {len(new_keys):,} classified)")
+
+    # Broadcast back to the rows with a hash join on the normalized text
+    label_table = pd.Series(labels, dtype=object)
+    return keys.map(label_table).rename(name)
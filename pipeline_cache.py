@@ -0,0 +1,52 @@
+"""
+On-disk cache helpers shared by the pipeline stages.
+
+Cached artifacts are JSON files stamped with a key derived from the content of their input files,
+so they are only reused while every input is byte-for-byte unchanged.
+"""
+
+import os
+import json
+import hashlib
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's content."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def fingerprint(paths, *extra):
+    """One key for a set of input files plus any extra version strings. Missing files hash as absent."""
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(path.encode('utf-8'))
+        h.update(file_digest(path).encode('ascii') if os.path.exists(path) else b'<missing>')
+    for value in extra:
+        h.update(str(value).encode('utf-8'))
+    return h.hexdigest()
+
+def _json_default(value):
+    """numpy scalars (counts and ratios straight out of pandas) serialize as plain Python numbers."""
+    if hasattr(value, 'item'):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def load_cached(path, key):
+    """Payload of a cached JSON file if it was written for this key, else None."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('key') != key:
+        return None
+    return data.get('payload')
+
+def save_cached(path, key, payload):
+    """Writes payload under key. Goes through a temp file so an interrupted run never leaves half a cache."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'key': key, 'payload': payload}, f, ensure_ascii=False, default=_json_default)
+    os.replace(tmp_path, path)
@@ -0,0 +1,204 @@
+"""
+Compiled keyword rule engine shared by the theme, environment and agency classifiers.
+
+Every rule classifier in the pipeline has the same shape: count which keywords of each category occur as
+substrings of the lowercased text, add contextual boosts, take the best-scoring category (first one on
+ties) and fall back through an ordered list of keyword checks when nothing scores. KeywordClassifier
+describes one such classifier declaratively. KeywordRuleEngine compiles the keyword lists of any number of
+classifiers into a single Aho-Corasick automaton, so one linear pass over a text finds every keyword of
+every list, instead of one `kw in text` scan per keyword.
+
+Hits are counted per list entry: a keyword that appears twice in a list counts twice, and a keyword shared
+by two lists counts for both, exactly like the `sum(... for kw in keywords if kw in text)` it replaces.
+"""
+
+from collections import deque
+import numpy as np
+
+class KeywordAutomaton:
+    def __init__(self, patterns):
+        """Aho-Corasick automaton over distinct, non-empty patterns; pattern ids follow list order."""
+        goto = [{}]
+        out = [[]]
+        for pid, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    out.append([])
+                    goto[state][ch] = nxt
+                state = nxt
+            out[state].append(pid)
+
+        # Breadth-first: failure links, inherited outputs, and a full transition table per state,
+        # so scanning never has to walk failure links
+        fail = [0] * len(goto)
+        delta = [None] * len(goto)
+        delta[0] = dict(goto[0])
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            for ch, nxt in goto[state].items():
+                fail[nxt] = delta[fail[state]].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+                queue.append(nxt)
+
+        self.patterns = list(patterns)
+        self._delta = delta
+        self._out = [tuple(o) for o in out]
+
+    def find(self, text):
+        """Ids of all patterns occurring anywhere in text, found in one pass."""
+        delta, out = self._delta, self._out
+        state = 0
+        found = set()
+        for ch in text:
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+class KeywordClassifier:
+    def __init__(self, categories, weight=1, boosts=None, fallbacks=(), default=None):
+        """
+        categories: { label: [keyword, ...] } in tie-break order; score = weight per keyword entry found.
+        boosts: { label: ([keyword, ...], bonus) } added once when any of the keywords is found.
+        fallbacks: [([keyword, ...], ..., label)] checked in order when no category scores; every keyword
+                   list of an entry must have a hit. default is returned when none applies.
+        """
+        self.categories = dict(categories)
+        self.labels = list(self.categories)
+        self.weight = weight
+        self.boosts = dict(boosts or {})
+        self.fallbacks = [(tuple(f[:-1]), f[-1]) for f in fallbacks]
+        self.default = default
+
+    def spec(self):
+        """Plain-data description of the classifier, for hashing rule sets."""
+        return {
+            'categories': self.categories,
+            'weight': self.weight,
+            'boosts': {label: [kws, bonus] for label, (kws, bonus) in self.boosts.items()},
+            'fallbacks': [[list(conditions), label] for conditions, label in self.fallbacks],
+            'default': self.default,
+        }
+
+    def keyword_groups(self):
+        """Every keyword list of this classifier, keyed by its role."""
+        groups = {('category', label): kws for label, kws in self.categories.items()}
+        groups.update({('boost', label): kws for label, (kws, _) in self.boosts.items()})
+        for i, (conditions, _) in enumerate(self.fallbacks):
+            groups.update({('fallback', i, j): kws for j, kws in enumerate(conditions)})
+        return groups
+
+    def decide(self, hits):
+        """Label from keyword-list hit counts (a mapping from keyword_groups() keys to counts)."""
+        scores = [self.weight * hits[('category', label)] for label in self.labels]
+        for label, (_, bonus) in self.boosts.items():
+            if hits[('boost', label)]:
+                scores[self.labels.index(label)] += bonus
+        best = max(scores)
+        if best > 0:
+            return self.labels[scores.index(best)]
+        for i, (conditions, label) in enumerate(self.fallbacks):
+            if all(hits[('fallback', i, j)] for j in range(len(conditions))):
+                return label
+        return self.default
+
+    def decide_matrix(self, hits):
+        """Vectorized decide(): hits maps keyword_groups() keys to count columns; returns an array of labels."""
+        scores = np.stack([self.weight * hits[('category', label)] for label in self.labels], axis=1)
+        for label, (_, bonus) in self.boosts.items():
+            scores[:, self.labels.index(label)] += bonus * (hits[('boost', label)] > 0)
+        # argmax returns the first maximum, matching max(scores, key=scores.get) on an ordered dict
+        labels = np.array(self.labels, dtype=object)[scores.argmax(axis=1)]
+        conditions = [np.logical_and.reduce([hits[('fallback', i, j)] > 0 for j in range(len(conds))])
+                      for i, (conds, _) in enumerate(self.fallbacks)]
+        fallback = np.select(conditions, [label for _, label in self.fallbacks], default=self.default) if conditions \
+            else np.full(len(labels), self.default, dtype=object)
+        return np.where(scores.max(axis=1) > 0, labels, fallback.astype(object))
+
+class KeywordRuleEngine:
+    def __init__(self, classifiers):
+        """Compiles the keyword lists of { name: KeywordClassifier } into one automaton."""
+        self.classifiers = dict(classifiers)
+        self.groups = [(name, key) for name, clf in self.classifiers.items() for key in clf.keyword_groups()]
+        self.group_index = {g: i for i, g in enumerate(self.groups)}
+
+        pattern_ids = {}
+        pattern_groups = []
+        for gi, (name, key) in enumerate(self.groups):
+            for kw in self.classifiers[name].keyword_groups()[key]:
+                pid = pattern_ids.setdefault(kw, len(pattern_ids))
+                if pid == len(pattern_groups):
+                    pattern_groups.append([])
+                pattern_groups[pid].append(gi)
+
+        self.automaton = KeywordAutomaton(list(pattern_ids))
+        self._pattern_groups = [tuple(g) for g in pattern_groups]
+        # Pattern x group incidence counts, for building score matrices in bulk
+        self._incidence = np.zeros((len(pattern_groups), len(self.groups)), dtype=np.int32)
+        for pid, gis in enumerate(pattern_groups):
+            for gi in gis:
+                self._incidence[pid, gi] += 1
+
+    def hit_counts(self, text):
+        """Number of keyword entries found in text for every keyword list, from a single scan."""
+        counts = [0] * len(self.groups)
+        for pid in self.automaton.find(text):
+            for gi in self._pattern_groups[pid]:
+                counts[gi] += 1
+        return counts
+
+    def category_hits(self, name, text):
+        """Per-category hit counts of one classifier, e.g. {'School': 2, 'Home': 0, 'Community': 1}."""
+        counts = self.hit_counts(text)
+        return {label: counts[self.group_index[(name, ('category', label))]] for label in self.classifiers[name].labels}
+
+    def classify(self, name, text):
+        """Label of one (already lowercased) text under the named classifier."""
+        counts = self.hit_counts(text)
+        return self.classifiers[name].decide(_GroupView(counts, self.group_index, name))
+
+    def classify_all(self, text):
+        """Labels under every classifier, sharing one scan of the text."""
+        counts = self.hit_counts(text)
+        return {name: clf.decide(_GroupView(counts, self.group_index, name)) for name, clf in self.classifiers.items()}
+
+    def score_matrix(self, texts):
+        """(n_texts x n_keyword_lists) int32 matrix of hit counts for a whole column of lowercased texts."""
+        rows, pids = [], []
+        n_texts = 0
+        for row, text in enumerate(texts):
+            found = self.automaton.find(text)
+            rows.extend([row] * len(found))
+            pids.extend(found)
+            n_texts = row + 1
+        matrix = np.zeros((n_texts, len(self.groups)), dtype=np.int32)
+        np.add.at(matrix, np.asarray(rows, dtype=np.intp), self._incidence[np.asarray(pids, dtype=np.intp)])
+        return matrix
+
+    def classify_matrix(self, matrix, names=None):
+        """Labels for every row of a score matrix under the named (default: all) classifiers: { name: array of labels }."""
+        return {
+            name: self.classifiers[name].decide_matrix({key: matrix[:, self.group_index[(name, key)]] for key in self.classifiers[name].keyword_groups()})
+            for name in (names or self.classifiers)
+        }
+
+    def classify_batch(self, texts, names=None):
+        """Labels a whole column of lowercased texts with one scan per text: { name: list of labels }."""
+        labels = self.classify_matrix(self.score_matrix(texts), names)
+        return {name: values.tolist() for name, values in labels.items()}
+
+class _GroupView:
+    """Read-only view of one classifier's keyword-list counts inside the engine-wide count vector."""
+    __slots__ = ('counts', 'index', 'name')
+
+    def __init__(self, counts, index, name):
+        self.counts, self.index, self.name = counts, index, name
+
+    def __getitem__(self, key):
+        return self.counts[self.index[(self.name, key)]]
@@ -0,0 +1,118 @@
+"""
+The pipeline's rule set: theme taxonomy, classifier keywords and district aliases.
+
+All rules live in rules_config.json and are loaded once per process into RULES, an immutable RuleSet
+shared by the AI tagger, the report processor, the validation report and the analyzer. The rule set
+is identified by a SHA-256 of its contents; stages record that hash next to their outputs (cache keys,
+label caches, manifests, .rules.json stamps) so anything derived from older rules is recomputed
+exactly when the rules change, and never otherwise.
+
+Classifier entries follow rule_engine.KeywordClassifier:
+    "weight": points per keyword found, "categories": { label: [keyword, ...] } in tie-break order,
+    "boosts": { label: {"keywords": [...], "bonus": n} },
+    "fallbacks": [ {"all_of": [[keyword, ...], ...], "label": ...} ] tried in order when nothing scores,
+    "default": label when no fallback applies.
+"""
+
+import os
+import json
+import hashlib
+from types import MappingProxyType
+from rule_engine import KeywordRuleEngine, KeywordClassifier
+
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules_config.json')
+
+def _freeze(value):
+    """Read-only deep copy: dicts become mapping proxies, lists become tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+class RuleSet:
+    def __init__(self, config, source=None):
+        """Immutable view of a parsed rules config; hash covers every rule (and their order)."""
+        canonical = json.dumps(config, ensure_ascii=False, separators=(',', ':'))
+        fields = {
+            'source': source,
+            'version': config['version'],
+            'hash': hashlib.sha256(canonical.encode('utf-8')).hexdigest(),
+            'fallback_theme': config['fallback_theme'],
+            'themes': _freeze(config['themes']),
+            'theme_names': tuple(t['name'] for t in config['themes']),
+            'classifiers': _freeze(config['classifiers']),
+            'district_aliases': _freeze(config['district_aliases']),
+            'district_headquarters': _freeze(config['district_headquarters']),
+            '_engines': {},
+        }
+        for name, value in fields.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RuleSet is read-only; edit rules_config.json instead")
+
+    def theme_knowledge_base(self, descriptions=True):
+        """Numbered theme list for AI prompts, with or without the one-line descriptions."""
+        lines = [f"{i}. {t['prompt_label']}: {t['description']}" if descriptions else f"{i}. {t['prompt_label']}"
+                 for i, t in enumerate(self.themes, 1)]
+        return '\n' + '\n'.join(lines) + '\n'
+
+    def classifier(self, name):
+        """KeywordClassifier for one classifier entry of the config."""
+        spec = self.classifiers[name]
+        return KeywordClassifier(
+            {label: list(kws) for label, kws in spec['categories'].items()},
+            weight=spec.get('weight', 1),
+            boosts={label: (list(b['keywords']), b['bonus']) for label, b in spec.get('boosts', {}).items()},
+            fallbacks=[tuple(list(kws) for kws in f['all_of']) + (f['label'],) for f in spec.get('fallbacks', ())],
+            default=spec['default'],
+        )
+
+    def classifier_hash(self, name):
+        """Hash of a single classifier's rules, for caches that only depend on that classifier."""
+        canonical = json.dumps(self.classifier(name).spec(), ensure_ascii=False, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def engine(self, **names):
+        """
+        One compiled KeywordRuleEngine over the given classifiers, e.g. engine(Agency='report_agency')
+        classifies with the config's 'report_agency' rules under the name 'Agency'. Compiled once per set of names.
+        """
+        key = tuple(sorted(names.items()))
+        if key not in self._engines:
+            self._engines[key] = KeywordRuleEngine({alias: self.classifier(name) for alias, name in names.items()})
+        return self._engines[key]
+
+def load_rules(path=RULES_FILE):
+    """Parses a rules config into a RuleSet."""
+    with open(path, encoding='utf-8') as f:
+        return RuleSet(json.load(f), source=path)
+
+def stamp_path(output_path):
+    return f"{output_path}.rules.json"
+
+def stamp_output(output_path, rules=None):
+    """Records which rule set produced an output file, next to it."""
+    rules = rules or RULES
+    with open(stamp_path(output_path), 'w', encoding='utf-8') as f:
+        json.dump({'output': os.path.basename(output_path), 'rules_version': rules.version, 'rules_hash': rules.hash}, f, indent=2)
+
+def stamped_hash(output_path):
+    """Rule-set hash an output was produced with, or None if it was never stamped."""
+    try:
+        with open(stamp_path(output_path), encoding='utf-8') as f:
+            return json.load(f).get('rules_hash')
+    except (OSError, ValueError):
+        return None
+
+def check_stamps(paths, rules=None):
+    """Warns about inputs produced under a different rule set; returns the paths that are stale."""
+    rules = rules or RULES
+    stale = [p for p in paths if stamped_hash(p) not in (None, rules.hash)]
+    for p in stale:
+        print(f"   ⚠️  {p} was produced with a different rule set (current: v{rules.version}, {rules.hash[:12]}); re-run the stage that writes it.")
+    return stale
+
+# Loaded once per process; every stage imports this instance
+RULES = load_rules()
@@ -7,16 +7,28 @@ import pandas as pd
 import numpy as np
 import re
 import json
-from difflib import SequenceMatcher, get_close_matches
+import math
+from concurrent.futures import ProcessPoolExecutor
 from docx import Document
 from docx.shared import Inches, Pt, RGBColor
 from docx.enum. text import WD_ALIGN_PARAGRAPH
 from docx. enum.table import WD_TABLE_ALIGNMENT
 from docx. oxml.shared import OxmlElement, qn
+from docx_tables import add_bulk_table
+from rules import RULES
+from canonical_groups import EXACT_GROUPING_LIMIT, StatementFeatures, similarity, group_statements, shard_positions, group_shard
+from canonical_index import CanonicalIndex
+from district_resolver import DistrictResolver
 import warnings
 from datetime import datetime
 warnings.filterwarnings('ignore')
 
+# Theme, environment and agency rules come from the shared rule set, compiled into one keyword automaton
+RULE_ENGINE = RULES.engine(theme='theme', environment='environment', agency='agency')
+
+# In parallel grouping, themes with more statements than this are split into shards of about this size
+GROUPING_SHARD_SIZE = 10000
+
 class ShikshaChaupalAnalyzer: 
     def __init__(self, csv_file):
         """Initialize analyzer with CSV data"""
@@ -27,133 +39,15 @@ class ShikshaChaupalAnalyzer:
         self.canonical_solutions = []
         
         # Initialize district mapping for ultra-aggressive extraction
-        self.district_mapping = {
-            'rohtas': 'Rohtas', 'rohtash': 'Rohtas', 'rohats': 'Rohtas', 'rotas': 'Rohtas',
-            'kaimur': 'Kaimur', 'kaimoor': 'Kaimur', 'bhabua': 'Kaimur', 'kaimūr': 'Kaimur',
-            'gaya': 'Gaya', 'gaia': 'Gaya', 'gay': 'Gaya',
-            'patna': 'Patna', 'patana': 'Patna',
-            'sitamarhi': 'Sitamarhi', 'seetamarhi': 'Sitamarhi', 'sitamari': 'Sitamarhi',
-            'west champaran': 'West Champaran', 'pashchim champaran':  'West Champaran', 
-            'w champaran': 'West Champaran', 'bettiah': 'West Champaran',
-            'east champaran': 'East Champaran', 'purvi champaran': 'East Champaran', 
-            'e champaran': 'East Champaran', 'motihari': 'East Champaran',
-            'muzaffarpur': 'Muzaffarpur', 'mujaffarpur': 'Muzaffarpur', 'muzaffarnagar': 'Muzaffarpur',
-            'saran': 'Saran', 'chapra': 'Saran', 'chhapra': 'Saran',
-            'siwan': 'Siwan', 'sivan': 'Siwan',
-            'gopalganj': 'Gopalganj', 'gopal ganj': 'Gopalganj',
-            'vaishali': 'Vaishali', 'vaisali': 'Vaishali', 'hajipur': 'Vaishali',
-            'samastipur': 'Samastipur',
-            'darbhanga': 'Darbhanga',
-            'madhubani': 'Madhubani',
-            'supaul': 'Supaul',
-            'araria': 'Araria', 'arariya': 'Araria',
-            'kishanganj': 'Kishanganj', 'kishangunj': 'Kishanganj',
-            'purnia': 'Purnia', 'purnea': 'Purnia',
-            'katihar': 'Katihar',
-            'bhagalpur': 'Bhagalpur',
-            'banka': 'Banka',
-            'munger': 'Munger', 'monghyr': 'Munger', 'mungair': 'Munger',
-            'lakhisarai': 'Lakhisarai',
-            'sheikhpura': 'Sheikhpura',
-            'nalanda': 'Nalanda', 'bihar sharif': 'Nalanda',
-            'nawada': 'Nawada',
-            'aurangabad': 'Aurangabad',
-            'jehanabad': 'Jehanabad',
-            'arwal': 'Arwal',
-            'bhojpur': 'Bhojpur', 'ara': 'Bhojpur',
-            'buxar': 'Buxar', 'buxur': 'Buxar',
-            'jamui': 'Jamui',
-            'khagaria': 'Khagaria',
-            'begusarai': 'Begusarai',
-            'saharsa': 'Saharsa',
-            'madhepura': 'Madhepura',
-            'udaipur': 'Udaipur',
-            'others': 'Others',
-        }
+        self.district_mapping = dict(RULES.district_aliases)
+        self.district_resolver = DistrictResolver(self.district_mapping, RULES.district_headquarters)
         
         # All 10 theme names
-        self.all_theme_names = [
-            'Poverty and Economic Barriers',
-            'Legal Document-linked Barriers',
-            'Child Marriage Issue',
-            'Distance and Accessibility Issues',
-            'Parental Attitudes and Socio-Cultural Barriers',
-            'School Infrastructure and Facility Issues',
-            'Teacher Capacity and Quality Issues',
-            'Safety Issues',
-            'Substance Abuse and Addiction Issues',
-            'Other Factors'
-        ]
+        self.all_theme_names = list(RULES.theme_names)
 
     def extract_district_ultra_aggressive(self, user_location):
-        """8-stage ultra-aggressive district extraction"""
-        if pd.isna(user_location):
-            return 'Others'
-        
-        original = str(user_location).strip()
-        if not original:
-            return 'Others'
-        
-        location = original.lower()
-        
-        # STAGE 1: Exact match
-        if location in self.district_mapping:
-            return self.district_mapping[location]
-        
-        # STAGE 2: Substring match
-        for variation, standard_name in self.district_mapping.items():
-            if variation in location:
-                return standard_name
-        
-        # STAGE 3: Parse comma-separated format
-        if ',' in location: 
-            parts = [p.strip() for p in location.split(',')]
-            for part in parts: 
-                if part in self.district_mapping:
-                    return self.district_mapping[part]
-                for variation, standard_name in self.district_mapping.items():
-                    if variation in part:
-                        return standard_name
-        
-        # STAGE 4: Word-by-word search
-        words = re.findall(r'\w+', location)
-        for word in words:
-            if word in self.district_mapping:
-                return self.district_mapping[word]
-        
-        # STAGE 5: Fuzzy match with common misspellings
-        for variation, standard_name in self.district_mapping.items():
-            if len(variation) >= 4: 
-                if variation[: 4] in location or location[:4] in variation:
-                    return standard_name
-        
-        # STAGE 6: Check for district headquarters/major towns
-        headquarters = {
-            'bettiah': 'West Champaran',
-            'motihari': 'East Champaran',
-            'hajipur': 'Vaishali',
-            'bihar sharif': 'Nalanda',
-            'ara': 'Bhojpur',
-            'chapra': 'Saran',
-            'chhapra': 'Saran',
-        }
-        for town, district in headquarters. items():
-            if town in location: 
-                return district
-        
-        # STAGE 7: Check for partial word matches with edit distance
-        matches = get_close_matches(location, self.district_mapping. keys(), n=1, cutoff=0.6)
-        if matches:
-            return self.district_mapping[matches[0]]
-        
-        # STAGE 8: Check individual words against district names
-        for word in words:
-            if len(word) >= 4:
-                matches = get_close_matches(word, self.district_mapping. keys(), n=1, cutoff=0.7)
-                if matches:
-                    return self.district_mapping[matches[0]]
-        
-        return 'Others'
+        """8-stage ultra-aggressive district extraction (cached and indexed, see DistrictResolver)"""
+        return self.district_resolver.resolve(user_location)
 
     def parse_participant_count(self, value):
         """Handle participant count in numeric and JSON formats"""
@@ -195,311 +89,34 @@ class ShikshaChaupalAnalyzer:
 
     def categorize_theme_ultra_aggressive(self, text):
         """Ultra-aggressive theme categorization with expanded keywords"""
-        text_lower = text.lower()
-        
-        # MASSIVELY EXPANDED keyword sets
-        themes = {
-            'Poverty and Economic Barriers': [
-                'poor', 'poverty', 'no money', 'financial', 'unemployment', 'child labour',
-                'economic', 'lack of money', 'poor condition', 'financial constraint',
-                'financial difficulty', 'cannot afford', 'expensive', 'cost', 'income',
-                'livelihood', 'work', 'labor', 'labour', 'wage', 'earning', 'breadwinner',
-                'economically weak', 'below poverty', 'bpl', 'economically backward',
-                'need money', 'no income', 'family income', 'household income'
-            ],
-            
-            'Legal Document-linked Barriers': [
-                'aadhaar', 'aadhar', 'birth certificate', 'id', 'enrollment', 'document',
-                'admission', 'enroll', 'certificate', 'proof', 'identity', 'registration',
-                'id card', 'identity proof', 'legal document', 'paperwork', 'documentation'
-            ],
-            
-            'Child Marriage Issue': [
-                'marriage', 'child marriage', 'early marriage', 'marry', 'married',
-                'wedding', 'bride', 'groom', 'husband', 'wife', 'in-laws', 'marital'
-            ],
-            
-            'Distance and Accessibility Issues': [
-                'far', 'distance', 'bus', 'road', 'rain', 'heat', 'transportation', 'transport',
-                'walk', 'travel', 'reach', 'access', 'route', 'path', 'vehicle', 'far away',
-                'long distance', 'no school in village', 'school not nearby', 'remote',
-                'weather', 'flood', 'sun', 'hot', 'cold', 'monsoon', 'season'
-            ],
-            
-            'Parental Attitudes and Socio-Cultural Barriers': [
-                'discrimination', 'cultural', 'not allowed', 'dowry', 'girls', 'purdah',
-                'social pressure', 'run away', 'attitude', 'mindset', 'belief', 'custom',
-                'tradition', 'culture', 'social', 'gender', 'boys', 'son', 'daughter',
-                'girl child', 'male', 'female', 'patriarchy', 'conservative', 'orthodox',
-                'caste', 'religion', 'community belief', 'society view', 'fear', 'shame',
-                'honor', 'izzat', 'prestige', 'reputation', 'what will people say'
-            ],
-            
-            'School Infrastructure and Facility Issues': [
-                'water', 'toilet', 'mid-day meal', 'midday', 'scholarship', 'book', 'uniform',
-                'government scheme', 'infrastructure', 'facility', 'building', 'classroom',
-                'playground', 'library', 'laboratory', 'furniture', 'bench', 'desk', 'chair',
-                'blackboard', 'whiteboard', 'electricity', 'light', 'fan', 'drinking water',
-                'sanitation', 'hygiene', 'cleanliness', 'maintenance', 'repair', 'boundary wall',
-                'compound', 'premises', 'school building', 'room', 'space', 'pad', 'sanitary',
-                'scheme not received', 'benefit not received', 'government support'
-            ],
-            
-            'Teacher Capacity and Quality Issues':  [
-                'teacher', 'teaching', 'quality', 'absent', 'shortage', 'english', 'learning',
-                'lesson', 'education quality', 'study', 'teach', 'instruction', 'pedagogy',
-                'method', 'staff', 'faculty', 'educator', 'trainer', 'coaching', 'tuition',
-                'subject', 'curriculum', 'syllabus', 'not teach properly', 'do not teach',
-                'poor teaching', 'lack of teacher', 'teacher not come', 'teacher late',
-                'attention', 'focus', 'concentrate', 'explain', 'understand'
-            ],
-            
-            'Safety Issues': [
-                'harassment', 'molestation', 'teasing', 'violence', 'unsafe', 'safety',
-                'security', 'afraid', 'fear', 'danger', 'threat', 'risk', 'harm', 'abuse',
-                'attack', 'assault', 'eve-teasing', 'stray dog', 'animal', 'criminal',
-                'rowdy', 'goon', 'eve tease', 'pass comment', 'stare', 'follow', 'trouble',
-                'bother', 'disturb', 'boundary wall', 'gate', 'watchman', 'guard', 'protection'
-            ],
-            
-            'Substance Abuse and Addiction Issues': [
-                'alcohol', 'drug', 'addiction', 'gambling', 'online game', 'mobile', 'phone',
-                'addicted', 'alcoholic', 'drunk', 'drinking', 'substance', 'tobacco', 'smoking',
-                'game', 'gaming', 'internet', 'screen', 'gadget', 'device', 'bet', 'betting',
-                'liquor', 'wine', 'beer', 'intoxication', 'addict', 'abuse'
-            ],
-            
-            'Other Factors': []
-        }
-        
-        # Score each theme
-        scores = {}
-        for theme, keywords in themes.items():
-            if theme == 'Other Factors':
-                continue
-            score = sum(1 for kw in keywords if kw in text_lower)
-            if score > 0:
-                scores[theme] = score
-        
-        # If clear winner, return it
-        if scores: 
-            max_score = max(scores.values())
-            if max_score >= 2:
-                return max(scores, key=scores.get)
-            elif max_score == 1:
-                top_theme = max(scores, key=scores.get)
-                return top_theme
-        
-        # FALLBACK LOGIC - aggressive assignment to prevent "Other Factors"
-        if any(word in text_lower for word in ['cannot', 'unable', 'afford', 'money', 'income', 'work']):
-            return 'Poverty and Economic Barriers'
-        
-        if any(word in text_lower for word in ['learn', 'study', 'education', 'quality', 'progress']):
-            return 'Teacher Capacity and Quality Issues'
-        
-        if any(word in text_lower for word in ['parent', 'family', 'home', 'household', 'mother', 'father']):
-            return 'Parental Attitudes and Socio-Cultural Barriers'
-        
-        if any(word in text_lower for word in ['school', 'facility', 'resource', 'material', 'equipment']):
-            return 'School Infrastructure and Facility Issues'
-        
-        if any(word in text_lower for word in ['go', 'come', 'reach', 'access', 'get to']):
-            return 'Distance and Accessibility Issues'
-        
-        if any(word in text_lower for word in ['community', 'society', 'social', 'people', 'village']):
-            return 'Parental Attitudes and Socio-Cultural Barriers'
-        
-        if any(word in text_lower for word in ['child', 'children', 'girl', 'boy', 'daughter', 'son']):
-            if any(word in text_lower for word in ['young', 'small', 'age', 'year']):
-                return 'Child Marriage Issue'
-            else:
-                return 'Parental Attitudes and Socio-Cultural Barriers'
-        
-        # Last resort - default to most common theme
-        return 'Parental Attitudes and Socio-Cultural Barriers'
+        return RULE_ENGINE.classify('theme', text.lower())
 
     def categorize_environment_aggressive(self, text):
         """Aggressive environment classification"""
-        text_lower = text.lower()
-        
-        school_keywords = [
-            'school', 'teacher', 'classroom', 'class', 'student', 'education',
-            'study', 'studies', 'learn', 'teaching', 'academic', 'admission',
-            'enroll', 'attendance', 'grade', 'subject', 'exam', 'books',
-            'uniform', 'midday meal', 'mid day', 'scholarship', 'library',
-            'playground', 'infrastructure', 'facility', 'toilet in school',
-            'water in school', 'school building', 'school environment'
-        ]
-        
-        home_keywords = [
-            'parent', 'parents', 'family', 'mother', 'father', 'home', 'household',
-            'house', 'sibling', 'brother', 'sister', 'domestic', 'child labour',
-            'work at home', 'family income', 'alcoholic father', 'alcoholic parent',
-            'family migration', 'family problem', 'parent awareness', 'marriage',
-            'dowry', 'attitude', 'mindset', 'belief', 'cultural belief', 'discrimination'
-        ]
-        
-        community_keywords = [
-            'village', 'community', 'society', 'road', 'transport', 'transportation',
-            'bus', 'distance', 'far', 'path', 'route', 'weather', 'rain', 'heat',
-            'flood', 'environment around', 'surroundings', 'neighborhood', 'area',
-            'locality', 'safety', 'harassment', 'molestation', 'social pressure',
-            'caste', 'tribe', 'purdah system', 'cultural practice'
-        ]
-        
-        # Count keyword matches
-        school_score = sum(2 if kw in text_lower else 0 for kw in school_keywords)
-        home_score = sum(2 if kw in text_lower else 0 for kw in home_keywords)
-        community_score = sum(2 if kw in text_lower else 0 for kw in community_keywords)
-        
-        # Additional contextual scoring
-        if any(kw in text_lower for kw in ['to school', 'from school', 'reach school', 'go to school']):
-            community_score += 3
-        
-        if any(kw in text_lower for kw in ['at home', 'in family', 'parent', 'household']):
-            home_score += 3
-        
-        if any(kw in text_lower for kw in ['in school', 'at school', 'school has', 'school lacks']):
-            school_score += 3
-        
-        scores = {
-            'School': school_score,
-            'Home': home_score,
-            'Community': community_score
-        }
-        
-        max_score = max(scores.values())
-        
-        if max_score == 0:
-            if any(word in text_lower for word in ['aadhar', 'aadhaar', 'certificate', 'document']):
-                return 'Home'
-            elif any(word in text_lower for word in ['poor', 'poverty', 'money', 'financial']):
-                return 'Home'
-            elif any(word in text_lower for word in ['quality', 'teaching', 'learning']):
-                return 'School'
-            else:
-                return 'Community'
-        
-        return max(scores, key=scores.get)
+        return RULE_ENGINE.classify('environment', text.lower())
 
     def categorize_agency_aggressive(self, text):
         """Ultra-aggressive agency classification"""
-        text_lower = text.lower()
-        
-        community_keywords = [
-            'community', 'together', 'collective', 'collectively', 'meena manch', 'chaupal',
-            'village', 'villagers', 'group', 'committee', 'organization', 'we will',
-            'we should', 'people should', 'society should', 'community will',
-            'organize', 'awareness campaign', 'meeting', 'gather', 'mobilize',
-            'social pressure', 'peer pressure', 'all together', 'united'
-        ]
-        
-        individual_keywords = [
-            'parent', 'parents', 'family', 'families', 'individual', 'mother', 'father',
-            'guardian', 'household', 'personally', 'themselves', 'myself', 'ourselves',
-            'each family', 'every family', 'people need to', 'parents must',
-            'families must', 'send children', 'educate children', 'take responsibility',
-            'own responsibility', 'self', 'personal', 'change mindset', 'change attitude'
-        ]
-        
-        institutional_keywords = [
-            'government', 'school', 'administration', 'authority', 'officials',
-            'ngo', 'organization', 'provide', 'should provide', 'must provide',
-            'give', 'scholarship', 'scheme', 'program', 'policy', 'fund', 'budget',
-            'build', 'construct', 'infrastructure', 'facility', 'appointment',
-            'hire', 'recruit', 'teacher', 'staff', 'implement', 'law', 'regulation',
-            'department', 'ministry', 'panchayat should', 'government should',
-            'school should', 'need support from', 'external support', 'systemic'
-        ]
-        
-        # Count matches with weights
-        community_score = sum(2 if kw in text_lower else 0 for kw in community_keywords)
-        individual_score = sum(2 if kw in text_lower else 0 for kw in individual_keywords)
-        institutional_score = sum(2 if kw in text_lower else 0 for kw in institutional_keywords)
-        
-        # Contextual scoring boosts
-        if any(word in text_lower for word in ['provide', 'build', 'construct', 'hire', 'appoint']):
-            institutional_score += 3
-        
-        if any(word in text_lower for word in ['organize', 'collective', 'together', 'campaign']):
-            community_score += 3
-        
-        if any(word in text_lower for word in ['parents', 'family', 'household', 'each family']):
-            individual_score += 3
-        
-        scores = {
-            'Community-led': community_score,
-            'Individual-led': individual_score,
-            'Institutional':  institutional_score
-        }
-        
-        max_score = max(scores.values())
-        
-        if max_score == 0:
-            if any(word in text_lower for word in ['school', 'teacher', 'infrastructure', 'facility', 'scholarship']):
-                return 'Institutional'
-            elif any(word in text_lower for word in ['parent', 'family', 'child', 'girl', 'boy']):
-                return 'Individual-led'
-            elif any(word in text_lower for word in ['awareness', 'educate', 'understand', 'know']):
-                return 'Community-led'
-            else: 
-                if any(word in text_lower for word in ['should', 'need', 'must', 'require']):
-                    return 'Institutional'
-                else:
-                    return 'Community-led'
-        
-        return max(scores, key=scores.get)
+        return RULE_ENGINE.classify('agency', text.lower())
 
     def semantic_similarity(self, text1, text2):
         """Calculate semantic similarity between two texts"""
-        t1 = text1.lower().strip()
-        t2 = text2.lower().strip()
-        
-        if t1 == t2:
-            return 1.0
-        
-        similarity = SequenceMatcher(None, t1, t2).ratio()
-        
-        words1 = set(t1.split())
-        words2 = set(t2.split())
-        
-        # Synonym sets
-        poverty_words = {'poor', 'poverty', 'financial', 'economic', 'money', 'hardship'}
-        distance_words = {'far', 'distance', 'away', 'distant', 'reach'}
-        document_words = {'aadhaar', 'aadhar', 'document', 'certificate', 'id'}
-        
-        if words1 & poverty_words and words2 & poverty_words:
-            similarity = max(similarity, 0.75)
-        if words1 & distance_words and words2 & distance_words:
-            similarity = max(similarity, 0.75)
-        if words1 & document_words and words2 & document_words: 
-            similarity = max(similarity, 0.75)
-        
-        return similarity
+        return similarity(StatementFeatures(text1), StatementFeatures(text2))
 
     def create_canonical_groups(self, items, threshold=0.65):
         """Create canonical groups through semantic deduplication"""
         items_sorted = sorted(items, key=lambda x:  len(x['text']), reverse=True)
-        groups = []
-        used = set()
+        texts = [item['text'] for item in items_sorted]
         
-        for i, item1 in enumerate(items_sorted):
-            if i in used: 
-                continue
-            
-            group = [item1]
-            group_indices = {i}
-            
-            for j, item2 in enumerate(items_sorted[i+1:], start=i+1):
-                if j in used:
-                    continue
-                
-                sim = self.semantic_similarity(item1['text'], item2['text'])
-                if sim >= threshold:
-                    group.append(item2)
-                    group_indices.add(j)
-            
-            used.update(group_indices)
+        # Longest first, each ungrouped item takes every later ungrouped item similar enough to it.
+        # Small sets compare all pairs; larger ones only score pairs that share an LSH or synonym bucket.
+        return self.canonical_from_members(items_sorted, group_statements(texts, threshold))
+
+    def canonical_from_members(self, items_sorted, member_groups):
+        """Canonical group dicts from lists of positions in items_sorted"""
+        groups = []
+        for members in member_groups:
+            group = [items_sorted[i] for i in members]
             
             canonical = {
                 'text': group[0]['text'],
@@ -515,14 +132,48 @@ class ShikshaChaupalAnalyzer:
         
         return groups
 
-    def process_data(self):
-        """Main data processing pipeline"""
+    def create_canonical_groups_parallel(self, item_sets, threshold=0.65, workers=None):
+        """
+        create_canonical_groups for each item list in item_sets, as jobs across worker processes.
+        Lists above GROUPING_SHARD_SIZE statements are split into shards of whole LSH/synonym
+        candidate components; grouping never links two components, so the result is the same as
+        the serial one. Shard groups are merged back in order of their canonical item.
+        """
+        plans, tasks = [], []
+        for items in item_sets:
+            items_sorted = sorted(items, key=lambda x:  len(x['text']), reverse=True)
+            texts = [item['text'] for item in items_sorted]
+            if len(texts) <= EXACT_GROUPING_LIMIT:
+                shards, exact = [np.arange(len(texts))], True
+            else:
+                shards, exact = shard_positions(texts, math.ceil(len(texts) / GROUPING_SHARD_SIZE)), False
+            plans.append((items_sorted, shards, len(tasks)))
+            tasks.extend(([texts[i] for i in positions], threshold, exact) for positions in shards)
+        
+        # Largest jobs first, so the long ones do not start last
+        order = sorted(range(len(tasks)), key=lambda t: len(tasks[t][0]), reverse=True)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = dict(zip(order, pool.map(group_shard, [tasks[t] for t in order])))
+        
+        canonical_sets = []
+        for items_sorted, shards, first_task in plans:
+            member_groups = [positions[members].tolist()
+                             for t, positions in enumerate(shards, first_task)
+                             for members in results[t]]
+            member_groups.sort(key=lambda members: members[0])
+            canonical_sets.append(self.canonical_from_members(items_sorted, member_groups))
+        return canonical_sets
+
+    def process_data(self, index_path=None, parallel=False, workers=None):
+        """
+        Main data processing pipeline. With index_path, statements are absorbed into the persistent
+        canonical-group index there instead of being regrouped from scratch. With parallel=True,
+        themes are grouped in worker processes (workers: pool size, default one per CPU).
+        """
         print("Starting data processing...")
         
-        # Apply district extraction
-        self.df['District_Standardized'] = self. df['User Location'].apply(
-            self.extract_district_ultra_aggressive
-        )
+        # Apply district extraction, once per distinct location
+        self.df['District_Standardized'] = self.district_resolver.resolve_many(self.df['User Location'])
         
         # Parse participant counts
         self.df['parsed_participants'] = self.df['Participant Count'].apply(
@@ -534,44 +185,59 @@ class ShikshaChaupalAnalyzer:
             challenges = self.extract_items(row. get('Challenges', ''))
             solutions = self. extract_items(row.get('Solutions', ''))
             district = row['District_Standardized']
+            report_id = row.get('id', idx)
             
             for c in challenges:
                 self.all_challenges.append({
                     'text': c, 
                     'district':  district, 
-                    'report_id': idx
+                    'report_id': report_id
                 })
             
             for s in solutions:
                 self. all_solutions.append({
                     'text': s, 
                     'district': district, 
-                    'report_id': idx
+                    'report_id': report_id
                 })
         
-        # Apply categorizations
-        for item in self.all_challenges:
-            item['theme'] = self.categorize_theme_ultra_aggressive(item['text'])
-            item['environment'] = self.categorize_environment_aggressive(item['text'])
+        # Apply categorizations: one automaton scan per statement serves both of its classifiers
+        labels = RULE_ENGINE.classify_batch([item['text'].lower() for item in self.all_challenges], ['theme', 'environment'])
+        for item, theme, environment in zip(self.all_challenges, labels['theme'], labels['environment']):
+            item['theme'] = theme
+            item['environment'] = environment
         
-        for item in self.all_solutions:
-            item['theme'] = self. categorize_theme_ultra_aggressive(item['text'])
-            item['agency_type'] = self.categorize_agency_aggressive(item['text'])
+        labels = RULE_ENGINE.classify_batch([item['text'].lower() for item in self.all_solutions], ['theme', 'agency'])
+        for item, theme, agency_type in zip(self.all_solutions, labels['theme'], labels['agency']):
+            item['theme'] = theme
+            item['agency_type'] = agency_type
         
         # Semantic deduplication
-        challenges_df = pd.DataFrame(self.all_challenges)
-        solutions_df = pd. DataFrame(self.all_solutions)
-        
-        # Group by theme for deduplication
-        for theme in challenges_df['theme'].unique():
-            theme_challenges = challenges_df[challenges_df['theme'] == theme]. to_dict('records')
-            theme_groups = self.create_canonical_groups(theme_challenges, threshold=0.65)
-            self.canonical_challenges.extend(theme_groups)
-        
-        for theme in solutions_df['theme'].unique():
-            theme_solutions = solutions_df[solutions_df['theme'] == theme].to_dict('records')
-            theme_groups = self.create_canonical_groups(theme_solutions, threshold=0.65)
-            self.canonical_solutions.extend(theme_groups)
+        if index_path:
+            index = CanonicalIndex.load(index_path, threshold=0.65)
+            for kind, items in (('challenges', self.all_challenges), ('solutions', self.all_solutions)):
+                absorbed, created = index.absorb(kind, items)
+                print(f"- Canonical index: {absorbed} new {kind} absorbed, {created} new groups")
+            index.save()
+            self.canonical_challenges = index.canonical_groups('challenges')
+            self.canonical_solutions = index.canonical_groups('solutions')
+        else:
+            challenges_df = pd.DataFrame(self.all_challenges)
+            solutions_df = pd. DataFrame(self.all_solutions)
+            
+            # Group by theme for deduplication
+            theme_challenges = [challenges_df[challenges_df['theme'] == theme]. to_dict('records') for theme in challenges_df['theme'].unique()]
+            theme_solutions = [solutions_df[solutions_df['theme'] == theme].to_dict('records') for theme in solutions_df['theme'].unique()]
+            
+            if parallel:
+                theme_groups = self.create_canonical_groups_parallel(theme_challenges + theme_solutions, threshold=0.65, workers=workers)
+            else:
+                theme_groups = [self.create_canonical_groups(items, threshold=0.65) for items in theme_challenges + theme_solutions]
+            
+            for groups in theme_groups[:len(theme_challenges)]:
+                self.canonical_challenges.extend(groups)
+            for groups in theme_groups[len(theme_challenges):]:
+                self.canonical_solutions.extend(groups)
         
         print(f"Processing complete:")
         print(f"- Extracted {len(self. all_challenges)} individual challenges")
@@ -618,22 +284,8 @@ class ShikshaChaupalAnalyzer:
         if title: 
             doc.add_heading(title, level=3)
         
-        table = doc.add_table(rows=1, cols=len(headers))
-        table.style = 'Light Grid Accent 1'
-        
-        # Header row
-        hdr_cells = table.rows[0]. cells
-        for i, header in enumerate(headers):
-            hdr_cells[i].text = header
-            hdr_cells[i].paragraphs[0].runs[0].font.bold = True
-        
-        # Data rows
-        for row_data in data:
-            row_cells = table.add_row().cells
-            for i, cell_data in enumerate(row_data):
-                row_cells[i].text = str(cell_data)
-        
-        return table
+        # Bold header row; data rows are written in one bulk XML pass
+        return add_bulk_table(doc, headers, data, style='Light Grid Accent 1')
 
     def generate_executive_summary(self, doc):
         """Generate Section 1: Executive Summary"""
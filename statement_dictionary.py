@@ -0,0 +1,162 @@
+"""
+Statement dictionary: a stable integer id per normalized statement text.
+
+Exploded statements and the AI mappings used to be joined on their full free text, which is slow on
+large files and drops every row whose text differs from the mapping's 'Original' by whitespace or
+case (those rows then fell through to "Other Factors"). Texts are normalized once (whitespace
+collapsed, lowercased) and given an id in order of first appearance. The dictionary is append-only
+and persisted in statement_dictionary.json, so ids stay the same across runs and stages. Joins are
+then done by array indexing on ids.
+"""
+
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+
+STATEMENT_DICTIONARY_FILE = 'statement_dictionary.json'
+ID_COLUMN = 'Statement_Id'
+MISSING_ID = -1
+
+def normalize_statement(text):
+    """Whitespace collapsed and lowercased; None for missing values."""
+    if pd.isna(text):
+        return None
+    return ' '.join(str(text).split()).lower()
+
+class StatementDictionary:
+    def __init__(self, texts=(), path=STATEMENT_DICTIONARY_FILE):
+        """texts: normalized statements, the list index being the id."""
+        self.path = path
+        self.texts = list(texts)
+        self.ids = {t: i for i, t in enumerate(self.texts)}
+        self._saved = len(self.texts)
+
+    @classmethod
+    def load(cls, path=STATEMENT_DICTIONARY_FILE):
+        """Dictionary saved at path, or an empty one if there is none yet."""
+        if not os.path.exists(path):
+            return cls(path=path)
+        try:
+            with open(path, encoding='utf-8') as f:
+                return cls(json.load(f)['texts'], path=path)
+        except (OSError, ValueError, KeyError) as e:
+            # Saved Statement_Id columns refer to this file; silently starting over would mis-join them
+            raise ValueError(f"Statement dictionary {path} is unreadable ({e}). Delete it to rebuild ids from the statement texts.") from e
+
+    def __len__(self):
+        return len(self.texts)
+
+    def encode(self, texts, add=True):
+        """
+        int64 ids for a column of raw texts; each distinct text is normalized once.
+        New texts get new ids (add=True) or MISSING_ID (add=False); missing values are always MISSING_ID.
+        """
+        codes, uniques = pd.factorize(pd.Series(texts))
+        # factorize leaves missing values out of uniques (code -1), so every key here is a real text
+        keys = [' '.join(str(text).split()).lower() for text in uniques]
+        unique_ids = np.fromiter((self.ids.get(key, MISSING_ID) for key in keys), dtype=np.int64, count=len(keys))
+        if add:
+            for i in np.flatnonzero(unique_ids == MISSING_ID):
+                key = keys[i]
+                if key not in self.ids: # the same key can come from two raw spellings
+                    self.ids[key] = len(self.texts)
+                    self.texts.append(key)
+                unique_ids[i] = self.ids[key]
+        # Spare slot so code -1 lands on MISSING_ID
+        return np.append(unique_ids, MISSING_ID)[codes]
+
+    def save(self):
+        """Writes the dictionary if ids were added since it was loaded."""
+        if len(self.texts) == self._saved:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'texts': self.texts}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._saved = len(self.texts)
+
+def saved_ids_match(df, text_col, saved, dictionary):
+    """
+    True if saved ids agree with the dictionary. One row per distinct id is compared with the
+    dictionary text, so the column is not hashed again; rows without an id must have no text.
+    """
+    if len(saved) and (saved.min() < MISSING_ID or saved.max() >= len(dictionary)):
+        return False
+    missing = saved == MISSING_ID
+    if not df[text_col].take(np.flatnonzero(missing)).isna().all():
+        return False
+    row_of = np.full(len(dictionary), MISSING_ID, dtype=np.int64)
+    row_of[saved[~missing]] = np.flatnonzero(~missing)
+    present = np.flatnonzero(row_of >= 0)
+    known = dictionary.texts
+    for i, text in zip(present.tolist(), df[text_col].take(row_of[present]).tolist()):
+        # Texts that are already single-spaced only need lowercasing
+        if not isinstance(text, str) or (text.lower() != known[i] and normalize_statement(text) != known[i]):
+            return False
+    return True
+
+def statement_ids(df, text_col, dictionary):
+    """
+    Ids of a frame's statements: its Statement_Id column if it carries one that agrees with the
+    dictionary, else encoded from text_col. Saved ids from another dictionary (missing or rebuilt
+    file) would join statements to the wrong rows, so they are re-encoded instead.
+    """
+    if ID_COLUMN in df.columns:
+        saved = df[ID_COLUMN].fillna(MISSING_ID).astype(np.int64).to_numpy()
+        if saved_ids_match(df, text_col, saved, dictionary):
+            return saved
+        print(f"   ⚠️ {ID_COLUMN} of {text_col} does not match {dictionary.path}; re-encoding from the text")
+    return dictionary.encode(df[text_col])
+
+def join_mapping(exploded, text_col, mapping, dictionary, label=None):
+    """
+    Left join of exploded statements to an AI mapping (Original|Theme|Merged_Concept) on statement ids.
+    Returns the exploded rows in order with the mapping columns and Statement_Id added. Each row gets
+    one mapping row, so the join never adds rows: the first whose Original is its exact text, else the
+    first of its statement id (a case or whitespace variant).
+    Prints the hit rate, the rows recovered over an exact text match, and the join time next to the
+    time of the string merge it replaces (run for the comparison only).
+    """
+    start = time.perf_counter()
+    ids = statement_ids(exploded, text_col, dictionary)
+    map_ids = statement_ids(mapping, 'Original', dictionary)
+
+    # id -> first mapping row of that statement; one spare last slot so MISSING_ID (-1) maps to MISSING_ID
+    size = max(len(dictionary), int(ids.max(initial=MISSING_ID)) + 1, int(map_ids.max(initial=MISSING_ID)) + 1) + 1
+    row_of = np.full(size, MISSING_ID, dtype=np.int64)
+    first = np.flatnonzero((map_ids >= 0) & ~pd.Series(map_ids).duplicated().to_numpy())
+    row_of[map_ids[first]] = first
+    rows = row_of[ids]
+
+    # Statements with several mapping rows (variants, or a text the AI returned twice): a row whose
+    # text is one of them exactly takes that one, as the string join did
+    shared = np.unique(map_ids[(map_ids >= 0) & pd.Series(map_ids).duplicated().to_numpy()])
+    if len(shared):
+        originals = mapping['Original'].to_numpy()
+        exact_row = {}
+        for r in np.flatnonzero(np.isin(map_ids, shared)).tolist():
+            exact_row.setdefault((map_ids[r], originals[r]), r)
+        candidates = np.flatnonzero(np.isin(ids, shared))
+        for r, text in zip(candidates.tolist(), exploded[text_col].take(candidates).tolist()):
+            rows[r] = exact_row.get((ids[r], text), rows[r])
+
+    mapped = mapping.drop(columns=[ID_COLUMN], errors='ignore').reset_index(drop=True).reindex(rows).reset_index(drop=True)
+    joined = pd.concat([exploded.drop(columns=[ID_COLUMN], errors='ignore').reset_index(drop=True), mapped], axis=1)
+    joined[ID_COLUMN] = ids
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    exploded.merge(mapping.drop(columns=[ID_COLUMN], errors='ignore'), left_on=text_col, right_on='Original', how='left')
+    string_elapsed = time.perf_counter() - start
+
+    # An exact text match has the same id, so comparing each row with its mapping row is enough
+    matched = rows >= 0
+    exact = np.zeros(len(rows), dtype=bool)
+    exact[matched] = exploded[text_col].to_numpy()[matched] == mapping['Original'].to_numpy()[rows[matched]]
+    hit_rate = matched.mean() * 100 if len(rows) else 100.0
+    print(f"   🔗 {label or text_col}: {matched.sum():,}/{len(rows):,} rows mapped ({hit_rate:.1f}%), "
+          f"{(matched & ~exact).sum():,} recovered over exact text match, "
+          f"joined in {elapsed * 1000:.1f} ms (string merge: {string_elapsed * 1000:.1f} ms)")
+    return joined